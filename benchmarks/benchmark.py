@@ -0,0 +1,407 @@
+"""Benchmark suite for toppred.
+
+Measures wall time, peak resident memory and peak traced allocations of the
+main entry points of toppred on synthetic data. Each measurement runs in a
+fresh process, such that peak memory is not influenced by earlier runs.
+Results are written as JSON lines, which can be compared between runs.
+
+Examples
+--------
+Run the default sweep and store the results::
+
+    python benchmarks/benchmark.py --output results.jsonl
+
+Run a custom sweep and compare with a previous run::
+
+    python benchmarks/benchmark.py --n-samples 1e5 1e6 --k 1 10 \\
+        --output new.jsonl --compare results.jsonl
+"""
+
+# Imports
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Make toppred importable when running from a source checkout
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+################################################################################
+#                                     Data                                     #
+################################################################################
+
+def generate(
+        n_samples: int,
+        n_classes: int,
+        k        : int,
+        dtype    : str,
+        weighted : bool,
+        seed     : int = 0,
+    ) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Generate synthetic y_true, y_pred and sample_weight.
+
+        Parameters
+        ----------
+        n_samples : int
+            Number of samples to generate.
+
+        n_classes : int
+            Number of classes to draw labels from.
+
+        k : int
+            Number of top predictions per sample.
+
+        dtype : str
+            Label type, one of 'int', 'str' (numpy unicode) or 'object'
+            (Python strings).
+
+        weighted : bool
+            If True, also generate random sample weights.
+
+        seed : int, default = 0
+            Random seed.
+
+        Returns
+        -------
+        y_true : np.ndarray of shape=(n_samples,)
+            True labels.
+
+        y_pred : np.ndarray of shape=(n_samples, k)
+            Predicted labels, the true label occurs in about half of the
+            samples at a random rank.
+
+        sample_weight : Optional[np.ndarray] of shape=(n_samples,)
+            Sample weights, None if not weighted.
+        """
+    random = np.random.default_rng(seed)
+
+    # Generate integer labels
+    y_true = random.integers(0, n_classes, n_samples)
+    y_pred = random.integers(0, n_classes, (n_samples, k))
+
+    # Place true label at a random rank in half of the samples
+    hit = np.flatnonzero(random.random(n_samples) < 0.5)
+    y_pred[hit, random.integers(0, k, hit.shape[0])] = y_true[hit]
+
+    # Convert to requested label type
+    if dtype != 'int':
+        names  = np.asarray([f"label_{i}" for i in range(n_classes)])
+        names  = names if dtype == 'str' else names.astype(object)
+        y_true = names[y_true]
+        y_pred = names[y_pred]
+
+    # Generate sample weights
+    sample_weight = random.random(n_samples) if weighted else None
+
+    # Return result
+    return y_true, y_pred, sample_weight
+
+################################################################################
+#                                 Entry points                                 #
+################################################################################
+
+def run_top_predictions(y_true, y_pred, sample_weight):
+    """Iterate over all top predictions."""
+    from toppred.predictions import top_predictions
+    for _ in top_predictions(y_true, y_pred): pass
+
+
+def run_top_classification_report(y_true, y_pred, sample_weight):
+    """Compute the full text report."""
+    from toppred.metrics import top_classification_report
+    top_classification_report(
+        y_true, y_pred, sample_weight=sample_weight, zero_division=0,
+    )
+
+
+def run_top_accuracy_score(y_true, y_pred, sample_weight):
+    """Compute the accuracy of all top predictions."""
+    from toppred.metrics import top_accuracy_score
+    top_accuracy_score(y_true, y_pred, sample_weight=sample_weight)
+
+
+def prepare_reports2string(y_true, y_pred, sample_weight):
+    """Compute the reports that are rendered by reports2string."""
+    from toppred.metrics import top_classification_report
+    return list(top_classification_report(
+        y_true, y_pred, sample_weight=sample_weight, output_dict=True,
+        zero_division=0,
+    ).values()),
+
+
+def run_reports2string(reports):
+    """Render reports as string."""
+    from toppred.utils import reports2string
+    reports2string(reports)
+
+
+# Entry points as name -> (prepare, run), where prepare maps the generated
+# data to the arguments of run and is excluded from the measurement.
+ENTRY_POINTS = {
+    'top_predictions'          : (None, run_top_predictions),
+    'top_classification_report': (None, run_top_classification_report),
+    'top_accuracy_score'       : (None, run_top_accuracy_score),
+    'reports2string'           : (prepare_reports2string, run_reports2string),
+}
+
+################################################################################
+#                                 Measurement                                  #
+################################################################################
+
+def measure(case: Dict, repeat: int) -> Dict:
+    """Measure a single case, should be run in a fresh process.
+
+        Parameters
+        ----------
+        case : dict
+            Case to measure, containing the entry point and the parameters of
+            :py:meth:`generate`.
+
+        repeat : int
+            Number of times to repeat the measurement, the minimum wall time
+            is reported.
+
+        Returns
+        -------
+        result : dict
+            Case extended with the measured wall time in seconds, peak RSS
+            and peak traced allocations in bytes.
+        """
+    # Generate data
+    prepare, run = ENTRY_POINTS[case['entry_point']]
+    data = generate(**{
+        key: value for key, value in case.items() if key != 'entry_point'
+    })
+    if prepare is not None:
+        data = prepare(*data)
+
+    # Warm up imports, such that they are not measured
+    run(*data)
+    rss_before = peak_rss()
+
+    # Measure wall time
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(*data)
+        times.append(time.perf_counter() - start)
+
+    # Measure allocations, separately as tracing slows down execution
+    tracemalloc.start()
+    run(*data)
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Return result
+    return dict(
+        case,
+        time              = min(times),
+        peak_rss          = peak_rss(),
+        peak_rss_run      = peak_rss() - rss_before,
+        peak_traced       = peak_traced,
+        traced_per_sample = peak_traced / max(1, case['n_samples']),
+    )
+
+
+def peak_rss() -> int:
+    """Peak resident set size of the current process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def cases(
+        entry_points: List[str],
+        n_samples   : List[int],
+        n_classes   : List[int],
+        k           : List[int],
+        dtypes      : List[str],
+        weighted    : List[bool],
+        max_elements: int,
+    ) -> Iterable[Dict]:
+    """Generate all cases of a sweep, skipping those for which y_pred would
+        contain more than max_elements elements."""
+    for entry_point, n, c, k_, dtype, weight in itertools.product(
+            entry_points, n_samples, n_classes, k, dtypes, weighted,
+        ):
+        if n * k_ > max_elements: continue
+        yield dict(
+            entry_point = entry_point,
+            n_samples   = n,
+            n_classes   = c,
+            k           = k_,
+            dtype       = dtype,
+            weighted    = weight,
+        )
+
+
+def metadata() -> Dict:
+    """Collect metadata of the benchmark environment."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output = True,
+            text           = True,
+            cwd            = os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return dict(
+        commit    = commit,
+        python    = platform.python_version(),
+        numpy     = np.__version__,
+        platform  = platform.platform(),
+        processor = platform.processor(),
+        cpu_count = os.cpu_count(),
+    )
+
+################################################################################
+#                                  Comparison                                  #
+################################################################################
+
+def load(path: str) -> Dict[Tuple, Dict]:
+    """Load results from a JSON lines file, indexed by case."""
+    results = dict()
+    with open(path) as infile:
+        for line in infile:
+            result = json.loads(line)
+            if 'entry_point' in result:
+                results[case_key(result)] = result
+    return results
+
+
+def case_key(result: Dict) -> Tuple:
+    """Key identifying the case of a result."""
+    return tuple(result[key] for key in (
+        'entry_point', 'n_samples', 'n_classes', 'k', 'dtype', 'weighted',
+    ))
+
+
+def compare(baseline: Dict[Tuple, Dict], results: List[Dict]) -> str:
+    """Create a table comparing results with a baseline."""
+    lines = [
+        f"{'case':<60} {'time':>10} {'ratio':>7} {'traced MB':>10} {'ratio':>7}"
+    ]
+    for result in results:
+        key  = case_key(result)
+        base = baseline.get(key)
+        time_ratio  = result['time'] / base['time'] if base else float('nan')
+        alloc_ratio = (
+            result['peak_traced'] / base['peak_traced']
+            if base and base['peak_traced'] else float('nan')
+        )
+        lines.append(
+            f"{' '.join(map(str, key)):<60} {result['time']:>10.4f} "
+            f"{time_ratio:>7.2f} {result['peak_traced'] / 2**20:>10.1f} "
+            f"{alloc_ratio:>7.2f}"
+        )
+    return "\n".join(lines)
+
+################################################################################
+#                                     Main                                     #
+################################################################################
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description = "Benchmark toppred entry points on synthetic data.",
+    )
+    parser.add_argument('--entry-points', nargs='+', default=list(ENTRY_POINTS),
+        choices=list(ENTRY_POINTS), help="entry points to benchmark")
+    parser.add_argument('--n-samples', nargs='+', type=lambda x: int(float(x)),
+        default=[10**3, 10**5, 10**6], help="numbers of samples (1e3 to 1e8)")
+    parser.add_argument('--n-classes', nargs='+', type=lambda x: int(float(x)),
+        default=[2, 100, 10**4], help="numbers of classes (2 to 1e5)")
+    parser.add_argument('--k', nargs='+', type=int, default=[1, 10],
+        help="numbers of top predictions (1 to 100)")
+    parser.add_argument('--dtypes', nargs='+', default=['int', 'str'],
+        choices=['int', 'str', 'object'], help="label types")
+    parser.add_argument('--weighted', nargs='+', default=['no', 'yes'],
+        choices=['no', 'yes'], help="whether to use sample weights")
+    parser.add_argument('--max-elements', type=lambda x: int(float(x)),
+        default=10**8, help="skip cases where n_samples x k exceeds this")
+    parser.add_argument('--repeat', type=int, default=3,
+        help="number of timed repetitions per case")
+    parser.add_argument('--max-traced-per-sample', type=float,
+        help="fail if a case allocates more bytes per sample than this budget")
+    parser.add_argument('--output', help="JSON lines file to write results to")
+    parser.add_argument('--compare', help="JSON lines file of a baseline run")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run benchmark suite."""
+    args = parse_args(argv)
+
+    # Load baseline, if given
+    baseline = load(args.compare) if args.compare else None
+
+    # Open output file, starting with metadata
+    output = open(args.output, 'w') if args.output else None
+    if output is not None:
+        output.write(json.dumps({'metadata': metadata()}) + "\n")
+
+    # Run each case in a fresh process
+    results = list()
+    context = multiprocessing.get_context('spawn')
+    for case in cases(
+            entry_points = args.entry_points,
+            n_samples    = args.n_samples,
+            n_classes    = args.n_classes,
+            k            = args.k,
+            dtypes       = args.dtypes,
+            weighted     = [weighted == 'yes' for weighted in args.weighted],
+            max_elements = args.max_elements,
+        ):
+        with context.Pool(1) as pool:
+            result = pool.apply(measure, (case, args.repeat))
+        results.append(result)
+
+        # Write and print result
+        if output is not None:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+        print(
+            f"{' '.join(map(str, case_key(result))):<60} "
+            f"{result['time']:>10.4f}s {result['peak_traced'] / 2**20:>10.1f}MB "
+            f"traced {result['peak_rss'] / 2**20:>10.1f}MB RSS",
+            flush = True,
+        )
+
+    # Close output file
+    if output is not None:
+        output.close()
+
+    # Compare with baseline, if given
+    if baseline is not None:
+        print()
+        print(compare(baseline, results))
+
+    # Check memory budget, if given
+    if args.max_traced_per_sample is not None:
+        exceeded = [
+            result for result in results
+            if result['traced_per_sample'] > args.max_traced_per_sample
+        ]
+        for result in exceeded:
+            print(
+                f"{' '.join(map(str, case_key(result)))} allocated "
+                f"{result['traced_per_sample']:.1f} bytes per sample, budget "
+                f"is {args.max_traced_per_sample:.1f}",
+                file = sys.stderr,
+            )
+        if exceeded: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import numpy as np
+import unittest
+import warnings
+from toppred.bootstrap import confidence_interval, top_bootstrap
+from toppred.metrics import top_classification_report
+
+class BootstrapTest(unittest.TestCase):
+    """Tests the functionality of the toppred.bootstrap module."""
+
+    def test_replicates(self):
+        """Test whether replicates equal reports of resampled samples."""
+        random = np.random.default_rng(0)
+        y_true = random.integers(0, 5, 60)
+        y_pred = random.integers(0, 6, (60, 3))
+        sample_weight = random.random(60)
+
+        for labels in [None, [0, 1, 2, 7]]:
+            for weights in [None, sample_weight]:
+                result = top_bootstrap(
+                    y_true, y_pred,
+                    labels        = labels,
+                    sample_weight = weights,
+                    n_bootstraps  = 10,
+                    method        = "multinomial",
+                    batch_size    = 4,
+                    random_state  = 1,
+                )
+
+                # Recreate resample counts of first batch
+                seed   = np.random.SeedSequence(1).spawn(3)[0]
+                counts = np.random.default_rng(seed).multinomial(
+                    60, np.full(60, 1 / 60), 4,
+                )
+
+                for replicate in range(4):
+                    index = np.repeat(np.arange(60), counts[replicate])
+                    with warnings.catch_warnings():
+                        warnings.simplefilter('ignore')
+                        reports = top_classification_report(
+                            y_true[index], y_pred[index],
+                            labels        = labels,
+                            sample_weight = None if weights is None else
+                                            weights[index],
+                            output_dict   = True,
+                            zero_division = 0,
+                        )
+
+                    # Perform checks
+                    for top, report in reports.items():
+                        for average in ['macro avg', 'weighted avg']:
+                            for metric, value in report[average].items():
+                                if metric == 'support': continue
+                                self.assertAlmostEqual(
+                                    value,
+                                    result[average][metric][replicate, top],
+                                    places = 10,
+                                )
+                        self.assertAlmostEqual(
+                            report['accuracy'] if 'accuracy' in report else
+                            report['micro avg']['f1-score'],
+                            result['micro avg']['f1-score'][replicate, top],
+                            places = 10,
+                        )
+
+
+    def test_reproducible(self):
+        """Test whether results depend only on the seed and batch size."""
+        random = np.random.default_rng(1)
+        y_true = random.choice(['a', 'b', 'c'], 100).astype(object)
+        y_pred = random.choice(['a', 'b', 'c', 'd'], (100, 2)).astype(object)
+
+        results = [
+            top_bootstrap(
+                y_true, y_pred, n_bootstraps=50, batch_size=8, n_jobs=n_jobs,
+                random_state=3,
+            )
+            for n_jobs in [None, 4]
+        ]
+
+        # Perform checks
+        for average, metrics in results[0].items():
+            for metric, replicates in metrics.items():
+                self.assertEqual(replicates.shape, (50, 2))
+                self.assertTrue(np.array_equal(
+                    replicates, results[1][average][metric], equal_nan=True,
+                ))
+
+
+    def test_confidence_interval(self):
+        """Test whether confidence intervals contain the requested mass."""
+        replicates = np.arange(1001, dtype=float).reshape(-1, 1)
+        lower, upper = confidence_interval(replicates, 0.9)
+
+        # Perform checks
+        self.assertAlmostEqual(lower[0],  50.)
+        self.assertAlmostEqual(upper[0], 950.)
+        with self.assertRaises(ValueError):
+            confidence_interval(replicates, 1.)
+
+
+if __name__ == "__main__":
+    unittest.main()
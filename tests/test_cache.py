@@ -0,0 +1,116 @@
+import numpy as np
+import os
+import tempfile
+import unittest
+from toppred.cache import ReportCache, fingerprint
+from toppred.metrics import top_classification_report
+
+class CacheTest(unittest.TestCase):
+    """Tests the functionality of the toppred.cache module."""
+
+    def setUp(self):
+        """Create random test cases."""
+        random = np.random.default_rng(0)
+        self.cases = [(
+            random.integers(0, 5, 200),
+            random.integers(0, 5, (200, 3)),
+            random.random(200),
+        ) for _ in range(3)]
+
+
+    def test_fingerprint(self):
+        """Test whether fingerprints depend on content, dtype and shape."""
+        y_true, y_pred, sample_weight = self.cases[0]
+        key = fingerprint(y_true, y_pred, None)
+
+        # Perform checks
+        self.assertEqual(key, fingerprint(y_true.copy(), y_pred.copy(), None))
+        self.assertEqual(key, fingerprint(y_true, np.asfortranarray(y_pred), None))
+        self.assertNotEqual(key, fingerprint(y_true, y_pred, sample_weight))
+        self.assertNotEqual(key, fingerprint(y_true, y_pred.astype(np.int32), None))
+        self.assertNotEqual(key, fingerprint(y_true, y_pred.reshape(300, 2), None))
+        self.assertNotEqual(key, fingerprint(y_true, y_pred[::-1], None))
+        self.assertNotEqual(
+            fingerprint(np.asarray([1, '1'], dtype=object)),
+            fingerprint(np.asarray(['1', 1], dtype=object)),
+        )
+
+
+    def test_memory(self):
+        """Test whether cached reports equal uncached reports and skip
+            recomputation for different formatting options."""
+        cache = ReportCache()
+        y_true, y_pred, sample_weight = self.cases[0]
+
+        for digits, output_dict in [(2, False), (4, False), (2, True)]:
+            self.assertEqual(
+                top_classification_report(
+                    y_true, y_pred, sample_weight=sample_weight,
+                    digits=digits, output_dict=output_dict, cache=cache,
+                ),
+                top_classification_report(
+                    y_true, y_pred, sample_weight=sample_weight,
+                    digits=digits, output_dict=output_dict,
+                ),
+            )
+
+        # Perform checks
+        self.assertEqual(len(cache), 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+
+    def test_eviction(self):
+        """Test whether least recently used entries are evicted."""
+        cache = ReportCache(maxsize=2)
+        keys  = [fingerprint(*case) for case in self.cases]
+        for case in [self.cases[0], self.cases[1], self.cases[0], self.cases[2]]:
+            cache.confusion(*case)
+
+        # Perform checks
+        self.assertEqual([key in cache for key in keys], [True, False, True])
+
+        # Evict by size
+        cache = ReportCache(maxsize=None, max_bytes=1)
+        cache.confusion(*self.cases[0])
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+        with self.assertRaises(ValueError):
+            ReportCache(maxsize=-1)
+
+
+    def test_disk(self):
+        """Test whether entries on disk are shared between caches."""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ReportCache(maxsize=2, directory=directory)
+            for case in self.cases:
+                cache.confusion(*case)
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+            # A new cache finds the entries of the previous cache
+            other  = ReportCache(directory=directory)
+            result = other.confusion(*self.cases[2])
+            self.assertEqual((other.hits, other.misses), (1, 0))
+            self.assertEqual(
+                top_classification_report(
+                    *self.cases[2][:2], sample_weight=self.cases[2][2],
+                    cache=other,
+                ),
+                top_classification_report(
+                    *self.cases[2][:2], sample_weight=self.cases[2][2],
+                ),
+            )
+            self.assertTrue(result.weighted)
+
+            # Non-string objects cannot be serialized and are not cached
+            y_true = np.asarray([1, 2], dtype=object)
+            y_pred = np.asarray([[2, 1], [1, 2]], dtype=object)
+            other.confusion(y_true, y_pred)
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+            # Clear cache
+            cache.clear()
+            self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import json
+import numpy as np
+import os
+import tempfile
+import unittest
+from toppred.cli import main
+from toppred.metrics import top_classification_report
+
+class CliTest(unittest.TestCase):
+    """Tests the functionality of the toppred.cli module."""
+
+    def setUp(self):
+        """Create random test case in temporary directory."""
+        random = np.random.default_rng(0)
+        self.y_true = random.integers(0, 6, 500)
+        self.y_pred = random.integers(0, 6, (500, 4))
+        self.sample_weight = random.integers(1, 4, 500)
+        self.directory = tempfile.TemporaryDirectory()
+
+        # Write test case to files
+        np.save(self.path('y_true.npy'), self.y_true)
+        np.save(self.path('sample_weight.npy'), self.sample_weight)
+        np.savetxt(
+            self.path('y_pred.csv'), self.y_pred, fmt='%d', delimiter=',',
+            header='0,1,2,3', comments='',
+        )
+
+    def tearDown(self):
+        """Remove temporary directory."""
+        self.directory.cleanup()
+
+    def path(self, name):
+        """Get path of file in temporary directory."""
+        return os.path.join(self.directory.name, name)
+
+    def run_main(self, *argv):
+        """Run command and return its output."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main([self.path('y_true.npy'), self.path('y_pred.csv'), *argv])
+        return output.getvalue()
+
+
+    def test_text(self):
+        """Test whether the text report equals top_classification_report."""
+        for workers in ['1', '3']:
+            self.assertEqual(
+                self.run_main(
+                    '-k', '3', '--block-size', '64', '--workers', workers,
+                    '--sample-weight', self.path('sample_weight.npy'),
+                ).strip("\n"),
+                top_classification_report(
+                    self.y_true, self.y_pred[:, :3],
+                    sample_weight = self.sample_weight,
+                ).strip("\n"),
+            )
+
+
+    def test_json(self):
+        """Test whether the JSON report equals the report dictionary."""
+        result = json.loads(self.run_main('--format', 'json'))
+        expected = top_classification_report(
+            self.y_true, self.y_pred, output_dict=True,
+        )
+
+        # Perform checks
+        self.assertEqual(set(result), {str(top) for top in expected})
+        for top, report in expected.items():
+            self.assertEqual(result[str(top)], {
+                str(label): value for label, value in report.items()
+            })
+
+
+    def test_output(self):
+        """Test whether the report is written to the output file."""
+        self.run_main('--output', self.path('report.txt'))
+        with open(self.path('report.txt')) as infile:
+            self.assertEqual(
+                infile.read().strip("\n"),
+                top_classification_report(self.y_true, self.y_pred).strip("\n"),
+            )
+
+
+    def test_invalid(self):
+        """Test whether invalid arguments and files exit with an error."""
+        for argv in [
+                ['--dtype', 'float32'],
+                ['--dtype', 'label'],
+                ['--sample-weight', self.path('missing.npy')],
+                ['--output', self.path(os.path.join('missing', 'report.txt'))],
+            ]:
+            with contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit) as context:
+                    self.run_main(*argv)
+            self.assertNotIn(context.exception.code, [None, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import numpy as np
+import tracemalloc
+import unittest
+import warnings
+from toppred import confusion, kernels
+from toppred.comparison import discordant, mcnemar, top_comparison_report
+from toppred.metrics import top_classification_report
+from toppred.predictions import CHUNK_SIZE
+
+class ComparisonTest(unittest.TestCase):
+    """Tests the functionality of the toppred.comparison module."""
+
+    def setUp(self):
+        """Create random test case of multiple models."""
+        random = np.random.default_rng(0)
+        self.y_true  = random.integers(0, 8, 500)
+        self.y_preds = random.integers(0, 9, (4, 500, 3))
+        self.sample_weight = random.random(500)
+
+
+    def test_equivalence(self):
+        """Test whether metrics of each model equal its classification report."""
+        for kwargs in [
+                {},
+                {'sample_weight': self.sample_weight},
+                {'labels': [0, 1, 2, 3, 20]},
+            ]:
+            result = top_comparison_report(
+                self.y_true, self.y_preds, output_dict=True, **kwargs,
+            )
+            for model, y_pred in enumerate(self.y_preds):
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    expected = top_classification_report(
+                        self.y_true, y_pred, output_dict=True, **kwargs,
+                    )
+                for top in range(y_pred.shape[1]):
+                    metrics = result[top][str(model)]
+                    if 'accuracy' in expected[top]:
+                        self.assertAlmostEqual(
+                            metrics['accuracy'], expected[top]['accuracy'],
+                        )
+                    for average in ['macro', 'weighted']:
+                        self.assertAlmostEqual(
+                            metrics[f'{average} f1'],
+                            expected[top][f'{average} avg']['f1-score'],
+                        )
+
+
+    def test_reference(self):
+        """Test whether models are compared with the reference model."""
+        result = top_comparison_report(
+            self.y_true, self.y_preds, names=['a', 'b', 'c', 'd'], reference=1,
+            output_dict=True,
+        )
+        hits = self.y_preds == self.y_true[:, None]
+
+        # Perform checks
+        for top, report in result.items():
+            self.assertNotIn('p-value', report['b'])
+            correct = np.any(hits[:, :, :top+1], axis=2)
+            for model, name in enumerate('acd'):
+                model = model + (model > 0)
+                self.assertEqual(
+                    report[name]['wins'], np.sum(correct[model] & ~correct[1]),
+                )
+                self.assertEqual(
+                    report[name]['losses'], np.sum(~correct[model] & correct[1]),
+                )
+                self.assertTrue(0 <= report[name]['p-value'] <= 1)
+
+        text = top_comparison_report(
+            self.y_true, self.y_preds, names=['a', 'b', 'c', 'd'], reference=1,
+        )
+        self.assertIn('p-value', text)
+
+        with self.assertRaises(ValueError):
+            top_comparison_report(self.y_true, self.y_preds, reference=4)
+        with self.assertRaises(ValueError):
+            top_comparison_report(self.y_true, self.y_preds[0])
+
+
+    def test_mcnemar(self):
+        """Test whether McNemar's test gives known p-values."""
+        self.assertEqual(mcnemar(0, 0), 1.)
+        self.assertEqual(mcnemar(5, 5), 1.)
+        self.assertAlmostEqual(mcnemar(0, 5), 0.0625)
+        self.assertAlmostEqual(mcnemar(1, 9), 0.021484375)
+        # Chi-squared approximation with continuity correction
+        self.assertAlmostEqual(mcnemar(600, 500), 0.002836, places=5)
+
+        wins, losses = discordant(np.asarray([[0, 1, 2]]), np.asarray([2, 1, 0]), 2)
+        self.assertEqual(wins.tolist(), [[1, 1]])
+        self.assertEqual(losses.tolist(), [[1, 1]])
+
+
+    def test_peak_memory(self):
+        """Test whether temporaries are bounded per model, such that only the
+            hit ranks of 1 byte per model and sample grow with the number of
+            models."""
+        random = np.random.default_rng(0)
+        n_models, n_samples, n_predictions = 16, 2**17, 5
+        y_true  = random.integers(0, 100, n_samples)
+        y_preds = random.integers(0, 100, (n_models, n_samples, n_predictions))
+        sample_weight = random.random(n_samples)
+
+        backend, chunk_size = kernels.BACKEND, confusion.COUNT_CHUNK_SIZE
+        kernels.set_backend("numpy")
+        confusion.COUNT_CHUNK_SIZE = 2**16
+        tracemalloc.start()
+        try:
+            top_comparison_report(
+                y_true, y_preds, sample_weight=sample_weight, reference=0,
+            )
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            kernels.set_backend(backend)
+            confusion.COUNT_CHUNK_SIZE = chunk_size
+
+        # Perform checks
+        chunks = 32 * confusion.COUNT_CHUNK_SIZE + 16 * CHUNK_SIZE * n_predictions
+        self.assertLess(peak, (24 + n_models) * n_samples + chunks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,349 @@
+import numpy as np
+import unittest
+import warnings
+from sklearn.metrics import classification_report
+from toppred.confusion import TopConfusion
+from toppred.predictions import top_predictions
+
+class ConfusionTest(unittest.TestCase):
+    """Tests the functionality of the toppred.confusion module."""
+
+    def reference(self, y_true, y_pred, **kwargs):
+        """Compute reference reports with sklearn for each top prediction."""
+        return [
+            classification_report(
+                y_true,
+                prediction.copy(),
+                output_dict = True,
+                **kwargs,
+            )
+            for _, prediction in top_predictions(y_true, np.array(y_pred))
+        ]
+
+    def assertReportsEqual(self, expected, actual, exact=True):
+        """Assert that two lists of report dictionaries are equal."""
+        self.assertEqual(len(expected), len(actual))
+        for report_expected, report_actual in zip(expected, actual):
+            self.assertEqual(set(report_expected), set(report_actual))
+            for label, metrics in report_expected.items():
+                # Accuracy is stored as a single value
+                if not isinstance(metrics, dict):
+                    metrics = {None: metrics}
+                    actual  = {None: report_actual[label]}
+                else:
+                    actual  = report_actual[label]
+
+                for metric, value in metrics.items():
+                    if exact:
+                        self.assertEqual(value, actual[metric])
+                    else:
+                        self.assertAlmostEqual(value, actual[metric], places=10)
+
+
+    def test_sklearn_equivalence(self):
+        """Test whether reports are equal to those of sklearn."""
+        random = np.random.default_rng(0)
+
+        for trial in range(50):
+            # Create random test case
+            n_samples = random.integers(1, 50)
+            n_classes = random.integers(1, 6)
+            y_true = random.integers(0, n_classes    , n_samples)
+            y_pred = random.integers(0, n_classes + 2, (n_samples, 3))
+            kwargs = dict(zero_division=trial % 2)
+            if trial % 3 == 1:
+                kwargs['sample_weight'] = random.integers(0, 4, n_samples)
+            if trial % 4 == 1:
+                kwargs['labels'] = list(range(0, n_classes, 2))
+
+            # Perform checks
+            self.assertReportsEqual(
+                self.reference(y_true, y_pred, **kwargs),
+                TopConfusion.from_predictions(
+                    y_true        = y_true,
+                    y_pred        = y_pred,
+                    labels        = kwargs.get('labels'),
+                    sample_weight = kwargs.get('sample_weight'),
+                ).report(
+                    labels        = kwargs.get('labels'),
+                    zero_division = kwargs['zero_division'],
+                ),
+            )
+
+
+    def test_float_weights(self):
+        """Test whether reports with float weights are equal to sklearn."""
+        random = np.random.default_rng(1)
+        y_true = random.integers(0, 5, 100)
+        y_pred = random.integers(0, 5, (100, 4))
+        sample_weight = random.random(100)
+
+        # Perform checks
+        self.assertReportsEqual(
+            self.reference(y_true, y_pred, sample_weight=sample_weight),
+            TopConfusion.from_predictions(
+                y_true        = y_true,
+                y_pred        = y_pred,
+                sample_weight = sample_weight,
+            ).report(),
+            exact = False,
+        )
+
+
+    def test_string_labels(self):
+        """Test whether reports with string labels are equal to sklearn."""
+        # Test case
+        y_true = np.asarray(['a', 'b', 'c', 'b', 'a'])
+        y_pred = np.asarray([
+            ['a', 'b', 'c'],
+            ['c', 'a', 'b'],
+            ['d', 'c', 'a'],
+            ['c', 'a', 'd'],
+            ['a', 'b', 'c'],
+        ])
+
+        # Perform checks
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.assertReportsEqual(
+                self.reference(y_true, y_pred),
+                TopConfusion.from_predictions(y_true, y_pred).report(),
+            )
+
+
+    def test_unobserved_labels(self):
+        """Test whether labels without samples are not stored, but reported
+            in the same way as sklearn."""
+        random = np.random.default_rng(3)
+        y_true = random.integers(0, 5, 50)
+        y_pred = random.integers(0, 5, (50, 3))
+        labels = np.arange(1000)
+
+        for zero_division in [0, 1]:
+            confusion = TopConfusion.from_predictions(y_true, y_pred)
+            self.assertEqual(confusion.n_classes, 5)
+
+            # Full report equals sklearn, micro average is checked elsewhere
+            # as sklearn versions disagree on whether it equals accuracy here
+            expected = [
+                {
+                    label: metrics for label, metrics in report.items()
+                    if label not in ('accuracy', 'micro avg')
+                }
+                for report in self.reference(
+                    y_true, y_pred, labels=labels, zero_division=zero_division,
+                )
+            ]
+            self.assertReportsEqual(expected, [
+                {
+                    label: metrics for label, metrics in report.items()
+                    if label not in ('accuracy', 'micro avg')
+                }
+                for report in confusion.report(
+                    labels = labels, zero_division = zero_division,
+                )
+            ])
+
+            # Observed report only contains labels with samples
+            observed = confusion.report(
+                labels        = labels,
+                zero_division = zero_division,
+                observed_only = True,
+            )
+            for report_expected, report_observed in zip(expected, observed):
+                self.assertEqual(
+                    set(report_observed) - {'micro avg', 'macro avg', 'weighted avg'},
+                    {str(label) for label in range(5)},
+                )
+                for label, metrics in report_expected.items():
+                    if label in report_observed:
+                        self.assertEqual(metrics, report_observed[label])
+
+
+    def test_worst_labels(self):
+        """Test whether n_worst reports the labels with lowest F1-score."""
+        random = np.random.default_rng(4)
+        y_true = random.integers(0, 8, 100)
+        y_pred = random.integers(0, 8, (100, 3))
+
+        confusion = TopConfusion.from_predictions(y_true, y_pred)
+        expected  = confusion.report()
+        worst     = confusion.report(n_worst=3)
+
+        for report_expected, report_worst in zip(expected, worst):
+            scores = sorted(
+                report_expected[str(label)]['f1-score'] for label in range(8)
+            )
+            labels = [label for label in report_worst if label not in (
+                'accuracy', 'macro avg', 'weighted avg'
+            )]
+            self.assertEqual(
+                [report_worst[label]['f1-score'] for label in labels],
+                scores[:3],
+            )
+            for average in ['accuracy', 'macro avg', 'weighted avg']:
+                self.assertEqual(report_expected[average], report_worst[average])
+
+        with self.assertRaises(ValueError):
+            confusion.report(n_worst=-1)
+
+
+    def test_zero_division(self):
+        """Test whether ill-defined metrics raise a single warning and unit
+            weights give the same counts as unweighted samples."""
+        y_true = np.asarray([0, 0, 1, 2, 2, 3])
+        y_pred = np.asarray([[0, 1], [2, 0], [2, 1], [0, 2], [0, 2], [1, 0]])
+
+        confusion = TopConfusion.from_predictions(y_true, y_pred)
+        weighted  = TopConfusion.from_predictions(
+            y_true, y_pred, sample_weight=np.ones(y_true.shape[0]),
+        )
+
+        # Weighted counts are accumulated as float64
+        for attribute in ['tp', 'pred', 'true', 'n_pred', 'n_true']:
+            self.assertTrue(np.array_equal(
+                getattr(confusion, attribute), getattr(weighted, attribute),
+            ))
+        self.assertEqual(weighted.tp.dtype, np.float64)
+
+        # Precision, recall and F1-score are ill-defined for some labels
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            reports = confusion.report(labels=[0, 1, 2, 3, 4])
+        self.assertEqual(len(caught), 1)
+        for metric in ['Precision', 'Recall', 'F-score']:
+            self.assertIn(metric, str(caught[0].message))
+
+        # Zero division values are applied without warnings
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            for zero_division in [0, 1]:
+                result = confusion.report(
+                    labels=[0, 1, 2, 3, 4], zero_division=zero_division,
+                )
+                for report, expected in zip(result, reports):
+                    self.assertEqual(report['4']['recall'], zero_division)
+                    self.assertEqual(
+                        report['0']['recall'], expected['0']['recall'],
+                    )
+
+
+    def test_groups(self):
+        """Test whether grouped counts equal the counts of each group."""
+        random = np.random.default_rng(5)
+        y_true = random.integers(0, 6, 300)
+        y_pred = random.integers(0, 7, (300, 3))
+        groups = random.choice(['nl', 'de', 'fr', 'us'], 300)
+        sample_weight = random.random(300)
+
+        for weights in [None, sample_weight]:
+            result = TopConfusion.from_groups(
+                y_true, y_pred, groups, sample_weight=weights,
+            )
+
+            # Perform checks
+            self.assertEqual(list(result), ['de', 'fr', 'nl', 'us'])
+            for group, confusion in result.items():
+                mask = groups == group
+                expected = TopConfusion.from_predictions(
+                    y_true[mask], y_pred[mask],
+                    sample_weight = None if weights is None else weights[mask],
+                )
+                self.assertEqual(confusion.weighted, expected.weighted)
+                self.assertTrue(np.array_equal(confusion.classes, expected.classes))
+                for attribute in ['tp', 'pred', 'true', 'n_pred', 'n_true']:
+                    self.assertTrue(np.allclose(
+                        getattr(confusion, attribute),
+                        getattr(expected , attribute),
+                    ))
+
+        # Test case when groups has an incorrect shape
+        with self.assertRaises(ValueError):
+            TopConfusion.from_groups(y_true, y_pred, groups[:-1])
+
+
+    def test_merge(self):
+        """Test whether merged shards equal the confusion of all samples."""
+        random = np.random.default_rng(2)
+        y_true = random.integers(0, 6, 100)
+        y_pred = random.integers(0, 6, (100, 3))
+        sample_weight = random.integers(1, 5, 100)
+
+        for weights in [None, sample_weight]:
+            # Compute confusion over shards, with different label sets
+            shards = [
+                TopConfusion.from_predictions(
+                    y_true        = y_true[start:start+10],
+                    y_pred        = y_pred[start:start+10],
+                    sample_weight = None if weights is None else
+                                    weights[start:start+10],
+                )
+                for start in range(0, 100, 10)
+            ]
+            expected = TopConfusion.from_predictions(
+                y_true, y_pred, sample_weight=weights,
+            )
+
+            # Perform checks
+            for merged in [sum(shards), shards[-1] + sum(shards[:-1])]:
+                self.assertReportsEqual(expected.report(), merged.report())
+                self.assertEqual(merged.weighted, weights is not None)
+
+        # Test case when number of predictions differs
+        with self.assertRaises(ValueError):
+            shards[0] + TopConfusion.from_predictions(y_true, y_pred[:, :2])
+
+
+    def test_serialization(self):
+        """Test whether serialized confusion counts can be loaded again."""
+        # Test case
+        y_true = np.asarray(['a', 'b', 'c', 'b', 'a'])
+        y_pred = np.asarray([
+            ['a', 'b', 'c'],
+            ['c', 'a', 'b'],
+            ['d', 'c', 'a'],
+            ['c', 'a', 'd'],
+            ['a', 'b', 'c'],
+        ])
+
+        for sample_weight in [None, [1, 2, 3, 4, 5], [0.5, 1, 1, 2, 3]]:
+            confusion = TopConfusion.from_predictions(
+                y_true, y_pred, sample_weight=sample_weight,
+            )
+            loaded = TopConfusion.from_bytes(confusion.to_bytes())
+
+            # Perform checks
+            self.assertTrue(np.all(loaded.classes == confusion.classes))
+            self.assertEqual(loaded.weighted, confusion.weighted)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                self.assertReportsEqual(confusion.report(), loaded.report())
+
+
+    def test_non_mutating(self):
+        """Test whether computing confusion leaves y_pred untouched."""
+        # Test case
+        y_true = np.asarray([1, 2, 3])
+        y_pred = np.asarray([[1, 2], [1, 2], [1, 2]])
+        original = y_pred.copy()
+
+        # Compute confusion
+        TopConfusion.from_predictions(y_true, y_pred)
+
+        # Perform checks
+        self.assertTrue(np.all(y_pred == original), "y_pred was modified")
+
+
+    def test_sample_weight_shape(self):
+        """Test whether we receive an error when sample_weight has an incorrect
+            shape."""
+        with self.assertRaises(ValueError):
+            TopConfusion.from_predictions(
+                y_true        = [1, 2, 3],
+                y_pred        = [[1], [2], [3]],
+                sample_weight = [1, 2],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
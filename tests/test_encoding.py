@@ -0,0 +1,111 @@
+import contextlib
+import numpy as np
+import sys
+import unittest
+from unittest import mock
+from toppred.confusion import TopConfusion
+from toppred.encoding import LabelEncoding, factorize, optional_import
+from toppred.metrics import top_classification_report
+
+class EncodingTest(unittest.TestCase):
+    """Tests the functionality of the toppred.encoding module."""
+
+    def test_fit(self):
+        """Test the correctness of the label encoding."""
+        # Test case
+        y_true = np.asarray(['b', 'a', 'c'], dtype=object)
+        y_pred = np.asarray([
+            ['a', 'b', 'x'],
+            ['d', 'a', 'y'],
+            ['c', 'z', 'a'],
+        ], dtype=object)
+
+        # Encode labels
+        encoding = LabelEncoding.fit(y_true, y_pred, labels=['e'])
+
+        # Perform checks
+        self.assertEqual(encoding.classes.tolist(), ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(encoding.y_true.tolist(), [1, 0, 2])
+        self.assertEqual(
+            encoding.y_pred.tolist(),
+            [[0, 1, -1], [3, 0, -1], [2, -1, 0]],
+        )
+        self.assertEqual(encoding.y_true.dtype, np.int8)
+        self.assertEqual(encoding.ranks().tolist(), [1, 1, 0])
+        self.assertEqual(encoding.decode(encoding.y_true).tolist(), y_true.tolist())
+        self.assertEqual(len(encoding[1:]), 2)
+
+
+    def test_factorize(self):
+        """Test whether all factorize strategies give the same result."""
+        optional_import('pandas')
+        random = np.random.default_rng(2)
+        cases = [
+            random.integers(-100, 100, 1000).astype(np.int8),   # dense
+            random.integers(0, 50, 1000) * 10**12,               # sparse
+            random.random(1000).round(1),                        # float
+            np.asarray(['b', 'a', 'c', 'a']),                    # string
+            np.asarray(['b', 'a', 'c', 'a'], dtype=object),      # object
+        ]
+
+        for values in cases:
+            expected_classes, expected_codes = np.unique(
+                values, return_inverse=True,
+            )
+            lookup = np.concatenate([values[:3], values[:3] + values[:1]])
+
+            # Test with and without pandas
+            for pandas in [True, False]:
+                with mock.patch.dict(
+                    sys.modules, {'pandas': None},
+                ) if not pandas else contextlib.nullcontext():
+                    classes, codes = factorize(values)
+                    _, known = factorize(lookup, classes)
+
+                # Perform checks
+                self.assertTrue(np.all(classes == expected_classes))
+                self.assertTrue(np.all(codes == expected_codes.reshape(-1)))
+                self.assertTrue(np.all(
+                    (known == -1) == ~np.isin(lookup, classes)
+                ))
+
+
+    def test_object_labels(self):
+        """Test whether object labels produce the same report as strings."""
+        random = np.random.default_rng(0)
+        labels = np.asarray(['cat', 'dog', 'fish', 'bird', 'mouse'])
+        y_true = labels[random.integers(0, 5, 200)]
+        y_pred = labels[random.integers(0, 5, (200, 3))]
+
+        # Perform checks
+        for n_jobs in [None, 2]:
+            self.assertEqual(
+                top_classification_report(
+                    y_true.astype(object),
+                    y_pred.astype(object),
+                    output_dict = True,
+                    n_jobs      = n_jobs,
+                ),
+                top_classification_report(y_true, y_pred, output_dict=True),
+            )
+
+
+    def test_reuse(self):
+        """Test whether an encoding can be reused with different weights."""
+        random = np.random.default_rng(1)
+        y_true = random.integers(0, 5, 100) * 1000
+        y_pred = random.integers(0, 5, (100, 3)) * 1000
+        encoding = LabelEncoding.fit(y_true, y_pred)
+
+        # Perform checks
+        for sample_weight in [None, random.integers(1, 5, 100)]:
+            self.assertEqual(
+                TopConfusion.from_encoding(encoding, sample_weight).report(),
+                TopConfusion.from_predictions(
+                    y_true, y_pred, sample_weight=sample_weight,
+                ).report(),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import numpy as np
+import threading
+import time
+import unittest
+from toppred.cache import ReportCache
+from toppred.confusion import TopConfusion
+from toppred.evaluator import AsyncEvaluator, atop_classification_report
+from toppred.metrics import top_classification_report
+from unittest import mock
+
+class EvaluatorTest(unittest.TestCase):
+    """Tests the functionality of the toppred.evaluator module."""
+
+    def setUp(self):
+        """Create random test cases."""
+        random = np.random.default_rng(0)
+        self.cases = [(
+            random.integers(0, 5, 300),
+            random.integers(0, 5, (300, 3)),
+        ) for _ in range(4)]
+
+    def slow_counts(self, delay=0.1):
+        """Patch counting to be slow and record the number of concurrent
+            computations."""
+        count = TopConfusion.from_predictions
+        state = {'active': 0, 'maximum': 0}
+        lock  = threading.Lock()
+
+        def from_predictions(*args, **kwargs):
+            """Count confusion slowly."""
+            with lock:
+                state['active' ] += 1
+                state['maximum'] = max(state['maximum'], state['active'])
+            time.sleep(delay)
+            try:
+                return count(*args, **kwargs)
+            finally:
+                with lock: state['active'] -= 1
+
+        return state, mock.patch.object(
+            TopConfusion, 'from_predictions', side_effect=from_predictions,
+        )
+
+
+    def test_report(self):
+        """Test whether reports equal top_classification_report."""
+        y_true, y_pred = self.cases[0]
+
+        async def main():
+            async with AsyncEvaluator(max_workers=2) as evaluator:
+                return await asyncio.gather(
+                    evaluator.report(y_true, y_pred, zero_division=0),
+                    evaluator.report(y_true, y_pred, digits=4, output_dict=True),
+                    atop_classification_report(y_true, y_pred, zero_division=0),
+                )
+
+        text, dictionary, default = asyncio.run(main())
+        self.assertEqual(text, top_classification_report(
+            y_true, y_pred, zero_division=0,
+        ))
+        self.assertEqual(text, default)
+        self.assertEqual(dictionary, top_classification_report(
+            y_true, y_pred, output_dict=True,
+        ))
+
+        with self.assertRaises(ValueError):
+            asyncio.run(atop_classification_report(
+                y_true, y_pred, sample_weight=np.zeros(y_true.shape[0]),
+            ))
+
+
+    def test_coalesce(self):
+        """Test whether identical concurrent requests are computed once."""
+        y_true, y_pred = self.cases[0]
+        state, patch = self.slow_counts()
+
+        async def main(evaluator):
+            return await asyncio.gather(*[
+                evaluator.report(y_true, y_pred, digits=digits)
+                for digits in range(2, 6)
+            ])
+
+        evaluator = AsyncEvaluator(max_workers=4)
+        with patch:
+            reports = asyncio.run(main(evaluator))
+        evaluator.close()
+
+        # Perform checks
+        self.assertEqual((evaluator.computed, evaluator.coalesced), (1, 3))
+        self.assertEqual(reports[2], top_classification_report(
+            y_true, y_pred, digits=4,
+        ))
+
+        # A cache also serves requests that are not concurrent
+        evaluator = AsyncEvaluator(cache=ReportCache())
+        for _ in range(2):
+            asyncio.run(evaluator.confusion(y_true, y_pred))
+        evaluator.close()
+        self.assertEqual(evaluator.computed, 1)
+
+
+    def test_backpressure(self):
+        """Test whether pending requests and used threads are bounded and the
+            event loop is not blocked."""
+        state, patch = self.slow_counts(delay=0.05)
+
+        async def main(evaluator):
+            # Count event loop iterations while requests are processed
+            ticks   = 0
+            pending = 0
+            async def tick():
+                nonlocal ticks, pending
+                while True:
+                    pending = max(pending, evaluator.pending)
+                    ticks  += 1
+                    await asyncio.sleep(0.005)
+            ticker = asyncio.ensure_future(tick())
+
+            await asyncio.gather(*[
+                evaluator.confusion(y_true, y_pred)
+                for y_true, y_pred in self.cases * 2
+            ])
+            ticker.cancel()
+            return ticks, pending
+
+        evaluator = AsyncEvaluator(max_workers=2, max_pending=3)
+        with patch:
+            ticks, pending = asyncio.run(main(evaluator))
+        evaluator.close()
+
+        # Perform checks
+        self.assertLessEqual(state['maximum'], 2)
+        self.assertLessEqual(pending, 3)
+        self.assertGreater(ticks, 10)
+
+        with self.assertRaises(ValueError):
+            AsyncEvaluator(max_pending=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
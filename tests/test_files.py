@@ -0,0 +1,201 @@
+import numpy as np
+import os
+import tempfile
+import unittest
+from toppred.encoding import optional_import
+from toppred.files import iter_csv, narrow, read_blocks, rechunk
+from toppred.metrics import top_classification_report
+from toppred.streaming import TopAccumulator
+
+class FilesTest(unittest.TestCase):
+    """Tests the functionality of the toppred.files module."""
+
+    def setUp(self):
+        """Create random test case and temporary directory."""
+        random = np.random.default_rng(0)
+        self.y_true = random.integers(0, 6, 1000)
+        self.y_pred = random.integers(0, 6, (1000, 5))
+        self.sample_weight = random.random(1000)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove temporary directory."""
+        self.directory.cleanup()
+
+    def path(self, name):
+        """Get path of file in temporary directory."""
+        return os.path.join(self.directory.name, name)
+
+    def assertBlocksEqual(self, blocks, n_predictions=5):
+        """Assert that blocks concatenate to the test case."""
+        y_true, y_pred, sample_weight = zip(*blocks)
+        self.assertTrue(np.array_equal(np.concatenate(y_true), self.y_true))
+        self.assertTrue(np.array_equal(
+            np.concatenate(y_pred), self.y_pred[:, :n_predictions],
+        ))
+        if sample_weight[0] is not None:
+            self.assertTrue(np.array_equal(
+                np.concatenate(sample_weight), self.sample_weight,
+            ))
+
+
+    def test_arrays(self):
+        """Test whether arrays are read in blocks of block_size rows."""
+        blocks = list(read_blocks(
+            self.y_true, self.y_pred, self.sample_weight, block_size=300,
+        ))
+
+        # Perform checks
+        self.assertEqual([len(block[0]) for block in blocks], [300, 300, 300, 100])
+        self.assertBlocksEqual(blocks)
+
+
+    def test_npy(self):
+        """Test whether .npy files are memory-mapped and read in blocks."""
+        np.save(self.path('y_true.npy'), self.y_true)
+        np.save(self.path('y_pred.npy'), self.y_pred)
+
+        blocks = list(read_blocks(
+            self.path('y_true.npy'),
+            self.path('y_pred.npy'),
+            block_size    = 128,
+            n_predictions = 3,
+        ))
+
+        # Perform checks
+        self.assertIsInstance(blocks[0][1], np.memmap)
+        self.assertBlocksEqual(blocks, n_predictions=3)
+
+        # Accumulated report equals report of full arrays
+        accumulator = TopAccumulator()
+        for block in read_blocks(
+                self.path('y_true.npy'), self.path('y_pred.npy'),
+                sample_weight = self.sample_weight,
+                block_size    = 128,
+            ):
+            accumulator.update(*block)
+        self.assertEqual(
+            accumulator.report(),
+            top_classification_report(
+                self.y_true, self.y_pred, sample_weight=self.sample_weight,
+            ),
+        )
+
+
+    def test_csv(self):
+        """Test whether CSV files with a header are read in blocks."""
+        np.savetxt(
+            self.path('y_true.csv'), self.y_true, fmt='%d', header='y_true',
+            comments='',
+        )
+        np.savetxt(
+            self.path('y_pred.csv'), self.y_pred.astype(str), fmt='label_%s',
+            delimiter=',', header='0,1,2,3,4', comments='',
+        )
+
+        blocks = list(read_blocks(
+            self.path('y_true.csv'),
+            self.path('y_pred.csv'),
+            block_size    = 300,
+            n_predictions = 1,
+        ))
+
+        # Perform checks
+        self.assertTrue(np.array_equal(
+            np.concatenate([block[0] for block in blocks]), self.y_true,
+        ))
+        self.assertTrue(np.array_equal(
+            np.concatenate([block[1] for block in blocks]),
+            np.char.add('label_', self.y_pred[:, :1].astype(str)),
+        ))
+
+        # Type is determined from all blocks, not only from the first block
+        y_true = self.y_true.astype(float)
+        y_true[-1] = 0.5
+        np.savetxt(
+            self.path('y_true.csv'), y_true, fmt='%g', header='y_true',
+            comments='',
+        )
+        blocks = list(iter_csv(self.path('y_true.csv'), block_size=300))
+        self.assertTrue(all(block.dtype == np.float64 for block in blocks))
+        self.assertTrue(np.array_equal(np.concatenate(blocks), y_true))
+
+        # Empty lines are skipped
+        with open(self.path('y_pred.csv'), 'w') as outfile:
+            outfile.write('0,1\n1,2\n\n2,3\n\n')
+        blocks = list(iter_csv(self.path('y_pred.csv'), block_size=1))
+        self.assertEqual(np.concatenate(blocks).tolist(), [[1, 2], [2, 3]])
+
+        # Rows with a different number of columns raise an error
+        with open(self.path('y_pred.csv'), 'w') as outfile:
+            outfile.write('0,1\n1,2\n2\n')
+        with self.assertRaisesRegex(ValueError, 'Line 3 of .*y_pred.csv'):
+            list(iter_csv(self.path('y_pred.csv'), block_size=1))
+
+
+    @unittest.skipIf(optional_import('pyarrow') is None, "requires pyarrow")
+    def test_columnar(self):
+        """Test whether Parquet and Arrow files are read in blocks."""
+        import pyarrow as pa
+        import pyarrow.feather
+        import pyarrow.parquet
+
+        # Create tables with a column per prediction and a list column
+        y_true = pa.table({'y_true': self.y_true})
+        y_pred = pa.table({
+            str(i): self.y_pred[:, i] for i in range(self.y_pred.shape[1])
+        })
+        y_list = pa.table({'y_pred': pa.FixedSizeListArray.from_arrays(
+            self.y_pred.reshape(-1), self.y_pred.shape[1],
+        )})
+
+        # Write tables with multiple row groups
+        pa.parquet.write_table(y_true, self.path('y_true.parquet'), row_group_size=70)
+        pa.parquet.write_table(y_pred, self.path('y_pred.parquet'), row_group_size=90)
+        pa.feather.write_feather(y_list, self.path('y_pred.arrow'), chunksize=110)
+
+        # Perform checks
+        for y_pred in ['y_pred.parquet', 'y_pred.arrow']:
+            blocks = list(read_blocks(
+                self.path('y_true.parquet'),
+                self.path(y_pred),
+                block_size    = 100,
+                n_predictions = 2,
+            ))
+            self.assertTrue(all(len(block[0]) == 100 for block in blocks))
+            self.assertBlocksEqual(blocks, n_predictions=2)
+
+
+    def test_mismatch(self):
+        """Test whether sources with different lengths raise an error."""
+        with self.assertRaises(ValueError):
+            list(read_blocks(self.y_true[:-1], self.y_pred, block_size=100))
+        with self.assertRaises(ValueError):
+            list(read_blocks(self.y_true, self.y_pred, block_size=0))
+        with self.assertRaises(ValueError):
+            list(read_blocks(self.path('y_true.txt'), self.y_pred))
+
+
+    def test_rechunk(self):
+        """Test whether blocks are regrouped into blocks of block_size."""
+        blocks = [np.arange(n) for n in [3, 5, 2, 4, 4, 1]]
+        result = list(rechunk(iter(blocks), 4))
+
+        # Perform checks
+        self.assertEqual([len(block) for block in result], [4, 4, 4, 4, 3])
+        self.assertTrue(np.array_equal(
+            np.concatenate(result), np.concatenate(blocks),
+        ))
+
+
+    def test_narrow(self):
+        """Test whether labels are narrowed to the given dtype."""
+        self.assertEqual(narrow(self.y_pred, np.int8).dtype, np.int8)
+        self.assertEqual(narrow(self.y_pred).dtype, self.y_pred.dtype)
+        self.assertEqual(narrow(np.asarray(['a']), np.int8).dtype.kind, 'U')
+        with self.assertRaises(ValueError):
+            narrow(np.asarray([0, 300]), np.int8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+import unittest
+
+class ImportTest(unittest.TestCase):
+    """Tests that importing toppred stays lightweight."""
+
+    def run_python(self, code):
+        """Run code in a fresh interpreter and return its output."""
+        return subprocess.run(
+            [sys.executable, '-c', code],
+            check          = True,
+            capture_output = True,
+            text           = True,
+        ).stdout
+
+
+    def test_no_heavy_imports(self):
+        """Test whether toppred and its native metrics import neither sklearn
+            nor pandas, for both integer and string labels."""
+        output = self.run_python(
+            "import sys, warnings\n"
+            "import toppred\n"
+            "assert 'toppred.metrics' not in sys.modules\n"
+            "from toppred.metrics import top_classification_report\n"
+            "from toppred.metrics import top_accuracy_score\n"
+            "from toppred.predictions import top_predictions\n"
+            "from toppred.streaming import TopAccumulator\n"
+            "warnings.simplefilter('ignore')\n"
+            "top_classification_report([1, 2, 3], [[1, 2], [2, 1], [1, 2]])\n"
+            "top_accuracy_score([1, 2, 3], [[1, 2], [2, 1], [1, 2]])\n"
+            "top_classification_report(['a', 'b'], [['a', 'b'], ['a', 'c']])\n"
+            "top_classification_report(\n"
+            "    ['a', 'b'], [['a', 'b'], ['a', 'c']], labels=['a', 'c'],\n"
+            ")\n"
+            "print(sorted({name.split('.')[0] for name in sys.modules} & "
+            "{'pandas', 'sklearn', 'scipy'}))\n"
+        )
+
+        # Perform checks
+        self.assertEqual(output.strip(), "[]")
+
+
+    def test_import_time(self):
+        """Benchmark the import time of toppred on top of numpy."""
+        # Measure import time
+        times = [float(self.run_python(
+            "import time, numpy\n"
+            "start = time.perf_counter()\n"
+            "import toppred.metrics, toppred.predictions, toppred.streaming\n"
+            "print(time.perf_counter() - start)\n"
+        )) for _ in range(3)]
+
+        # Perform checks, generous bound as importing sklearn takes seconds
+        self.assertLess(min(times), 0.5, f"Importing toppred took {times}s")
+
+
+if __name__ == "__main__":
+    unittest.main()
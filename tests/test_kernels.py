@@ -0,0 +1,84 @@
+import numpy as np
+import unittest
+from toppred import kernels
+from toppred.encoding import optional_import
+from toppred.predictions import hit_ranks, top_predictions, top_predictions_array
+
+@unittest.skipIf(optional_import('numba') is None, "requires numba")
+class KernelsTest(unittest.TestCase):
+    """Tests that compiled kernels are equivalent to the NumPy implementation."""
+
+    def setUp(self):
+        """Create random test cases with various dtypes and layouts."""
+        random = np.random.default_rng(0)
+        y_true = random.integers(0, 10, 500)
+        y_pred = random.integers(0, 10, (500, 7))
+
+        self.cases = [
+            (y_true, y_pred),
+            (y_true.astype(np.int8), y_pred.astype(np.uint16)),
+            (y_true.astype(float), y_pred.astype(np.float32)),
+            (y_true, np.asfortranarray(y_pred)),
+            (y_true[::2], y_pred[::2, ::2]),
+            (y_true, y_pred[:, :1]),
+            (y_true[:0], y_pred[:0]),
+        ]
+
+    def tearDown(self):
+        """Restore default backend."""
+        kernels.set_backend("auto")
+
+    def compute(self, backend, method, *args):
+        """Compute method using the given backend."""
+        kernels.set_backend(backend)
+        return method(*args)
+
+
+    def test_hit_ranks(self):
+        """Test whether compiled hit ranks equal NumPy hit ranks."""
+        for y_true, y_pred in self.cases:
+            self.assertTrue(np.array_equal(
+                self.compute("numba", hit_ranks, y_true, y_pred),
+                self.compute("numpy", hit_ranks, y_true, y_pred),
+            ))
+
+
+    def test_top_predictions(self):
+        """Test whether compiled top predictions equal NumPy predictions."""
+        for y_true, y_pred in self.cases:
+            self.assertTrue(np.array_equal(
+                self.compute("numba", top_predictions_array, y_true, y_pred),
+                self.compute("numpy", top_predictions_array, y_true, y_pred),
+            ))
+
+            results = list()
+            for backend in ["numba", "numpy"]:
+                kernels.set_backend(backend)
+                results.append([
+                    prediction.copy()
+                    for _, prediction in top_predictions(y_true, y_pred)
+                ])
+            self.assertTrue(np.array_equal(*results))
+
+
+    def test_fallback(self):
+        """Test whether non-numeric labels and small inputs use NumPy."""
+        y_true = np.asarray(['a', 'b'])
+        y_pred = np.asarray([['b', 'a'], ['c', 'd']])
+
+        kernels.set_backend("numba")
+        self.assertIsNone(kernels.kernels(y_pred, y_true))
+        self.assertTrue(np.array_equal(hit_ranks(y_true, y_pred), [1, 2]))
+
+        kernels.set_backend("auto")
+        self.assertIsNone(kernels.kernels(np.zeros((10, 2)), np.zeros(10)))
+        self.assertIsNotNone(kernels.kernels(
+            np.zeros((kernels.MIN_SIZE, 1)), np.zeros(kernels.MIN_SIZE),
+        ))
+
+        with self.assertRaises(ValueError):
+            kernels.set_backend("cuda")
+
+
+if __name__ == "__main__":
+    unittest.main()
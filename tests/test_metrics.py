@@ -1,6 +1,12 @@
 import numpy as np
+import tracemalloc
 import unittest
-from toppred.metrics import top_classification_report
+import warnings
+from sklearn.metrics import accuracy_score, classification_report
+from toppred import confusion, kernels
+from toppred.metrics import mean_reciprocal_rank, top_accuracy_score
+from toppred.metrics import top_classification_report, top_group_report
+from toppred.predictions import CHUNK_SIZE, hit_ranks, top_predictions
 
 class PredictionTest(unittest.TestCase):
     """Tests the functionality of the toppred.metrics module."""
@@ -92,5 +98,182 @@ class PredictionTest(unittest.TestCase):
                         )
 
 
+    def test_n_jobs(self):
+        """Test whether parallel reports equal sequential reports."""
+        random = np.random.default_rng(0)
+        y_true = random.integers(0, 10, 1000)
+        y_pred = random.integers(0, 10, (1000, 5))
+        sample_weight = random.integers(1, 5, 1000)
+
+        # Perform checks
+        for n_jobs in [2, 3, -1]:
+            self.assertEqual(
+                top_classification_report(
+                    y_true        = y_true,
+                    y_pred        = y_pred,
+                    sample_weight = sample_weight,
+                    output_dict   = True,
+                    n_jobs        = n_jobs,
+                ),
+                top_classification_report(
+                    y_true        = y_true,
+                    y_pred        = y_pred,
+                    sample_weight = sample_weight,
+                    output_dict   = True,
+                ),
+            )
+        with self.assertRaises(ValueError):
+            top_classification_report(y_true, y_pred, n_jobs=0)
+
+
+    def test_top_group_report(self):
+        """Test whether group reports equal the report of each group."""
+        random = np.random.default_rng(1)
+        y_true = random.integers(0, 6, 400)
+        y_pred = random.integers(0, 6, (400, 3))
+        groups = random.integers(0, 20, 400)
+        sample_weight = random.integers(1, 5, 400)
+
+        for output_dict in [False, True]:
+            reports = top_group_report(
+                y_true, y_pred, groups,
+                sample_weight = sample_weight,
+                output_dict   = output_dict,
+                zero_division = 0,
+            )
+
+            # Perform checks
+            self.assertEqual(set(reports), set(groups.tolist()))
+            for group, report in reports.items():
+                mask = groups == group
+                self.assertEqual(report, top_classification_report(
+                    y_true[mask], y_pred[mask],
+                    sample_weight = sample_weight[mask],
+                    output_dict   = output_dict,
+                    zero_division = 0,
+                ))
+
+        # Weights of all samples or of a group that are zero raise an error
+        for weights in [np.zeros(400), np.where(groups == 3, 0, sample_weight)]:
+            with self.assertRaises(ValueError):
+                top_group_report(y_true, y_pred, groups, sample_weight=weights)
+
+
+    def test_top_accuracy_score(self):
+        """Test whether top_accuracy_score equals sklearn's accuracy_score."""
+        random = np.random.default_rng(0)
+        y_true = random.integers(0, 10, 1000)
+        y_pred = random.integers(0, 10, (1000, 5))
+        sample_weight = random.random(1000)
+
+        for weights in [None, sample_weight]:
+            # Compute expected accuracy
+            expected = [
+                accuracy_score(y_true, prediction, sample_weight=weights)
+                for _, prediction in top_predictions(y_true, y_pred)
+            ]
+
+            # Perform checks
+            for chunk_size in [1, 7, 65536]:
+                np.testing.assert_allclose(
+                    top_accuracy_score(
+                        y_true        = y_true,
+                        y_pred        = y_pred,
+                        sample_weight = weights,
+                        chunk_size    = chunk_size,
+                    ),
+                    expected,
+                )
+
+
+    def test_mean_reciprocal_rank(self):
+        """Test the correctness of mean_reciprocal_rank."""
+        # Test case
+        y_true = [1, 2, 3, 4]
+        y_pred = [[1, 2], [1, 2], [3, 1], [1, 1]]
+
+        # Perform checks
+        self.assertAlmostEqual(mean_reciprocal_rank(y_true, y_pred), 2.5 / 4)
+        self.assertAlmostEqual(
+            mean_reciprocal_rank(y_true, y_pred, sample_weight=[1, 2, 0, 1]),
+            2 / 4,
+        )
+
+
+    def test_invalid_input(self):
+        """Test whether input rejected by scikit-learn raises a ValueError,
+            scikit-learn raises a TypeError for mixed object labels."""
+        y_pred = np.asarray([[1, 2], [2, 1], [1, 2]])
+        cases = [
+            (['a', 'b', 'a'], y_pred, None),                            # mixed
+            (np.asarray(['a', 2, 1], dtype=object), y_pred, None),      # mixed
+            ([1., np.nan, 2.], y_pred, None),                           # NaN
+            ([1, 2, 1], np.where(y_pred == 1, np.inf, y_pred), None),   # inf
+            ([.5, 1.5, .5], y_pred / 2, None),                          # float
+            ([1, 2, 1], np.asarray([[.5], [1], [2]], dtype=object), None),
+            ([1, 2, 1], y_pred, [0, 0, 0]),                             # zero
+            ([1, 2, 1], y_pred, [1, np.nan, 1]),                        # NaN
+        ]
+
+        # Perform checks
+        for y_true, y_pred, sample_weight in cases:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                with self.assertRaises((TypeError, ValueError)):
+                    classification_report(
+                        y_true, y_pred[:, 0], sample_weight=sample_weight,
+                    )
+            with self.assertRaises(ValueError):
+                top_classification_report(
+                    y_true, y_pred, sample_weight=sample_weight,
+                )
+
+        # Chunks may have zero weight as long as the report does not
+        report = top_classification_report(
+            [1, 2, 1, 2], [[1, 2], [2, 1], [1, 2], [1, 2]],
+            sample_weight = [0, 0, 1, 1],
+            n_jobs        = 2,
+            output_dict   = True,
+            zero_division = 0,
+        )
+        self.assertEqual(report[0]['accuracy'], 0.5)
+
+
+    def test_peak_memory(self):
+        """Test whether integer labels are evaluated with a peak memory of at
+            most 24 bytes per sample beyond the input, independent of the
+            number of top predictions, plus a constant for chunks."""
+        random = np.random.default_rng(0)
+        n_samples, n_predictions = 2**19, 10
+        y_true = random.integers(0, 1000, n_samples)
+        y_pred = random.integers(0, 1000, (n_samples, n_predictions))
+
+        # Measure traced allocations, with NumPy implementation
+        def peak(method, *args, **kwargs):
+            """Get peak traced allocations of method."""
+            tracemalloc.start()
+            try:
+                method(*args, **kwargs)
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        backend, chunk_size = kernels.BACKEND, confusion.COUNT_CHUNK_SIZE
+        kernels.set_backend("numpy")
+        confusion.COUNT_CHUNK_SIZE = 2**16
+        try:
+            chunks = 32 * confusion.COUNT_CHUNK_SIZE + 16 * CHUNK_SIZE * n_predictions
+            self.assertLess(
+                peak(top_classification_report, y_true, y_pred, zero_division=0),
+                24 * n_samples + chunks,
+            )
+            # Hit ranks are stored as uint8 without (n_samples, n_predictions) masks
+            self.assertEqual(hit_ranks(y_true, y_pred).dtype, np.uint8)
+            self.assertLess(peak(hit_ranks, y_true, y_pred), n_samples + chunks)
+        finally:
+            kernels.set_backend(backend)
+            confusion.COUNT_CHUNK_SIZE = chunk_size
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,7 @@
 import numpy as np
 import unittest
-from toppred.predictions import top_predictions
+from toppred.predictions import hit_ranks, scores2predictions
+from toppred.predictions import top_predictions, top_predictions_array
 
 class PredictionTest(unittest.TestCase):
     """Tests the functionality of the toppred.predictions module."""
@@ -38,6 +39,75 @@ class PredictionTest(unittest.TestCase):
                 ), error_message)
 
 
+    def test_hit_ranks(self):
+        """Test the correctness of hit ranks."""
+        # Test case
+        y_true = np.asarray([1, 2, 3, 4, 5, 2])
+        y_pred = np.asarray([
+            [1, 2, 3],
+            [1, 2, 3],
+            [1, 2, 3],
+            [1, 2, 3],
+            [1, 1, 1],
+            [2, 2, 1],
+        ])
+
+        # Perform checks
+        self.assertTrue(np.all(
+            hit_ranks(y_true, y_pred) == np.asarray([0, 1, 2, 3, 3, 0])
+        ), "Incorrectly computed hit_ranks")
+
+
+    def test_non_mutating(self):
+        """Test whether top_predictions leaves y_pred untouched."""
+        # Test case
+        y_true = np.asarray([1, 2, 3, 4, 5, 4, 3, 2, 1])
+        y_pred = np.asarray([[1, 2, 3]] * 9)
+        original = y_pred.copy()
+
+        # Perform checks
+        for _ in top_predictions(y_true, y_pred): pass
+        top_predictions_array(y_true, y_pred)
+        self.assertTrue(np.all(y_pred == original), "y_pred was modified")
+
+
+    def test_top_predictions_array(self):
+        """Test whether top_predictions_array equals top_predictions."""
+        random = np.random.default_rng(0)
+        y_true = random.integers(0, 5, 100)
+        y_pred = random.integers(0, 5, (100, 4))
+
+        # Compute expected result
+        expected = np.stack([
+            prediction.copy() for _, prediction in top_predictions(
+                y_true, y_pred,
+            )
+        ], axis=1)
+
+        # Perform checks
+        self.assertTrue(np.all(top_predictions_array(y_true, y_pred) == expected))
+        out = np.zeros((100, 4), dtype=np.int32)
+        self.assertIs(top_predictions_array(y_true, y_pred, out=out), out)
+        self.assertTrue(np.all(out == expected))
+        with self.assertRaises(ValueError):
+            top_predictions_array(y_true, y_pred, out=np.zeros((100, 3)))
+
+
+    def test_out(self):
+        """Test whether top_predictions writes into a given buffer."""
+        # Test case
+        y_true = np.asarray([1, 2, 3])
+        y_pred = np.asarray([[1, 2], [1, 2], [1, 2]])
+        out    = np.zeros(3, dtype=y_pred.dtype)
+
+        # Perform checks
+        for top, prediction in top_predictions(y_true, y_pred, out=out):
+            self.assertIs(prediction, out)
+        self.assertEqual(out.tolist(), [1, 2, 1])
+        with self.assertRaises(ValueError):
+            list(top_predictions(y_true, y_pred, out=np.zeros(2)))
+
+
     def test_multi_dim_y_true(self):
         """Test whether we receive an error when y_true is multi dimensional."""
         # Test case
@@ -166,6 +236,43 @@ class PredictionTest(unittest.TestCase):
                 y_true = y_true,
                 y_pred = y_pred[1:],
             ))
+
+    def test_scores2predictions(self):
+        """Test whether scores2predictions equals a full stable argsort."""
+        random = np.random.default_rng(0)
+
+        for trial in range(50):
+            # Create random test case, with many ties for integer scores
+            n_classes = random.integers(1, 10)
+            k         = random.integers(1, n_classes + 1)
+            y_score   = random.integers(0, 3, (20, n_classes))
+            if trial % 2:
+                y_score = random.random((20, n_classes))
+
+            # Perform checks
+            self.assertTrue(np.all(
+                scores2predictions(y_score, k) ==
+                np.argsort(-y_score, axis=1, kind='stable')[:, :k]
+            ), "Incorrectly computed scores2predictions")
+
+
+    def test_scores2predictions_classes(self):
+        """Test whether scores2predictions maps columns to classes."""
+        # Test case
+        y_score = np.asarray([
+            [0.1, 0.5, 0.4],
+            [0.3, 0.3, 0.4],
+        ])
+
+        # Perform checks
+        self.assertEqual(
+            scores2predictions(y_score, 2, classes=['a', 'b', 'c']).tolist(),
+            [['b', 'c'], ['c', 'a']],
+        )
+        with self.assertRaises(ValueError):
+            scores2predictions(y_score, 4)
+        with self.assertRaises(ValueError):
+            scores2predictions(y_score, 2, classes=['a', 'b'])
         
 
 if __name__ == "__main__":
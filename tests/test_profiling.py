@@ -0,0 +1,95 @@
+import json
+import numpy as np
+import threading
+import unittest
+from toppred import profiling
+from toppred.metrics import top_classification_report
+from toppred.profiling import Profiler, stage
+
+class ProfilingTest(unittest.TestCase):
+    """Tests the functionality of the toppred.profiling module."""
+
+    def setUp(self):
+        """Create random test case."""
+        random = np.random.default_rng(0)
+        self.y_true = random.integers(0, 5, 1000)
+        self.y_pred = random.integers(0, 5, (1000, 3))
+
+
+    def test_records(self):
+        """Test whether each stage of each call produces a record."""
+        records = list()
+        with Profiler(callback=records.append) as profiler:
+            expected = top_classification_report(self.y_true, self.y_pred)
+            top_classification_report(self.y_true, self.y_pred, output_dict=True)
+
+        # Profiling does not change the result
+        self.assertEqual(
+            top_classification_report(self.y_true, self.y_pred), expected,
+        )
+
+        # Perform checks
+        self.assertEqual(records, profiler.records)
+        self.assertEqual(
+            [record['stage'] for record in profiler.records if record['call'] == 0],
+            ['check', 'hit_ranks', 'encode', 'count', 'report', 'format',
+             'top_classification_report'],
+        )
+        self.assertNotIn('format', [
+            record['stage'] for record in profiler.records if record['call'] == 1
+        ])
+        for record in profiler.records:
+            self.assertGreaterEqual(record['time'], 0)
+            self.assertGreaterEqual(record['memory'], 0)
+            self.assertEqual(record['depth'], int(record['parent'] is not None))
+
+        check = profiler.records[0]['arrays']
+        self.assertEqual(check['y_pred'], {
+            'shape' : [1000, 3],
+            'dtype' : str(self.y_pred.dtype),
+            'nbytes': self.y_pred.nbytes,
+        })
+        self.assertNotIn('sample_weight', check)
+
+        # Summary and export
+        summary = profiler.summary()
+        self.assertEqual(summary['top_classification_report']['calls'], 2)
+        self.assertEqual(
+            [json.loads(line) for line in profiler.to_json().splitlines()],
+            profiler.records,
+        )
+
+
+    def test_nested_memory(self):
+        """Test whether peak memory of inner stages counts for outer stages."""
+        with Profiler() as profiler:
+            with stage('outer'):
+                with stage('inner'):
+                    array = np.ones(2**20)
+                del array
+
+        inner, outer = profiler.records
+        self.assertGreaterEqual(inner['memory'], 8 * 2**20)
+        self.assertGreaterEqual(outer['memory'], inner['memory'])
+
+
+    def test_disabled(self):
+        """Test whether stages are not recorded outside the profiler or in
+            other threads."""
+        self.assertIs(stage('stage'), profiling.DISABLED)
+
+        with Profiler(memory=False) as profiler:
+            thread = threading.Thread(target=top_classification_report,
+                args=(self.y_true, self.y_pred))
+            thread.start()
+            thread.join()
+            with stage('stage'):
+                pass
+
+        self.assertIsNone(profiling.ACTIVE)
+        self.assertEqual(len(profiler.records), 1)
+        self.assertIsNone(profiler.records[0]['memory'])
+
+
+if __name__ == "__main__":
+    unittest.main()
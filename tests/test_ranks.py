@@ -0,0 +1,82 @@
+import numpy as np
+import unittest
+from toppred.metrics import mean_reciprocal_rank, top_accuracy_score
+from toppred.metrics import top_classification_report
+from toppred.ranks import TopRanks
+
+class RanksTest(unittest.TestCase):
+    """Tests the functionality of the toppred.ranks module."""
+
+    def setUp(self):
+        """Create random test case."""
+        random = np.random.default_rng(0)
+        self.y_true = random.integers(0, 8, 300)
+        self.y_pred = random.integers(0, 8, (300, 5))
+        self.sample_weight = random.integers(1, 4, 300)
+
+
+    def test_report(self):
+        """Test whether reports for any k equal those of y_pred[:, :k]."""
+        for weights in [None, self.sample_weight]:
+            ranks = TopRanks.from_predictions(
+                self.y_true, self.y_pred, sample_weight=weights,
+            )
+            self.assertEqual(ranks.ranks.dtype, np.uint8)
+
+            # Perform checks
+            for k in [1, 3, 5]:
+                for output_dict in [False, True]:
+                    self.assertEqual(
+                        ranks.report(k, output_dict=output_dict, zero_division=0),
+                        top_classification_report(
+                            self.y_true, self.y_pred[:, :k],
+                            sample_weight = weights,
+                            output_dict   = output_dict,
+                            zero_division = 0,
+                        ),
+                    )
+            with self.assertRaises(ValueError):
+                ranks.report(k=6)
+
+        # Weights that are all zero raise an error, as in the full report
+        ranks = TopRanks.from_predictions(
+            self.y_true, self.y_pred, sample_weight=np.zeros(300),
+        )
+        with self.assertRaises(ValueError):
+            ranks.report()
+
+
+    def test_ranking_metrics(self):
+        """Test accuracy, mean reciprocal rank and NDCG."""
+        for weights in [None, self.sample_weight]:
+            ranks = TopRanks.from_predictions(
+                self.y_true, self.y_pred, sample_weight=weights,
+            )
+
+            # Compute reference ranks
+            hits = self.y_pred == self.y_true[:, None]
+            rank = np.where(hits.any(axis=1), hits.argmax(axis=1), np.inf)
+            w    = np.ones(300) if weights is None else weights
+
+            # Perform checks
+            self.assertTrue(np.allclose(
+                ranks.accuracy(),
+                top_accuracy_score(self.y_true, self.y_pred, sample_weight=weights),
+            ))
+            self.assertAlmostEqual(
+                ranks.mean_reciprocal_rank(),
+                mean_reciprocal_rank(self.y_true, self.y_pred, sample_weight=weights),
+            )
+            for k in [1, 2, 5]:
+                self.assertAlmostEqual(
+                    ranks.mean_reciprocal_rank(k),
+                    np.average(np.where(rank < k, 1 / (rank + 1), 0), weights=w),
+                )
+                self.assertAlmostEqual(
+                    ranks.ndcg(k),
+                    np.average(np.where(rank < k, 1 / np.log2(rank + 2), 0), weights=w),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
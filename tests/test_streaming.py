@@ -0,0 +1,159 @@
+import numpy as np
+import unittest
+from toppred.metrics import top_classification_report
+from toppred.streaming import TopAccumulator, WindowedTopAccumulator
+
+class StreamingTest(unittest.TestCase):
+    """Tests the functionality of the toppred.streaming module."""
+
+    def test_chunks(self):
+        """Test whether accumulated chunks equal the full report."""
+        random = np.random.default_rng(0)
+        y_true = random.integers(0, 8, 200)
+        y_pred = random.integers(0, 8, (200, 4))
+        sample_weight = random.integers(1, 4, 200)
+
+        for labels in [None, [0, 1, 2, 3]]:
+            # Accumulate chunks of different sizes and label sets
+            accumulator = TopAccumulator(labels=labels)
+            for start, end in [(0, 7), (7, 50), (50, 51), (51, 200)]:
+                accumulator.update(
+                    y_true        = y_true[start:end],
+                    y_pred        = y_pred[start:end],
+                    sample_weight = sample_weight[start:end],
+                )
+
+            # Perform checks
+            for output_dict in [False, True]:
+                self.assertEqual(
+                    accumulator.report(
+                        output_dict   = output_dict,
+                        zero_division = 0,
+                    ),
+                    top_classification_report(
+                        y_true        = y_true,
+                        y_pred        = y_pred,
+                        labels        = labels,
+                        sample_weight = sample_weight,
+                        output_dict   = output_dict,
+                        zero_division = 0,
+                    ),
+                )
+
+
+    def test_blocks(self):
+        """Test whether blocks counted in parallel equal the full report."""
+        random = np.random.default_rng(1)
+        y_true = random.integers(0, 8, 500)
+        y_pred = random.integers(0, 8, (500, 3))
+        sample_weight = random.integers(1, 4, 500)
+
+        for n_jobs in [None, 2, -1]:
+            accumulator = TopAccumulator().update_blocks(
+                blocks = (
+                    (y_true[i:i+37], y_pred[i:i+37], sample_weight[i:i+37])
+                    for i in range(0, 500, 37)
+                ),
+                n_jobs = n_jobs,
+            )
+
+            # Perform checks
+            self.assertEqual(
+                accumulator.report(output_dict=True, zero_division=0),
+                top_classification_report(
+                    y_true        = y_true,
+                    y_pred        = y_pred,
+                    sample_weight = sample_weight,
+                    output_dict   = True,
+                    zero_division = 0,
+                ),
+            )
+
+
+    def test_invalid(self):
+        """Test whether we receive errors for invalid use."""
+        accumulator = TopAccumulator()
+
+        # Test case when no chunks were added
+        with self.assertRaises(ValueError):
+            accumulator.report()
+
+        # Test case when number of predictions differs between chunks
+        accumulator.update([1, 2], [[1, 2], [2, 1]])
+        with self.assertRaises(ValueError):
+            accumulator.update([1, 2], [[1, 2, 3], [2, 1, 3]])
+
+        # Test case when all accumulated samples have zero weight, chunks with
+        # zero weight are allowed if the total weight is not zero
+        accumulator = TopAccumulator().update([1, 2], [[1], [2]], [0, 0])
+        with self.assertRaises(ValueError):
+            accumulator.report()
+        accumulator.update([1, 2], [[1], [1]], [1, 1])
+        self.assertEqual(accumulator.report(output_dict=True)[0]['accuracy'], .5)
+
+
+    def test_window(self):
+        """Test whether windowed reports equal the report over the window."""
+        random = np.random.default_rng(2)
+        y_true = random.integers(0, 6, 400)
+        y_pred = random.integers(0, 6, (400, 3))
+        timestamps = np.sort(random.random(400) * 100)
+        sample_weight = random.integers(1, 4, 400)
+
+        for bucket, weights in [(10, None), (2.5, sample_weight), (20, None)]:
+            window = WindowedTopAccumulator(
+                n_predictions = 3,
+                window        = 20,
+                bucket        = bucket,
+            )
+            for end in range(50, 401, 50):
+                start = end - 50
+                window.update(
+                    y_true        = y_true    [start:end],
+                    y_pred        = y_pred    [start:end],
+                    timestamps    = timestamps[start:end],
+                    sample_weight = None if weights is None else weights[start:end],
+                )
+
+                # Compute events in window
+                first = (np.floor(timestamps[end-1] / bucket) + 1) * bucket - 20
+                mask  = (timestamps[:end] >= first)
+
+                # Perform checks
+                self.assertEqual(
+                    window.report(output_dict=True, zero_division=0),
+                    top_classification_report(
+                        y_true        = y_true[:end][mask],
+                        y_pred        = y_pred[:end][mask],
+                        sample_weight = None if weights is None else
+                                        weights[:end][mask],
+                        output_dict   = True,
+                        zero_division = 0,
+                    ),
+                )
+
+
+    def test_window_events(self):
+        """Test whether events are added and expired correctly."""
+        window = WindowedTopAccumulator(n_predictions=2, window=10, bucket=5)
+
+        # Add events
+        self.assertTrue (window.add('a', ['a', 'b'], timestamp= 1))
+        self.assertTrue (window.add('b', ['a', 'b'], timestamp=12))
+        self.assertTrue (window.add('c', ['c', 'a'], timestamp= 7))
+        self.assertFalse(window.add('a', ['b', 'a'], timestamp= 3))
+        self.assertEqual(window.compute().true.tolist(), [0, 1, 1])
+
+        # Expire all events
+        window.advance(30)
+        self.assertEqual(window.compute().true.tolist(), [0, 0, 0])
+
+        # Test invalid input
+        with self.assertRaises(ValueError):
+            window.add('a', ['a'], timestamp=30)
+        with self.assertRaises(ValueError):
+            WindowedTopAccumulator(n_predictions=2, window=10, bucket=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
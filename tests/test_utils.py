@@ -0,0 +1,63 @@
+import numpy as np
+import unittest
+from toppred.metrics import top_classification_report
+from toppred.utils import reports2dataframe, reports2string
+
+class UtilsTest(unittest.TestCase):
+    """Tests the functionality of the toppred.utils module."""
+
+    def setUp(self):
+        """Create classification reports for a simple test case."""
+        y_true = np.asarray([1, 2, 3, 2, 1])
+        y_pred = np.asarray([
+            [1, 2, 3],
+            [2, 1, 3],
+            [1, 2, 3],
+            [3, 1, 2],
+            [1, 2, 3],
+        ])
+        self.reports = list(top_classification_report(
+            y_true        = y_true,
+            y_pred        = y_pred,
+            labels        = [0, 1, 2, 3],
+            target_names  = ['N/A', '1', '2', '3'],
+            output_dict   = True,
+            zero_division = 0,
+        ).values())
+
+
+    def test_reports2string(self):
+        """Test the layout of reports2string."""
+        # Perform checks
+        self.assertEqual(reports2string(self.reports, digits=2), "\n".join([
+            "",
+            "                 Top 1                     Top 2                     Top 3",
+            "             precision recall f1-score precision recall f1-score precision recall f1-score support",
+            "",
+            "N/A               0.00   0.00     0.00      0.00   0.00     0.00      0.00   0.00     0.00       0",
+            "1                 0.67   1.00     0.80      0.67   1.00     0.80      1.00   1.00     1.00       2",
+            "2                 1.00   0.50     0.67      1.00   0.50     0.67      1.00   1.00     1.00       2",
+            "3                 0.00   0.00     0.00      0.00   0.00     0.00      1.00   1.00     1.00       1",
+            "",
+            "micro avg         0.60   0.60     0.60      0.60   0.60     0.60      1.00   1.00     1.00       5",
+            "macro avg         0.42   0.38     0.37      0.42   0.38     0.37      0.75   0.75     0.75       5",
+            "weighted avg      0.67   0.60     0.59      0.67   0.60     0.59      1.00   1.00     1.00       5",
+            "",
+        ]))
+
+
+    def test_reports2dataframe(self):
+        """Test whether reports2dataframe contains unrounded values."""
+        dataframe = reports2dataframe(self.reports)
+
+        # Perform checks
+        self.assertEqual(dataframe.shape, (7, 10))
+        self.assertEqual(
+            dataframe.loc['1', ('Top 1', 'precision')],
+            self.reports[0]['1']['precision'],
+        )
+        self.assertEqual(dataframe.loc['weighted avg', ('', 'support')], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,2 +1,27 @@
-import toppred.metrics
-import toppred.predictions
\ No newline at end of file
+# Imports
+import importlib
+
+# Submodules are only imported when they are first accessed, see PEP 562
+__all__ = [
+    'bootstrap',
+    'cache',
+    'cli',
+    'comparison',
+    'confusion',
+    'encoding',
+    'evaluator',
+    'files',
+    'kernels',
+    'metrics',
+    'predictions',
+    'profiling',
+    'ranks',
+    'streaming',
+    'utils',
+]
+
+def __getattr__(name: str):
+    """Lazily import submodules of toppred."""
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
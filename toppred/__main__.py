@@ -0,0 +1,4 @@
+# Allows running the toppred command as python -m toppred
+from toppred.cli import main
+
+main()
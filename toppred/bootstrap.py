@@ -0,0 +1,374 @@
+# Imports
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from toppred.confusion import check_n_jobs, check_sample_weight, encode_ranks
+from toppred.confusion import lookup, prf
+from toppred.predictions import check_predictions
+from toppred.types import array_like_1d, array_like_2d
+from typing import Dict, Literal, Optional, Tuple, Union
+
+def top_bootstrap(
+        y_true       : array_like_1d,
+        y_pred       : array_like_2d,
+        labels       : Optional[array_like_1d] = None,
+        sample_weight: Optional[array_like_1d] = None,
+        n_bootstraps : int = 1000,
+        method       : Literal["poisson", "multinomial"] = "poisson",
+        zero_division: Literal["warn", 0, 1] = 0,
+        batch_size   : Optional[int] = None,
+        n_jobs       : Optional[int] = None,
+        random_state : Optional[Union[int, np.random.SeedSequence]] = None,
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+    """Compute bootstrap replicates of the averaged metrics of all top
+        predictions at once.
+
+        The rank at which y_true first occurs in y_pred and the encoded labels
+        are computed only once. Resample weights are then drawn in batches as
+        (batch_size, n_samples) count matrices, and the confusion counts of
+        every replicate in a batch are obtained by summing the weight columns
+        of samples with the same (label, rank) pair, i.e., a product of the
+        weight matrix with a sparse one-hot encoding of the samples. Each
+        replicate equals :py:meth:`toppred.metrics.top_classification_report`
+        on the resampled samples, up to floating point rounding.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            Ground truth (correct) target values.
+
+        y_pred : array_like_2d of shape=(n_samples, n_predictions)
+            Estimated targets as returned by a classifier. Each column
+            y_pred[:, i] indicates the i-th most likely prediction (0-indexed)
+            for the given sample.
+
+        labels : Optional[array_like_1d], default = None
+            Optional list of labels over which to average. If None, each
+            replicate averages over the labels occurring in its resample.
+
+        sample_weight : Optional[array_like_1d], default = None
+            Sample weights, multiplied with the resample weights.
+
+        n_bootstraps : int, default = 1000
+            Number of bootstrap replicates.
+
+        method : Literal["poisson", "multinomial"], default = "poisson"
+            Resampling method. "multinomial" draws exactly n_samples samples
+            with replacement, i.e., the classic bootstrap. "poisson" draws a
+            Poisson(1) count per sample, which is cheaper for many samples.
+
+        zero_division : Union[Literal["warn"], 0, 1], default = 0
+            Value of ill-defined metrics, "warn" acts as 0 but no warnings are
+            raised for individual replicates.
+
+        batch_size : Optional[int], default = None
+            Number of replicates computed at once. If None, it is chosen such
+            that the temporary arrays of a batch contain about 2**24 values.
+
+        n_jobs : Optional[int], default = None
+            Number of threads computing batches in parallel. None means 1, -1
+            means all processors. Results do not depend on n_jobs.
+
+        random_state : Optional[Union[int, SeedSequence]], default = None
+            Seed of the resampling, as int or np.random.SeedSequence. Each
+            batch uses an independent stream spawned from this seed, so
+            results are reproducible for the same seed and batch_size.
+
+        Returns
+        -------
+        replicates : Dict[str, Dict[str, np.ndarray]]
+            Replicates for 'micro avg', 'macro avg' and 'weighted avg', each a
+            dictionary mapping 'precision', 'recall' and 'f1-score' to an array
+            of shape=(n_bootstraps, n_predictions). If labels is None, the
+            micro average equals the accuracy. See
+            :py:meth:`confidence_interval` to obtain confidence intervals.
+        """
+    # Cast and check input
+    y_true, y_pred = check_predictions(y_true, y_pred)
+    n_samples, n_predictions = y_pred.shape
+    sample_weight = check_sample_weight(sample_weight, n_samples)
+    n_jobs = check_n_jobs(n_jobs)
+    if method not in ("poisson", "multinomial"):
+        raise ValueError(
+            f"method should be 'poisson' or 'multinomial', but was '{method}'."
+        )
+    if n_bootstraps < 1:
+        raise ValueError(
+            f"n_bootstraps should be >= 1, but was {n_bootstraps}."
+        )
+
+    # Compute hit ranks and encode labels once
+    classes, true_codes, pred_codes, ranks = encode_ranks(y_true, y_pred)
+
+    # Group samples by (label, rank) pair
+    n_keys = classes.shape[0] * (n_predictions + 1)
+    groups = [
+        group(codes.astype(np.intp) * (n_predictions + 1) + ranks)
+        for codes in (true_codes, pred_codes)
+    ]
+
+    # Select labels, if given
+    select = None
+    if labels is not None:
+        select = lookup(classes, np.asarray(labels).reshape(-1))
+
+    # Determine batches
+    if batch_size is None:
+        batch_size = max(1, 2**24 // max(n_samples, n_keys))
+    bounds = list(range(0, n_bootstraps, batch_size)) + [n_bootstraps]
+    seeds  = (
+        random_state if isinstance(random_state, np.random.SeedSequence) else
+        np.random.SeedSequence(random_state)
+    ).spawn(len(bounds) - 1)
+
+    # Compute replicates of each batch
+    def replicates(start: int, end: int, seed: np.random.SeedSequence):
+        """Compute averaged metrics of replicates start to end."""
+        # Draw resample counts
+        random = np.random.default_rng(seed)
+        if method == "poisson":
+            counts = random.poisson(1., (end - start, n_samples))
+        else:
+            counts = random.multinomial(
+                n_samples, np.full(n_samples, 1 / n_samples), end - start,
+            )
+        counts = counts.astype(np.float64)
+
+        # Count (weighted) confusion of each replicate
+        confusion = count_replicates(counts, groups, n_keys, n_predictions)
+        if sample_weight is None:
+            weighted = confusion
+        else:
+            weighted = count_replicates(
+                counts * sample_weight, groups, n_keys, n_predictions,
+            )
+
+        # Compute averaged metrics
+        return average_replicates(
+            *weighted, *confusion[1:], select, zero_division,
+        )
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        batches = list(executor.map(replicates, bounds[:-1], bounds[1:], seeds))
+
+    # Concatenate batches
+    return {
+        average: {
+            metric: np.concatenate([
+                batch[average][metric] for batch in batches
+            ])
+            for metric in ('precision', 'recall', 'f1-score')
+        }
+        for average in ('micro avg', 'macro avg', 'weighted avg')
+    }
+
+
+def confidence_interval(
+        replicates: np.ndarray,
+        confidence: float = 0.95,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute percentile confidence intervals from bootstrap replicates.
+
+        Parameters
+        ----------
+        replicates : np.ndarray of shape=(n_bootstraps, ...)
+            Bootstrap replicates, e.g., as returned by
+            :py:meth:`top_bootstrap`.
+
+        confidence : float, default = 0.95
+            Confidence level of the interval.
+
+        Returns
+        -------
+        lower : np.ndarray of shape=(...)
+            Lower bound of the interval, ignoring nan replicates.
+
+        upper : np.ndarray of shape=(...)
+            Upper bound of the interval, ignoring nan replicates.
+        """
+    if not 0 < confidence < 1:
+        raise ValueError(
+            f"confidence should be in (0, 1), but was {confidence}."
+        )
+    alpha = (1 - confidence) / 2
+    lower, upper = np.nanquantile(replicates, [alpha, 1 - alpha], axis=0)
+    return lower, upper
+
+
+################################################################################
+#                              Auxiliary methods                               #
+################################################################################
+
+def group(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Group samples by key.
+
+        Parameters
+        ----------
+        keys : np.ndarray of shape=(n_samples,)
+            Non-negative key of each sample.
+
+        Returns
+        -------
+        order : np.ndarray of shape=(n_samples,)
+            Order that sorts samples by key.
+
+        starts : np.ndarray of shape=(n_groups,)
+            Start of each group in the sorted samples.
+
+        unique : np.ndarray of shape=(n_groups,)
+            Key of each group.
+        """
+    order  = np.argsort(keys, kind='stable')
+    keys   = keys[order]
+    # Keys are non-negative, so the first sample always starts a group
+    starts = np.flatnonzero(np.diff(keys, prepend=-1))
+    return order, starts, keys[starts]
+
+
+def count_replicates(
+        weights      : np.ndarray,
+        groups       : list,
+        n_keys       : int,
+        n_predictions: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count confusion of replicates, see
+        :py:meth:`toppred.confusion.rank_histograms`.
+
+        Parameters
+        ----------
+        weights : np.ndarray of shape=(n_replicates, n_samples)
+            Weight of each sample in each replicate.
+
+        groups : list
+            Groups of samples by (true label, rank) and (top prediction,
+            rank), see :py:meth:`group`.
+
+        n_keys : int
+            Number of (label, rank) pairs, i.e., n_classes x (n_predictions+1).
+
+        n_predictions : int
+            Number of top predictions.
+
+        Returns
+        -------
+        tp : np.ndarray of shape=(n_replicates, n_predictions, n_classes)
+            True positives per replicate, top prediction and class.
+
+        pred : np.ndarray of shape=(n_replicates, n_predictions, n_classes)
+            Predictions per replicate, top prediction and class.
+
+        true : np.ndarray of shape=(n_replicates, n_classes)
+            True samples per replicate and class.
+        """
+    # Sum weights of samples per (label, rank) pair
+    shape = (weights.shape[0], n_keys // (n_predictions + 1), n_predictions + 1)
+    sums  = list()
+    for order, starts, unique in groups:
+        result = np.zeros((weights.shape[0], n_keys))
+        if starts.shape[0]:
+            result[:, unique] = np.add.reduceat(
+                weights[:, order], starts, axis=1,
+            )
+        sums.append(result.reshape(shape))
+    hits, miss = sums
+
+    # Samples are correct for top i if their hit rank <= i
+    tp   = np.cumsum(hits[..., :-1], axis=2)
+    # Otherwise they are predicted as y_pred[:, 0]
+    miss = np.cumsum(miss[..., :0:-1], axis=2)[..., ::-1]
+
+    # Return result
+    return (
+        tp.transpose(0, 2, 1),
+        (tp + miss).transpose(0, 2, 1),
+        hits.sum(axis=2),
+    )
+
+
+def average_replicates(
+        tp           : np.ndarray,
+        pred         : np.ndarray,
+        true         : np.ndarray,
+        n_pred       : np.ndarray,
+        n_true       : np.ndarray,
+        select       : Optional[Tuple[np.ndarray, np.ndarray]],
+        zero_division: Literal["warn", 0, 1],
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+    """Compute micro, macro and weighted averages of replicates.
+
+        Parameters
+        ----------
+        tp, pred : np.ndarray of shape=(n_replicates, n_predictions, n_classes)
+            Weighted true positives and predictions.
+
+        true : np.ndarray of shape=(n_replicates, n_classes)
+            Weighted true samples.
+
+        n_pred : np.ndarray of shape=(n_replicates, n_predictions, n_classes)
+            Unweighted predictions, used to determine occurring labels.
+
+        n_true : np.ndarray of shape=(n_replicates, n_classes)
+            Unweighted true samples, used to determine occurring labels.
+
+        select : Optional[Tuple[np.ndarray, np.ndarray]]
+            Index and known mask of given labels, see
+            :py:meth:`toppred.confusion.lookup`. If None, labels occurring in
+            each replicate are selected.
+
+        zero_division : Union[Literal["warn"], 0, 1]
+            Value of ill-defined metrics.
+
+        Returns
+        -------
+        averages : Dict[str, Dict[str, np.ndarray]]
+            Averaged metrics of shape=(n_replicates, n_predictions).
+        """
+    true = true[:, None, :]
+
+    # Select given labels, labels without counts have zero counts
+    if select is not None:
+        index, known = select
+        tp, pred, true = [
+            np.where(known, array[..., index], 0) for array in (tp, pred, true)
+        ]
+        mask = np.ones(tp.shape, dtype=bool)
+    # Otherwise select labels occurring in each replicate
+    else:
+        mask = (n_true[:, None, :] > 0) | (n_pred > 0)
+
+    # Compute scores
+    scores = dict(zip(
+        ('precision', 'recall', 'f1-score'),
+        prf(tp, pred, true, zero_division),
+    ))
+    micro = dict(zip(
+        ('precision', 'recall', 'f1-score'),
+        prf(
+            np.sum(tp * mask, axis=2),
+            np.sum(pred * mask, axis=2),
+            np.sum(true * mask, axis=2),
+            zero_division,
+        ),
+    ))
+
+    # Compute averages, weighted average falls back to macro average if all
+    # weights are zero, and averages over no labels are nan
+    weights = np.broadcast_to(true, mask.shape) * mask
+    total   = np.sum(weights, axis=2)
+    n_mask  = np.sum(mask, axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        macro = {
+            metric: np.sum(score * mask, axis=2) / n_mask
+            for metric, score in scores.items()
+        }
+        weighted = {
+            metric: np.where(
+                total != 0,
+                np.sum(score * weights, axis=2)
+                / np.where(total != 0, total, 1),
+                macro[metric],
+            )
+            for metric, score in scores.items()
+        }
+
+    # Return result
+    return {'micro avg': micro, 'macro avg': macro, 'weighted avg': weighted}
@@ -0,0 +1,281 @@
+# Imports
+import hashlib
+import numpy as np
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from toppred.confusion import TopConfusion
+from toppred.types import array_like_1d, array_like_2d
+from typing import Any, Optional
+
+class ReportCache(object):
+    """Least recently used cache of confusion counts keyed on fingerprints of
+        y_true, y_pred and sample_weight.
+
+        Reports differing only in formatting, i.e., labels, target_names,
+        digits, output_dict, zero_division, observed_only or n_worst, are all
+        created from the same unrounded confusion counts. Passing a cache to
+        :py:meth:`toppred.metrics.top_classification_report` therefore skips
+        counting for repeated requests over unchanged arrays.
+
+        Example
+        -------
+        >>> cache = ReportCache(maxsize=32)
+        >>> top_classification_report(y_true, y_pred, cache=cache)
+        >>> top_classification_report(y_true, y_pred, digits=4, cache=cache)
+        >>> cache.hits
+        1
+
+        Attributes
+        ----------
+        hits : int
+            Number of lookups that were found in the cache.
+
+        misses : int
+            Number of lookups that were not found in the cache.
+        """
+
+    def __init__(
+            self,
+            maxsize  : Optional[int] = 128,
+            max_bytes: Optional[int] = None,
+            directory: Optional[str] = None,
+        ):
+        """Create a cache.
+
+            Parameters
+            ----------
+            maxsize : Optional[int], default = 128
+                Maximum number of cached entries, None for no limit.
+
+            max_bytes : Optional[int], default = None
+                Maximum total size of cached counts in bytes, None for no
+                limit. In memory, this is the size of the count arrays, on
+                disk, the size of the serialized files.
+
+            directory : Optional[str], default = None
+                If given, store entries as ``.npz`` files in this directory
+                such that they are shared between processes and persist
+                across sessions. Otherwise, entries are stored in memory.
+            """
+        # Perform checks
+        if maxsize is not None and maxsize < 0:
+            raise ValueError(f"maxsize should be >= 0, but was {maxsize}.")
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError(f"max_bytes should be >= 0, but was {max_bytes}.")
+
+        # Set parameters
+        self.maxsize   = maxsize
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        # Initialise state
+        self.entries = OrderedDict()
+        self.nbytes  = 0
+        self.hits    = 0
+        self.misses  = 0
+        self.lock    = threading.Lock()
+
+    ########################################################################
+    #                                Lookup                                #
+    ########################################################################
+
+    def confusion(
+            self,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            sample_weight: Optional[array_like_1d] = None,
+            n_jobs       : Optional[int] = None,
+        ) -> TopConfusion:
+        """Get the confusion counts of all top predictions from the cache, or
+            compute and cache them if they are not present.
+
+            Parameters
+            ----------
+            y_true, y_pred, sample_weight, n_jobs
+                See :py:meth:`toppred.confusion.TopConfusion.from_predictions`.
+
+            Returns
+            -------
+            result : TopConfusion
+                Confusion counts of all top predictions.
+            """
+        # Look up confusion
+        key    = fingerprint(y_true, y_pred, sample_weight)
+        result = self.get(key)
+
+        # Compute and store confusion, if necessary
+        if result is None:
+            result = TopConfusion.from_predictions(
+                y_true        = y_true,
+                y_pred        = y_pred,
+                sample_weight = sample_weight,
+                n_jobs        = n_jobs,
+            )
+            self.put(key, result)
+
+        # Return result
+        return result
+
+    def get(self, key: str) -> Optional[TopConfusion]:
+        """Get cached confusion counts, None if key is not cached."""
+        with self.lock:
+            # Look up entry
+            if key not in self.entries and self.directory is not None:
+                self.scan()
+            if key not in self.entries:
+                self.misses += 1
+                return None
+
+            # Mark entry as most recently used
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+            # Return entry from memory
+            if self.directory is None:
+                return self.entries[key][0]
+
+            # Or load entry from disk
+            path = self.path(key)
+            try:
+                with open(path, 'rb') as infile:
+                    result = TopConfusion.from_bytes(infile.read())
+                os.utime(path)
+                return result
+            except OSError:
+                self.discard(key)
+                self.hits   -= 1
+                self.misses += 1
+                return None
+
+    def put(self, key: str, confusion: TopConfusion) -> None:
+        """Cache confusion counts, evicting least recently used entries."""
+        with self.lock:
+            # Store entry in memory
+            if self.directory is None:
+                nbytes = sum({id(array): array.nbytes for array in [
+                    confusion.classes, confusion.tp, confusion.pred,
+                    confusion.true, confusion.n_pred, confusion.n_true,
+                ]}.values())
+                self.discard(key)
+                self.entries[key] = (confusion, nbytes)
+
+            # Or store entry on disk, counts of arbitrary objects are not cached
+            else:
+                try:
+                    data = confusion.to_bytes()
+                except ValueError:
+                    return
+                handle, tmp = tempfile.mkstemp(
+                    dir=self.directory, suffix='.tmp',
+                )
+                with os.fdopen(handle, 'wb') as outfile:
+                    outfile.write(data)
+                os.replace(tmp, self.path(key))
+                self.discard(key, remove=False)
+                self.entries[key] = (None, len(data))
+                nbytes = len(data)
+
+            # Evict least recently used entries
+            self.nbytes += nbytes
+            while self.entries and self.full():
+                self.discard(next(iter(self.entries)))
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self.lock:
+            if self.directory is not None: self.scan()
+            for key in list(self.entries):
+                self.discard(key)
+
+    def __len__(self) -> int:
+        """Number of cached entries."""
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        """Check whether key is cached."""
+        return key in self.entries
+
+    ########################################################################
+    #                           Auxiliary methods                          #
+    ########################################################################
+
+    def full(self) -> bool:
+        """Check whether the cache exceeds maxsize or max_bytes."""
+        return (
+            (self.maxsize   is not None and len(self.entries) > self.maxsize) or
+            (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        )
+
+    def path(self, key: str) -> str:
+        """Get path of cached entry on disk."""
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def discard(self, key: str, remove: bool = True) -> None:
+        """Remove entry from cache, and from disk if remove is True."""
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        if remove and self.directory is not None:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def scan(self) -> None:
+        """Synchronise entries with files on disk, ordered by last access,
+            such that entries written by other processes are found."""
+        entries = list()
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'): continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        self.entries = OrderedDict(
+            (key, (None, size)) for _, key, size in sorted(entries)
+        )
+        self.nbytes = sum(size for _, _, size in entries)
+
+
+################################################################################
+#                                 Fingerprints                                 #
+################################################################################
+
+def fingerprint(*arrays: Any) -> str:
+    """Compute a fingerprint of the dtype, shape and content of arrays.
+
+        Parameters
+        ----------
+        *arrays : Any
+            Arrays to fingerprint, None values are allowed.
+
+        Returns
+        -------
+        fingerprint : str
+            Hexadecimal BLAKE2b digest of arrays.
+        """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        # Hash None values
+        if array is None:
+            digest.update(b'None;')
+            continue
+
+        # Hash dtype and shape
+        array = np.asarray(array)
+        digest.update(f"{array.dtype.str}{array.shape};".encode())
+
+        # Hash content, objects are hashed by their pickled representation
+        if array.dtype == object:
+            digest.update(pickle.dumps(array.tolist(), protocol=4))
+        else:
+            digest.update(np.ascontiguousarray(array).view(np.uint8).data)
+
+    # Return fingerprint
+    return digest.hexdigest()
@@ -0,0 +1,136 @@
+# Imports
+import argparse
+import json
+import numpy as np
+import sys
+from toppred.files import read_blocks
+from toppred.streaming import TopAccumulator
+from typing import List, Optional
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments of the ``toppred`` command.
+
+        Parameters
+        ----------
+        argv : Optional[List[str]], default = None
+            Arguments to parse, if None, sys.argv[1:] is used.
+
+        Returns
+        -------
+        args : argparse.Namespace
+            Parsed arguments.
+        """
+    parser = argparse.ArgumentParser(
+        prog        = 'toppred',
+        description = "Create a classification report for top predictions "
+                      "stored in files.",
+    )
+
+    # Input
+    parser.add_argument('y_true',
+        help="file containing true labels (.npy, .csv, .parquet, .arrow)")
+    parser.add_argument('y_pred',
+        help="file containing top predictions, one column per prediction")
+    parser.add_argument('--sample-weight',
+        help="optional file containing sample weights")
+    parser.add_argument('-k', type=int,
+        help="number of top predictions to evaluate (default: all columns)")
+    parser.add_argument('--dtype',
+        help="integer dtype to narrow labels to, e.g., int32")
+
+    # Execution
+    parser.add_argument('--block-size', type=int, default=65536,
+        help="number of samples read at once (default: 65536)")
+    parser.add_argument('--workers', type=int, default=None,
+        help="number of threads counting blocks, -1 for all processors "
+             "(default: 1)")
+
+    # Output
+    parser.add_argument('--format', choices=['text', 'json'], default='text',
+        help="output format (default: text)")
+    parser.add_argument('--digits', type=int, default=2,
+        help="number of digits of text output (default: 2)")
+    parser.add_argument('--zero-division', choices=['warn', '0', '1'],
+        default='warn', help="value of ill-defined metrics (default: warn)")
+    parser.add_argument('--observed-only', action='store_true',
+        help="only report labels that occur in the data")
+    parser.add_argument('--n-worst', type=int,
+        help="only report the n labels with the lowest F1-score")
+    parser.add_argument('-o', '--output',
+        help="file to write report to (default: stdout)")
+
+    # Parse arguments
+    args = parser.parse_args(argv)
+    if args.k is not None and args.k < 1:
+        parser.error(f"-k should be >= 1, but was {args.k}.")
+    if args.block_size < 1:
+        parser.error(f"--block-size should be >= 1, but was {args.block_size}.")
+    if args.zero_division != 'warn':
+        args.zero_division = int(args.zero_division)
+    if args.dtype is not None:
+        try:
+            args.dtype = np.dtype(args.dtype)
+        except TypeError:
+            parser.error(f"--dtype should be a dtype, but was '{args.dtype}'.")
+        if args.dtype.kind not in 'iu':
+            parser.error(
+                f"--dtype should be an integer dtype, but was '{args.dtype}'."
+            )
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the ``toppred`` command.
+
+        Reads y_true, y_pred and optional sample weights from files in blocks
+        and accumulates their confusion counts, such that memory does not
+        depend on the number of samples. Prints the classification report of
+        all top predictions as text or JSON.
+
+        Parameters
+        ----------
+        argv : Optional[List[str]], default = None
+            Command line arguments, if None, sys.argv[1:] is used.
+        """
+    # Parse arguments
+    args = parse_args(argv)
+
+    # Accumulate confusion counts over blocks and create report, invalid
+    # input files exit with an error message instead of a traceback
+    try:
+        accumulator = TopAccumulator().update_blocks(
+            blocks = read_blocks(
+                y_true        = args.y_true,
+                y_pred        = args.y_pred,
+                sample_weight = args.sample_weight,
+                block_size    = args.block_size,
+                n_predictions = args.k,
+                dtype         = args.dtype,
+            ),
+            n_jobs = args.workers,
+        )
+        report = accumulator.report(
+            digits        = args.digits,
+            output_dict   = args.format == 'json',
+            zero_division = args.zero_division,
+            observed_only = args.observed_only,
+            n_worst       = args.n_worst,
+        )
+    except (ValueError, OSError) as error:
+        sys.exit(f"toppred: error: {error}")
+    if args.format == 'json':
+        report = json.dumps(report, indent=2)
+
+    # Write report
+    if args.output is None:
+        sys.stdout.write(report.strip("\n") + "\n")
+    else:
+        try:
+            with open(args.output, 'w') as outfile:
+                outfile.write(report.strip("\n") + "\n")
+        except OSError as error:
+            sys.exit(f"toppred: error: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# Imports
+import math
+import numpy as np
+from toppred.bootstrap import average_replicates
+from toppred.confusion import check_sample_weight, cumulate, lookup
+from toppred.confusion import rank_histograms
+from toppred.encoding import factorize
+from toppred.predictions import check_predictions, hit_ranks, rank_dtype
+from toppred.types import array_like, array_like_1d
+from toppred.utils import reports2string
+from typing import List, Literal, Optional, Tuple, Union
+
+def top_comparison_report(
+        y_true       : array_like_1d,
+        y_preds      : array_like,
+        names        : Optional[List[str]] = None,
+        labels       : Optional[array_like_1d] = None,
+        sample_weight: Optional[array_like_1d] = None,
+        reference    : Optional[int] = None,
+        digits       : int = 2,
+        output_dict  : bool = False,
+        zero_division: Literal["warn", 0, 1] = 0,
+    ) -> Union[str, dict]:
+    """Compare the top predictions of multiple models on the same y_true.
+
+        y_true is checked and encoded only once, with classes shared by all
+        models, and the confusion counts of all top predictions of each model
+        are obtained from a single count over its hit ranks. Models are
+        counted one after another in chunks of samples, such that temporary
+        memory does not grow with the number of models. For each model and
+        top prediction, the report contains the accuracy and the macro and
+        weighted average F1-score, equal to those of
+        :py:meth:`toppred.metrics.top_classification_report` for that model.
+
+        If a reference model is given, every other model is compared with it
+        using McNemar's test on whether y_true occurs in the top predictions,
+        computed from the per-sample hit ranks of both models. The report then
+        additionally contains the number of samples that only the model
+        (``wins``) or only the reference (``losses``) predicts correctly and
+        the two-sided ``p-value`` of the test. The test is exact for up to
+        1000 discordant samples and uses the continuity-corrected chi-squared
+        approximation otherwise. Sample weights are ignored by the test.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            Ground truth (correct) target values.
+
+        y_preds : array_like of shape=(n_models, n_samples, n_predictions)
+            Top predictions of each model, each y_preds[i] as y_pred in
+            :py:meth:`toppred.metrics.top_classification_report`.
+
+        names : Optional[List[str]], default = None
+            Optional names of models, if None, models are named by index.
+
+        labels : Optional[array_like_1d], default = None
+            Optional list of labels over which to average.
+
+        sample_weight : Optional[array_like_1d], default = None
+            Sample weights.
+
+        reference : Optional[int], default = None
+            Index of the model with which other models are compared. If None,
+            no significance tests are performed.
+
+        digits : int, default = 2
+            Number of digits for formatting output floating point values.
+
+        output_dict : bool, default = False
+            If True, return output as dict.
+
+        zero_division : Union[Literal["warn"], 0, 1], default = 0
+            Value of ill-defined metrics, "warn" acts as 0 but no warnings are
+            raised.
+
+        Returns
+        -------
+        report : Union[str, dict]
+            Table with a row per model and columns per top prediction. If
+            output_dict is True, a dictionary of top prediction (0-indexed) to
+            a dictionary of model name to its metrics.
+        """
+    # Cast and check input
+    y_true  = np.asarray(y_true)
+    y_preds = np.asarray(y_preds)
+    if y_preds.ndim != 3 or y_preds.shape[0] == 0:
+        raise ValueError(
+            "y_preds should be a 3-D array of shape (n_models, n_samples, "
+            f"n_predictions), but was of shape '{y_preds.shape}'."
+        )
+    y_true, _ = check_predictions(y_true, y_preds[0])
+    n_models, n_samples, n_predictions = y_preds.shape
+    sample_weight = check_sample_weight(sample_weight, n_samples)
+    if names is None:
+        names = [str(model) for model in range(n_models)]
+    if len(names) != n_models:
+        raise ValueError(
+            f"Number of names, {len(names)}, does not match number of models, "
+            f"{n_models}."
+        )
+    if reference is not None and not 0 <= reference < n_models:
+        raise ValueError(
+            f"reference should be in [0, {n_models}), but was {reference}."
+        )
+
+    # Compute hit ranks of each model
+    ranks = np.empty((n_models, n_samples), dtype=rank_dtype(n_predictions))
+    for rank, y_pred in zip(ranks, y_preds):
+        rank[:] = hit_ranks(y_true, y_pred)
+
+    # Encode y_true and most likely predictions of all models once, using the
+    # classes of y_true and of each model such that labels are not stacked
+    classes = factorize(np.concatenate([factorize(y_true)[0]] + [
+        factorize(y_pred[:, 0])[0] for y_pred in y_preds
+    ]))[0]
+    n_classes = classes.shape[0]
+    _, true_codes = factorize(y_true, classes)
+
+    # Count confusion per model, rank_histograms bounds temporaries per chunk
+    weights = [None] if sample_weight is None else [sample_weight, None]
+    counts  = [[list(), list(), list()] for _ in weights]
+    for y_pred, rank in zip(y_preds, ranks):
+        _, pred_codes = factorize(y_pred[:, 0], classes)
+        histograms = rank_histograms(
+            true_codes, pred_codes, rank, n_predictions, n_classes, weights,
+        )
+        for count, histogram in zip(counts, histograms):
+            for result, array in zip(count, cumulate(*histogram)):
+                result.append(array)
+
+    # Stack counts to (n_models, n_predictions, n_classes)
+    counts = [[np.stack(result) for result in count] for count in counts]
+
+    # Compute averages of all models
+    select = None
+    if labels is not None:
+        select = lookup(classes, np.asarray(labels).reshape(-1))
+    averages = average_replicates(
+        *counts[0], *counts[-1][1:], select, zero_division,
+    )
+
+    # Compute accuracy from weighted number of samples per hit rank
+    hits = np.cumsum(np.stack([
+        np.bincount(rank, sample_weight, minlength=n_predictions + 1)
+        for rank in ranks
+    ]), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        accuracy = hits[:, :-1] / hits[:, -1:]
+
+    # Compare models with reference, if necessary
+    if reference is not None:
+        wins, losses = discordant(ranks, ranks[reference], n_predictions)
+
+    # Create reports
+    macro    = averages['macro avg'   ]['f1-score']
+    weighted = averages['weighted avg']['f1-score']
+    reports  = list()
+    for top in range(n_predictions):
+        report = dict()
+        for model, name in enumerate(names):
+            report[name] = {
+                'accuracy'   : float(accuracy[model, top]),
+                'macro f1'   : float(macro   [model, top]),
+                'weighted f1': float(weighted[model, top]),
+            }
+            if reference is not None and model != reference:
+                report[name]['wins'   ] = int(wins  [model, top])
+                report[name]['losses' ] = int(losses[model, top])
+                report[name]['p-value'] = mcnemar(
+                    wins[model, top], losses[model, top],
+                )
+            report[name]['support'] = float(hits[model, -1])
+        reports.append(report)
+
+    # Return report as dictionary, if necessary
+    if output_dict:
+        return {top: report for top, report in enumerate(reports)}
+    # Otherwise return report as string
+    else:
+        return reports2string(reports, digits)
+
+
+################################################################################
+#                              Auxiliary methods                               #
+################################################################################
+
+def discordant(
+        ranks        : np.ndarray,
+        reference    : np.ndarray,
+        n_predictions: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Count samples correctly predicted by only one of two models.
+
+        Parameters
+        ----------
+        ranks : np.ndarray of shape=(n_models, n_samples)
+            Hit ranks of each model.
+
+        reference : np.ndarray of shape=(n_samples,)
+            Hit ranks of the reference model.
+
+        n_predictions : int
+            Number of top predictions.
+
+        Returns
+        -------
+        wins : np.ndarray of shape=(n_models, n_predictions)
+            Number of samples in top i of the model, but not of the reference.
+
+        losses : np.ndarray of shape=(n_models, n_predictions)
+            Number of samples in top i of the reference, but not of the model.
+        """
+    # Count samples per pair of (model rank, reference rank), per model
+    size      = n_predictions + 1
+    reference = reference.astype(np.intp)
+    pairs     = np.stack([
+        np.bincount(rank.astype(np.intp) * size + reference, minlength=size**2)
+        for rank in ranks
+    ]).reshape(-1, size, size)
+
+    # Cumulate over ranks, such that hits[m, i, j] counts samples with model
+    # rank <= i and reference rank <= j
+    hits = np.cumsum(np.cumsum(pairs, axis=1), axis=2)
+    both = np.diagonal(hits, axis1=1, axis2=2)[:, :-1]
+    return (
+        hits[:, np.arange(n_predictions), -1] - both,
+        hits[:, -1, np.arange(n_predictions)] - both,
+    )
+
+
+def mcnemar(wins: int, losses: int) -> float:
+    """Compute the two-sided p-value of McNemar's test.
+
+        Parameters
+        ----------
+        wins : int
+            Number of samples only predicted correctly by the first model.
+
+        losses : int
+            Number of samples only predicted correctly by the second model.
+
+        Returns
+        -------
+        p_value : float
+            Exact binomial p-value if there are at most 1000 discordant
+            samples, otherwise continuity-corrected chi-squared p-value.
+        """
+    n = int(wins) + int(losses)
+    if n == 0: return 1.
+    k = min(int(wins), int(losses))
+
+    # Exact binomial test
+    if n <= 1000:
+        tail = sum(math.comb(n, i) for i in range(k + 1)) / 2**n
+        return min(1., 2 * tail)
+
+    # Chi-squared approximation with one degree of freedom
+    statistic = (abs(int(wins) - int(losses)) - 1)**2 / n
+    return math.erfc(math.sqrt(statistic / 2))
@@ -0,0 +1,1237 @@
+# Imports
+import io
+import numpy as np
+import os
+import sys
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from toppred.encoding import LabelEncoding, factorize
+from toppred.predictions import check_finite, check_predictions, hit_ranks
+from toppred.profiling import stage
+from toppred.types import array_like_1d, array_like_2d
+from typing import Dict, List, Literal, Optional, Tuple
+
+# Number of samples for which rank keys are computed at once
+COUNT_CHUNK_SIZE = 2**20
+
+class UndefinedMetricWarning(UserWarning):
+    """Warning used when a metric is ill-defined. Equivalent to
+        ``sklearn.exceptions.UndefinedMetricWarning``, which is used instead
+        if sklearn has been imported, see :py:meth:`undefined_metric_warning`.
+        """
+
+
+class TopConfusion(object):
+    """Per-class confusion counts for all top predictions at once.
+
+        The confusion counts of the i-th top prediction are those of the
+        ``y_pred`` yielded by :py:meth:`toppred.predictions.top_predictions`
+        for the i-th top prediction. I.e., a sample counts as correctly
+        predicted for top i if y_true occurs in y_pred[:, :i+1], otherwise it
+        counts as a prediction of y_pred[:, 0].
+
+        Attributes
+        ----------
+        classes : np.ndarray of shape=(n_classes,)
+            Sorted labels for which counts are stored.
+
+        tp : np.ndarray of shape=(n_predictions, n_classes)
+            (Weighted) number of true positives per top prediction and class.
+
+        pred : np.ndarray of shape=(n_predictions, n_classes)
+            (Weighted) number of predictions per top prediction and class.
+
+        true : np.ndarray of shape=(n_classes,)
+            (Weighted) number of true samples per class, i.e., the support.
+
+        n_pred : np.ndarray of shape=(n_predictions, n_classes)
+            Unweighted number of predictions per top prediction and class.
+            Used to determine which labels occur in each top prediction.
+
+        n_true : np.ndarray of shape=(n_classes,)
+            Unweighted number of true samples per class.
+        """
+
+    def __init__(
+            self,
+            classes: np.ndarray,
+            tp     : np.ndarray,
+            pred   : np.ndarray,
+            true   : np.ndarray,
+            n_pred : Optional[np.ndarray] = None,
+            n_true : Optional[np.ndarray] = None,
+        ):
+        """Create confusion counts from precomputed arrays, see class
+            attributes. If n_pred or n_true are not given, they are assumed to
+            be equal to pred and true, i.e., the counts are unweighted."""
+        self.classes = classes
+        self.tp      = tp
+        self.pred    = pred
+        self.true    = true
+        self.n_pred  = pred if n_pred is None else n_pred
+        self.n_true  = true if n_true is None else n_true
+
+    ########################################################################
+    #                             Construction                             #
+    ########################################################################
+
+    @classmethod
+    def from_predictions(
+            cls,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            labels       : Optional[array_like_1d] = None,
+            sample_weight: Optional[array_like_1d] = None,
+            n_jobs       : Optional[int] = None,
+        ) -> 'TopConfusion':
+        """Compute the confusion counts of all top predictions in one pass.
+
+            Parameters
+            ----------
+            y_true : array_like_1d of shape=(n_samples,)
+                True labels corresponding to samples.
+
+            y_pred : array_like_2d of shape=(n_samples, n_predictions)
+                Predicted labels for samples. Each column y_pred[:, i]
+                indicates the i-th most likely prediction (0-indexed) for the
+                given sample.
+
+            labels : Optional[array_like_1d], default = None
+                Optional labels that should be counted even if they do not
+                occur in y_true or y_pred.
+
+            sample_weight : Optional[array_like_1d], default = None
+                Sample weights.
+
+            n_jobs : Optional[int], default = None
+                Number of threads used to count confusion. If > 1, samples are
+                split into n_jobs contiguous chunks that are counted in
+                parallel and merged afterwards. Chunks are views of the input,
+                so no data is copied between threads. None means 1, -1 means
+                all processors.
+
+            Returns
+            -------
+            result : TopConfusion
+                Confusion counts of all top predictions.
+            """
+        # Cast and check input
+        with stage(
+                'check',
+                y_true        = y_true,
+                y_pred        = y_pred,
+                sample_weight = sample_weight,
+            ):
+            y_true, y_pred = check_predictions(y_true, y_pred)
+            n_samples, n_predictions = y_pred.shape
+            sample_weight = check_sample_weight(sample_weight, n_samples)
+            n_jobs = check_n_jobs(n_jobs)
+
+        # Compare object labels as dense integer codes
+        if y_true.dtype == object or y_pred.dtype == object:
+            with stage('encode', y_true=y_true, y_pred=y_pred, labels=labels):
+                encoding = LabelEncoding.fit(y_true, y_pred, labels)
+            with stage('count', sample_weight=sample_weight):
+                return cls.from_encoding(
+                    encoding      = encoding,
+                    sample_weight = sample_weight,
+                    n_jobs        = n_jobs,
+                )
+
+        # Count chunks in parallel, if necessary
+        if n_jobs > 1 and n_samples > n_jobs:
+            bounds = np.linspace(0, n_samples, n_jobs + 1).astype(int)
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                return sum(executor.map(
+                    lambda start, end: cls.from_predictions(
+                        y_true        = y_true[start:end],
+                        y_pred        = y_pred[start:end],
+                        labels        = labels,
+                        sample_weight = None if sample_weight is None else
+                                        sample_weight[start:end],
+                    ),
+                    bounds[:-1],
+                    bounds[1:],
+                ))
+
+        # Compute rank of first correct prediction
+        with stage('hit_ranks', y_true=y_true, y_pred=y_pred):
+            ranks = hit_ranks(y_true, y_pred)
+
+        # Encode labels once, only y_true and y_pred[:, 0] can be predicted
+        values = [y_true, y_pred[:, 0]]
+        if labels is not None:
+            values.append(np.asarray(labels).reshape(-1))
+        with stage('encode', y_true=y_true, y_pred=y_pred[:, 0], labels=labels):
+            classes, codes = factorize(np.concatenate(values))
+
+        # Count confusion
+        with stage(
+                'count',
+                ranks         = ranks,
+                codes         = codes,
+                sample_weight = sample_weight,
+            ):
+            return cls.from_ranks(
+                classes       = classes,
+                true_codes    = codes[:n_samples],
+                pred_codes    = codes[n_samples:2*n_samples],
+                ranks         = ranks,
+                n_predictions = n_predictions,
+                sample_weight = sample_weight,
+            )
+
+    @classmethod
+    def from_encoding(
+            cls,
+            encoding     : LabelEncoding,
+            sample_weight: Optional[array_like_1d] = None,
+            n_jobs       : Optional[int] = None,
+        ) -> 'TopConfusion':
+        """Compute the confusion counts of all top predictions from encoded
+            labels. This avoids encoding the labels again when confusion counts
+            are computed multiple times for the same y_true and y_pred.
+
+            Parameters
+            ----------
+            encoding : LabelEncoding
+                Encoded y_true and y_pred.
+
+            sample_weight : Optional[array_like_1d], default = None
+                Sample weights.
+
+            n_jobs : Optional[int], default = None
+                Number of threads used to count confusion, see
+                :py:meth:`from_predictions`.
+
+            Returns
+            -------
+            result : TopConfusion
+                Confusion counts of all top predictions.
+            """
+        # Check input
+        sample_weight = check_sample_weight(sample_weight, encoding.n_samples)
+        n_jobs = check_n_jobs(n_jobs)
+
+        # Count chunks in parallel, if necessary
+        if n_jobs > 1 and encoding.n_samples > n_jobs:
+            bounds = np.linspace(0, encoding.n_samples, n_jobs + 1).astype(int)
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                return sum(executor.map(
+                    lambda start, end: cls.from_encoding(
+                        encoding      = encoding[start:end],
+                        sample_weight = None if sample_weight is None else
+                                        sample_weight[start:end],
+                    ),
+                    bounds[:-1],
+                    bounds[1:],
+                ))
+
+        # Count confusion
+        return cls.from_ranks(
+            classes       = encoding.classes,
+            true_codes    = encoding.y_true,
+            pred_codes    = encoding.y_pred[:, 0],
+            ranks         = encoding.ranks(),
+            n_predictions = encoding.n_predictions,
+            sample_weight = sample_weight,
+        )
+
+    @classmethod
+    def from_groups(
+            cls,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            groups       : array_like_1d,
+            sample_weight: Optional[array_like_1d] = None,
+        ) -> Dict[object, 'TopConfusion']:
+        """Compute the confusion counts of all top predictions for each group
+            of samples in one pass.
+
+            Hit ranks and labels are computed and encoded once for all
+            samples. Each (group, label) pair is then combined into a single
+            code, such that the counts of all groups are obtained from a
+            single grouped reduction instead of one per group.
+
+            Parameters
+            ----------
+            y_true : array_like_1d of shape=(n_samples,)
+                True labels corresponding to samples.
+
+            y_pred : array_like_2d of shape=(n_samples, n_predictions)
+                Predicted labels for samples. Each column y_pred[:, i]
+                indicates the i-th most likely prediction (0-indexed) for the
+                given sample.
+
+            groups : array_like_1d of shape=(n_samples,)
+                Group of each sample, e.g., its locale or device.
+
+            sample_weight : Optional[array_like_1d], default = None
+                Sample weights.
+
+            Returns
+            -------
+            result : Dict[object, TopConfusion]
+                Confusion counts of the samples of each group, in sorted
+                order of groups. Equal to :py:meth:`from_predictions` on the
+                samples of each group.
+            """
+        # Cast and check input
+        y_true, y_pred = check_predictions(y_true, y_pred)
+        n_samples, n_predictions = y_pred.shape
+        sample_weight = check_sample_weight(sample_weight, n_samples)
+        groups = np.asarray(groups).reshape(-1)
+        if groups.shape[0] != n_samples:
+            raise ValueError(
+                f"groups should be of shape ({n_samples},), but was of shape "
+                f"'{groups.shape}'."
+            )
+
+        # Compute hit ranks and encode labels and groups once
+        classes, true_codes, pred_codes, ranks = encode_ranks(y_true, y_pred)
+        group_classes, group_codes = factorize(groups)
+
+        # Combine group and label into a single code, only pairs that occur
+        # are encoded, sorted by group and then by label
+        offset = group_codes.astype(np.int64) * classes.shape[0]
+        pairs, codes = factorize(np.concatenate([
+            offset + true_codes, offset + pred_codes,
+        ]))
+
+        # Count confusion of all pairs at once
+        confusion = cls.from_ranks(
+            classes       = pairs,
+            true_codes    = codes[:n_samples],
+            pred_codes    = codes[n_samples:],
+            ranks         = ranks,
+            n_predictions = n_predictions,
+            sample_weight = sample_weight,
+        )
+
+        # Split counts per group, pairs of a group are contiguous
+        bounds = np.searchsorted(
+            pairs // max(1, classes.shape[0]),
+            np.arange(group_classes.shape[0] + 1),
+        )
+        weighted = confusion.weighted
+        return {
+            group: cls(
+                classes = classes[pairs[start:end] % classes.shape[0]],
+                tp      = confusion.tp  [:, start:end],
+                pred    = confusion.pred[:, start:end],
+                true    = confusion.true[   start:end],
+                n_pred  = confusion.n_pred[:, start:end] if weighted else None,
+                n_true  = confusion.n_true[   start:end] if weighted else None,
+            )
+            for group, start, end in zip(
+                group_classes.tolist(), bounds[:-1], bounds[1:],
+            )
+        }
+
+    @classmethod
+    def from_ranks(
+            cls,
+            classes      : np.ndarray,
+            true_codes   : np.ndarray,
+            pred_codes   : np.ndarray,
+            ranks        : np.ndarray,
+            n_predictions: int,
+            sample_weight: Optional[np.ndarray] = None,
+        ) -> 'TopConfusion':
+        """Compute the confusion counts of all top predictions from hit ranks.
+
+            Parameters
+            ----------
+            classes : np.ndarray of shape=(n_classes,)
+                Sorted classes into which labels are encoded.
+
+            true_codes : np.ndarray of shape=(n_samples,)
+                Encoded true label of each sample.
+
+            pred_codes : np.ndarray of shape=(n_samples,)
+                Encoded label of the most likely prediction, i.e., y_pred[:, 0].
+
+            ranks : np.ndarray of shape=(n_samples,)
+                Rank of first correct prediction, see
+                :py:meth:`toppred.predictions.hit_ranks`.
+
+            n_predictions : int
+                Number of top predictions.
+
+            sample_weight : Optional[np.ndarray] of shape=(n_samples,)
+                Optional sample weights as float64 array.
+
+            Returns
+            -------
+            result : TopConfusion
+                Confusion counts of all top predictions.
+            """
+        # Count weighted and unweighted confusion, keys of (class, hit rank)
+        # pairs are computed once per chunk for both counts
+        weights = [None] if sample_weight is None else [sample_weight, None]
+        counts  = [cumulate(*histogram) for histogram in rank_histograms(
+            true_codes, pred_codes, ranks, n_predictions, classes.shape[0],
+            weights,
+        )]
+        tp, pred, true = counts[0]
+        _, n_pred, n_true = counts[-1]
+
+        # Return result
+        return cls(
+            classes = classes,
+            tp      = tp,
+            pred    = pred,
+            true    = true,
+            n_pred  = n_pred,
+            n_true  = n_true,
+        )
+
+    ########################################################################
+    #                               Merging                                #
+    ########################################################################
+
+    def align(self, classes: np.ndarray) -> 'TopConfusion':
+        """Reindex confusion counts to a sorted superset of classes.
+
+            Parameters
+            ----------
+            classes : np.ndarray of shape=(n_classes_aligned,)
+                Sorted classes, should contain all classes of self.
+
+            Returns
+            -------
+            result : TopConfusion
+                Confusion counts for given classes, classes that do not occur
+                in self have zero counts.
+            """
+        # Return self if classes are equal
+        if np.array_equal(self.classes, classes): return self
+
+        # Find position of own classes
+        index, known = lookup(classes, self.classes)
+        if not np.all(known):
+            raise ValueError(
+                "Cannot align confusion counts with classes that do not "
+                "contain all counted classes."
+            )
+
+        # Reindex counts, unweighted counts only if they differ
+        arrays = [self.tp, self.pred, self.true]
+        if self.weighted: arrays += [self.n_pred, self.n_true]
+        for i, array in enumerate(arrays):
+            arrays[i] = np.zeros(
+                array.shape[:-1] + classes.shape, dtype=array.dtype,
+            )
+            arrays[i][..., index] = array
+
+        # Return result
+        return TopConfusion(classes, *arrays)
+
+    def merge(self, other: 'TopConfusion') -> 'TopConfusion':
+        """Merge confusion counts of two disjoint sets of samples.
+
+            Merging is associative and commutative, so confusion counts of
+            shards can be reduced in any order to obtain the confusion counts
+            of all samples.
+
+            Parameters
+            ----------
+            other : TopConfusion
+                Confusion counts to merge with self.
+
+            Returns
+            -------
+            result : TopConfusion
+                Confusion counts of the samples of self and other.
+            """
+        # Check number of predictions
+        if other.n_predictions != self.n_predictions:
+            raise ValueError(
+                f"Cannot merge confusion counts of {other.n_predictions} top "
+                f"predictions with those of {self.n_predictions} top "
+                "predictions."
+            )
+
+        # Align classes of both counts
+        classes = np.union1d(self.classes, other.classes)
+        a = self .align(classes)
+        b = other.align(classes)
+
+        # Add counts
+        weighted = a.weighted or b.weighted
+        return TopConfusion(
+            classes = classes,
+            tp      = a.tp   + b.tp,
+            pred    = a.pred + b.pred,
+            true    = a.true + b.true,
+            n_pred  = a.n_pred + b.n_pred if weighted else None,
+            n_true  = a.n_true + b.n_true if weighted else None,
+        )
+
+    def __add__(self, other: 'TopConfusion') -> 'TopConfusion':
+        """Merge confusion counts, see :py:meth:`merge`."""
+        if not isinstance(other, TopConfusion): return NotImplemented
+        return self.merge(other)
+
+    def __radd__(self, other) -> 'TopConfusion':
+        """Merge confusion counts, allows ``sum(confusions)``."""
+        if isinstance(other, int) and other == 0: return self
+        return NotImplemented
+
+    ########################################################################
+    #                            Serialization                             #
+    ########################################################################
+
+    def to_bytes(self) -> bytes:
+        """Serialize confusion counts to a compact binary format.
+
+            Returns
+            -------
+            data : bytes
+                Compressed ``.npz`` representation of the confusion counts, can
+                be loaded with :py:meth:`from_bytes`.
+            """
+        # Get classes, object arrays cannot be stored without pickle
+        classes = self.classes
+        if classes.dtype == object:
+            if not all(isinstance(label, str) for label in classes):
+                raise ValueError(
+                    "Cannot serialize classes of dtype object, only numeric "
+                    "and string labels are supported."
+                )
+            classes = classes.astype(str)
+
+        # Collect arrays, unweighted counts are only stored if they differ
+        arrays = {
+            'classes': classes,
+            'tp'     : self.tp,
+            'pred'   : self.pred,
+            'true'   : self.true,
+        }
+        if self.weighted:
+            arrays['n_pred'] = self.n_pred
+            arrays['n_true'] = self.n_true
+
+        # Serialize arrays
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'TopConfusion':
+        """Load confusion counts serialized with :py:meth:`to_bytes`.
+
+            Parameters
+            ----------
+            data : bytes
+                Serialized confusion counts.
+
+            Returns
+            -------
+            result : TopConfusion
+                Deserialized confusion counts.
+            """
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(
+                classes = arrays['classes'],
+                tp      = arrays['tp'],
+                pred    = arrays['pred'],
+                true    = arrays['true'],
+                n_pred  = arrays['n_pred'] if 'n_pred' in arrays else None,
+                n_true  = arrays['n_true'] if 'n_true' in arrays else None,
+            )
+
+    ########################################################################
+    #                              Properties                              #
+    ########################################################################
+
+    @property
+    def n_predictions(self) -> int:
+        """Number of top predictions for which counts are stored."""
+        return self.tp.shape[0]
+
+    @property
+    def n_classes(self) -> int:
+        """Number of classes for which counts are stored."""
+        return self.classes.shape[0]
+
+    @property
+    def weighted(self) -> bool:
+        """True if weighted counts differ from unweighted counts."""
+        return self.n_pred is not self.pred or self.n_true is not self.true
+
+    ########################################################################
+    #                               Metrics                                #
+    ########################################################################
+
+    def scores(
+            self,
+            zero_division: Literal["warn", 0, 1] = "warn",
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Compute precision, recall and F1-score for all top predictions and
+            classes at once.
+
+            Parameters
+            ----------
+            zero_division : Union[Literal["warn"], 0, 1], default = "warn"
+                Sets the value to return when there is a zero division. If set
+                to “warn”, this acts as 0. Note that this method does not raise
+                any warnings.
+
+            Returns
+            -------
+            precision : np.ndarray of shape=(n_predictions, n_classes)
+                Precision per top prediction and class.
+
+            recall : np.ndarray of shape=(n_predictions, n_classes)
+                Recall per top prediction and class.
+
+            f1 : np.ndarray of shape=(n_predictions, n_classes)
+                F1-score per top prediction and class.
+            """
+        return prf(self.tp, self.pred, self.true, zero_division)
+
+    def report(
+            self,
+            labels       : Optional[array_like_1d] = None,
+            target_names : Optional[List[str]] = None,
+            zero_division: Literal["warn", 0, 1] = "warn",
+            observed_only: bool = False,
+            n_worst      : Optional[int] = None,
+        ) -> List[dict]:
+        """Create a classification report dictionary for each top prediction.
+            Each dictionary has the same format as the output of
+            ``sklearn.metrics.classification_report`` with ``output_dict=True``.
+
+            Labels that do not occur in the counted classes, e.g., labels
+            without any samples in an extreme classification setting, are never
+            stored. Their scores are only filled in per top prediction when
+            creating the report, so memory scales with the number of observed
+            classes rather than the number of given labels.
+
+            Parameters
+            ----------
+            labels : Optional[array_like_1d], default = None
+                Optional list of label indices to include in the report. The
+                report contains 'accuracy' only if labels are exactly the
+                labels observed in y_true and the top prediction, otherwise
+                it contains 'micro avg'. Unlike recent scikit-learn, which
+                reports 'accuracy' whenever labels are a superset of the
+                observed labels, a strict superset also gives 'micro avg'.
+
+            target_names : Optional[List[str]] = None
+                Optional display names matching the labels (same order).
+
+            zero_division : Union[Literal["warn"], 0, 1], default = "warn"
+                Sets the value to return when there is a zero division. If set
+                to “warn”, this acts as 0, but warnings are also raised.
+
+            observed_only : bool, default = False
+                If True, only report labels that occur in y_true or in the
+                top prediction. Averages are still computed over all labels.
+
+            n_worst : Optional[int], default = None
+                If given, only report the n_worst labels with the lowest
+                F1-score per top prediction, sorted from worst to best.
+                Averages are still computed over all labels.
+
+            Returns
+            -------
+            reports : List[dict]
+                Classification report dictionary for each top prediction.
+            """
+        # Check zero division
+        if zero_division not in ("warn", 0, 1):
+            raise ValueError(
+                f"zero_division should be 'warn', 0 or 1, but was "
+                f"'{zero_division}'."
+            )
+
+        # Check number of worst labels
+        if n_worst is not None and n_worst < 0:
+            raise ValueError(f"n_worst should be >= 0, but was {n_worst}.")
+
+        # Find position of labels in counted classes, if given
+        if labels is not None:
+            labels = np.asarray(labels).reshape(-1)
+            index, known = lookup(self.classes, labels)
+            unique = np.unique(labels)
+
+        # Labels occurring in each top prediction
+        present = (self.n_true > 0) | (self.n_pred > 0)
+
+        # Compute scores for all top predictions and counted classes at once
+        precision, recall, f1 = prf(
+            self.tp, self.pred, self.true, zero_division,
+        )
+        fill = 0. if zero_division == "warn" else float(zero_division)
+
+        # Initialise reports and zero division warnings
+        reports   = list()
+        undefined = {'precision': list(), 'recall': list(), 'f-score': list()}
+
+        # Create report for each top prediction
+        for top in range(self.n_predictions):
+            # Select labels occurring in top prediction
+            if labels is None:
+                index = np.flatnonzero(present[top])
+                known = None
+                names = self.classes[index]
+                micro_is_accuracy = True
+            # Or select given labels, labels without counts are zero counts
+            else:
+                names = labels
+                micro_is_accuracy = np.array_equal(
+                    unique, self.classes[present[top]],
+                )
+
+            # Gather counts and scores of selected labels
+            tp   = select(self.tp  [top], index, known, 0)
+            pred = select(self.pred[top], index, known, 0)
+            true = select(self.true     , index, known, 0)
+            p    = select(precision[top], index, known, fill)
+            r    = select(recall   [top], index, known, fill)
+            f    = select(f1       [top], index, known, fill)
+
+            # Get target names
+            if target_names is None:
+                target_names_ = names
+            elif len(target_names) != names.shape[0]:
+                if labels is not None:
+                    warnings.warn(
+                        f"labels size, {names.shape[0]}, does not match "
+                        f"size of target_names, {len(target_names)}"
+                    )
+                    target_names_ = target_names
+                else:
+                    raise ValueError(
+                        f"Number of classes, {names.shape[0]}, does not "
+                        f"match size of target_names, {len(target_names)}. Try "
+                        "specifying the labels parameter"
+                    )
+            else:
+                target_names_ = target_names
+
+            # Record zero divisions
+            if np.any(pred == 0):
+                undefined['precision'].append(top)
+            if np.any(true == 0):
+                undefined['recall'].append(top)
+            if np.any(true + pred == 0):
+                undefined['f-score'].append(top)
+
+            # Select rows to report, names beyond target_names are dropped
+            rows = np.arange(min(names.shape[0], len(target_names_)))
+            if observed_only:
+                n_true = select(self.n_true     , index, known, 0)
+                n_pred = select(self.n_pred[top], index, known, 0)
+                rows   = rows[(n_true[rows] > 0) | (n_pred[rows] > 0)]
+            if n_worst is not None:
+                rows = rows[np.argsort(f[rows], kind='stable')[:n_worst]]
+
+            # Add per class metrics
+            report = dict()
+            for row in rows:
+                name = target_names_[row]
+                if target_names is None: name = "%s" % name
+                report[name] = {
+                    'precision': float(p   [row]),
+                    'recall'   : float(r   [row]),
+                    'f1-score' : float(f   [row]),
+                    'support'  : float(true[row]),
+                }
+
+            # Add averages
+            support = np.sum(true)
+            micro   = prf(np.sum(tp), np.sum(pred), support, zero_division)
+            if micro_is_accuracy:
+                report['accuracy'] = float(micro[0])
+            else:
+                report['micro avg'] = {
+                    'precision': float(micro[0]),
+                    'recall'   : float(micro[1]),
+                    'f1-score' : float(micro[2]),
+                    'support'  : float(support),
+                }
+            for average, weights in [
+                    ('macro avg'   , None),
+                    ('weighted avg', true),
+                ]:
+                report[average] = {
+                    'precision': average_scores(p, weights),
+                    'recall'   : average_scores(r, weights),
+                    'f1-score' : average_scores(f, weights),
+                    'support'  : float(support),
+                }
+
+            # Add report
+            reports.append(report)
+
+        # Raise a single zero division warning for all metrics, if necessary
+        if zero_division == "warn":
+            messages = [
+                f"{metric.capitalize()} is ill-defined in labels with no "
+                f"{modifier} samples for top "
+                f"{', '.join(str(top+1) for top in undefined[metric])}"
+                for metric, modifier in [
+                    ('precision', 'predicted'),
+                    ('recall'   , 'true'),
+                    ('f-score'  , 'true nor predicted'),
+                ] if undefined[metric]
+            ]
+            if messages:
+                warnings.warn(
+                    "; ".join(messages) + ". These metrics are being set to "
+                    "0.0. Use `zero_division` parameter to control this "
+                    "behavior.",
+                    undefined_metric_warning(),
+                    stacklevel = 2,
+                )
+
+        # Return reports
+        return reports
+
+
+################################################################################
+#                              Auxiliary methods                               #
+################################################################################
+
+def undefined_metric_warning() -> type:
+    """Get the warning category for ill-defined metrics without importing
+        sklearn, which is slow. If sklearn.exceptions has been imported, e.g.,
+        to filter its UndefinedMetricWarning, that category is returned.
+        Otherwise, toppred's own UndefinedMetricWarning is returned.
+
+        Returns
+        -------
+        category : type
+            Warning category for ill-defined metrics.
+        """
+    exceptions = sys.modules.get('sklearn.exceptions')
+    if exceptions is None:
+        return UndefinedMetricWarning
+    return exceptions.UndefinedMetricWarning
+
+
+def check_n_jobs(n_jobs: Optional[int]) -> int:
+    """Get the number of jobs to use, following the convention of sklearn.
+
+        Parameters
+        ----------
+        n_jobs : Optional[int]
+            Number of jobs. None means 1, negative values mean all processors
+            + 1 + n_jobs, i.e., -1 means all processors.
+
+        Returns
+        -------
+        n_jobs : int
+            Number of jobs to use, always >= 1.
+        """
+    # Return 1 if no number of jobs was given
+    if n_jobs is None: return 1
+
+    # Check number of jobs
+    if n_jobs == 0:
+        raise ValueError("n_jobs == 0 has no meaning.")
+
+    # Return number of jobs
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def check_sample_weight(
+        sample_weight: Optional[array_like_1d],
+        n_samples    : int,
+        nonzero      : bool = False,
+    ) -> Optional[np.ndarray]:
+    """Cast sample_weight to a float64 array and check its shape and values.
+
+        Parameters
+        ----------
+        sample_weight : Optional[array_like_1d]
+            Sample weights to check, may be None.
+
+        n_samples : int
+            Expected number of samples.
+
+        nonzero : bool, default = False
+            If True, raise a ValueError if all sample weights are zero, as
+            scikit-learn does for reports. Counts of chunks may have zero
+            weight as long as the merged counts do not, hence the default.
+
+        Returns
+        -------
+        sample_weight : Optional[np.ndarray] of shape=(n_samples,)
+            Sample weights as float64 array, None if no weights were given.
+        """
+    # Return None if no sample weight was given
+    if sample_weight is None: return None
+
+    # Cast sample weight
+    sample_weight = np.asarray(sample_weight, dtype=np.float64)
+
+    # Check sample weight
+    if sample_weight.shape != (n_samples,):
+        raise ValueError(
+            f"sample_weight should be of shape ({n_samples},), but was of "
+            f"shape '{sample_weight.shape}'."
+        )
+    if n_samples:
+        check_finite(sample_weight, 'sample_weight')
+        if nonzero and not np.any(sample_weight):
+            raise ValueError(
+                "Sample weights must contain at least one non-zero number."
+            )
+
+    # Return sample weight
+    return sample_weight
+
+
+def check_total_weight(confusion: 'TopConfusion') -> None:
+    """Raise a ValueError if the weighted counts of confusion sum to zero,
+        as scikit-learn does for sample weights that are all zero. Used by
+        reports over merged counts, whose chunks may have zero weight."""
+    if confusion.weighted and not np.sum(confusion.true):
+        raise ValueError(
+            "Sample weights must contain at least one non-zero number."
+        )
+
+
+def encode_ranks(
+        y_true: np.ndarray,
+        y_pred: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Compute hit ranks and encode the labels that can be true or predicted.
+
+        Parameters
+        ----------
+        y_true : np.ndarray of shape=(n_samples,)
+            True labels, checked by
+            :py:meth:`toppred.predictions.check_predictions`.
+
+        y_pred : np.ndarray of shape=(n_samples, n_predictions)
+            Predicted labels, checked by
+            :py:meth:`toppred.predictions.check_predictions`.
+
+        Returns
+        -------
+        classes : np.ndarray of shape=(n_classes,)
+            Sorted labels occurring in y_true or y_pred[:, 0].
+
+        true_codes : np.ndarray of shape=(n_samples,)
+            Encoded true label of each sample.
+
+        pred_codes : np.ndarray of shape=(n_samples,)
+            Encoded label of the most likely prediction, i.e., y_pred[:, 0].
+
+        ranks : np.ndarray of shape=(n_samples,)
+            Rank of first correct prediction, see :py:meth:`hit_ranks`.
+        """
+    # Compare object labels as dense integer codes
+    if y_true.dtype == object or y_pred.dtype == object:
+        encoding = LabelEncoding.fit(y_true, y_pred)
+        return (
+            encoding.classes,
+            encoding.y_true,
+            encoding.y_pred[:, 0],
+            encoding.ranks(),
+        )
+
+    # Otherwise compare labels directly and only encode y_true, y_pred[:, 0]
+    ranks = hit_ranks(y_true, y_pred)
+    classes, codes = factorize(np.concatenate([y_true, y_pred[:, 0]]))
+    return classes, codes[:y_true.shape[0]], codes[y_true.shape[0]:], ranks
+
+
+def rank_histograms(
+        true_codes   : np.ndarray,
+        pred_codes   : np.ndarray,
+        ranks        : np.ndarray,
+        n_predictions: int,
+        n_classes    : int,
+        weights      : List[Optional[np.ndarray]],
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Count samples per (class, hit rank) pair for multiple sample weights.
+
+        Keys of (class, hit rank) pairs are computed per chunk of samples and
+        shared by all weights, such that no array of keys for all samples is
+        ever allocated.
+
+        Parameters
+        ----------
+        true_codes : np.ndarray of shape=(n_samples,)
+            Encoded true label of each sample.
+
+        pred_codes : np.ndarray of shape=(n_samples,)
+            Encoded label of the most likely prediction, i.e., y_pred[:, 0].
+
+        ranks : np.ndarray of shape=(n_samples,)
+            Rank of first correct prediction, see :py:meth:`hit_ranks`.
+
+        n_predictions : int
+            Number of top predictions.
+
+        n_classes : int
+            Number of encoded classes.
+
+        weights : List[Optional[np.ndarray]]
+            Sample weights for which to count, None for unweighted counts.
+
+        Returns
+        -------
+        histograms : List[Tuple[np.ndarray, np.ndarray]]
+            For each weights, (weighted) number of samples per (true label,
+            hit rank) and per (most likely prediction, hit rank) pair, both
+            of shape=(n_classes, n_predictions+1).
+        """
+    # Initialise histograms
+    shape = (n_classes, n_predictions + 1)
+    size  = shape[0] * shape[1]
+    histograms = [[
+        np.zeros(size, dtype=np.int64 if weight is None else np.float64)
+        for _ in range(2)
+    ] for weight in weights]
+
+    # Count chunks, chunks are at least as large as the histograms
+    chunk_size = max(COUNT_CHUNK_SIZE, size)
+    for start in range(0, ranks.shape[0], chunk_size):
+        end  = start + chunk_size
+        keys = rank_keys(
+            true_codes[start:end], pred_codes[start:end], ranks[start:end],
+            n_predictions,
+        )
+        for histogram, weight in zip(histograms, weights):
+            weight = None if weight is None else weight[start:end]
+            for counts, key in zip(histogram, keys):
+                counts += np.bincount(key, weight, minlength=size).astype(
+                    counts.dtype, copy=False,
+                )
+
+    # Return histograms
+    return [
+        (hits.reshape(shape), miss.reshape(shape))
+        for hits, miss in histograms
+    ]
+
+
+def rank_keys(
+        true_codes   : np.ndarray,
+        pred_codes   : np.ndarray,
+        ranks        : np.ndarray,
+        n_predictions: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Combine encoded labels and hit ranks into a single key per sample.
+
+        Parameters
+        ----------
+        true_codes : np.ndarray of shape=(n_samples,)
+            Encoded true label of each sample.
+
+        pred_codes : np.ndarray of shape=(n_samples,)
+            Encoded label of the most likely prediction, i.e., y_pred[:, 0].
+
+        ranks : np.ndarray of shape=(n_samples,)
+            Rank of first correct prediction, see :py:meth:`hit_ranks`.
+
+        n_predictions : int
+            Number of top predictions.
+
+        Returns
+        -------
+        true_keys : np.ndarray of shape=(n_samples,)
+            Key true_code * (n_predictions+1) + rank of each sample.
+
+        pred_keys : np.ndarray of shape=(n_samples,)
+            Key pred_code * (n_predictions+1) + rank of each sample.
+        """
+    ranks = ranks.astype(np.intp, copy=False)
+    return (
+        true_codes.astype(np.intp) * (n_predictions + 1) + ranks,
+        pred_codes.astype(np.intp) * (n_predictions + 1) + ranks,
+    )
+
+
+def cumulate(
+        hits: np.ndarray,
+        miss: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute confusion of all top predictions from rank histograms.
+
+        Parameters
+        ----------
+        hits : np.ndarray of shape=(n_classes, n_predictions+1)
+            (Weighted) number of samples per (true label, hit rank) pair.
+
+        miss : np.ndarray of shape=(n_classes, n_predictions+1)
+            (Weighted) number of samples per (most likely prediction, hit
+            rank) pair.
+
+        Returns
+        -------
+        tp : np.ndarray of shape=(n_predictions, n_classes)
+            True positives per top prediction and class.
+
+        pred : np.ndarray of shape=(n_predictions, n_classes)
+            Predictions per top prediction and class.
+
+        true : np.ndarray of shape=(n_classes,)
+            True samples per class.
+        """
+    # True samples per class are the hits over all ranks, including misses
+    true = hits.sum(axis=1)
+    # Samples are correct for top i if their hit rank <= i
+    tp   = np.ascontiguousarray(np.cumsum(hits[:, :-1], axis=1).T)
+    # Otherwise they are predicted as y_pred[:, 0]
+    miss = np.ascontiguousarray(np.cumsum(miss[:, :0:-1], axis=1)[:, ::-1].T)
+
+    # Return result
+    return tp, tp + miss, true
+
+
+def prf(
+        tp           : np.ndarray,
+        pred         : np.ndarray,
+        true         : np.ndarray,
+        zero_division: Literal["warn", 0, 1] = "warn",
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute precision, recall and F1-score from confusion counts.
+
+        Parameters
+        ----------
+        tp : np.ndarray
+            True positives.
+
+        pred : np.ndarray
+            Number of predictions, broadcastable with tp.
+
+        true : np.ndarray
+            Number of true samples, broadcastable with tp.
+
+        zero_division : Union[Literal["warn"], 0, 1], default = "warn"
+            Value to return when there is a zero division, "warn" acts as 0.
+
+        Returns
+        -------
+        precision : np.ndarray
+            Precision, i.e., tp / pred.
+
+        recall : np.ndarray
+            Recall, i.e., tp / true.
+
+        f1 : np.ndarray
+            F1-score, i.e., 2*tp / (true + pred).
+        """
+    # Get value for zero division
+    zero_division = 0. if zero_division == "warn" else float(zero_division)
+
+    # Cast input
+    tp   = np.asarray(tp  , dtype=np.float64)
+    pred = np.asarray(pred, dtype=np.float64)
+    true = np.asarray(true, dtype=np.float64)
+
+    # Compute metrics
+    return (
+        divide(tp     , pred       , zero_division),
+        divide(tp     , true       , zero_division),
+        divide(2. * tp, true + pred, zero_division),
+    )
+
+
+def lookup(
+        classes: np.ndarray,
+        labels : np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the index of labels in sorted classes.
+
+        Parameters
+        ----------
+        classes : np.ndarray of shape=(n_classes,)
+            Sorted classes in which to look up labels.
+
+        labels : np.ndarray of shape=(n_labels,)
+            Labels to look up.
+
+        Returns
+        -------
+        index : np.ndarray of shape=(n_labels,)
+            Index of each label in classes, 0 for unknown labels.
+
+        known : np.ndarray of shape=(n_labels,)
+            Boolean mask that is True for labels occurring in classes.
+        """
+    # Handle case where there are no classes
+    if classes.shape[0] == 0:
+        return (
+            np.zeros(labels.shape[0], dtype=np.intp),
+            np.zeros(labels.shape[0], dtype=bool),
+        )
+
+    # Look up labels
+    index = np.searchsorted(classes, labels)
+    index[index == classes.shape[0]] = 0
+    known = classes[index] == labels
+
+    # Return result
+    return index, known
+
+
+def select(
+        values: np.ndarray,
+        index : np.ndarray,
+        known : Optional[np.ndarray],
+        fill  : float,
+    ) -> np.ndarray:
+    """Select values at index, replacing values of unknown labels with fill.
+
+        Parameters
+        ----------
+        values : np.ndarray of shape=(n_classes,)
+            Values per counted class.
+
+        index : np.ndarray of shape=(n_labels,)
+            Index of each label in classes, see :py:meth:`lookup`.
+
+        known : Optional[np.ndarray] of shape=(n_labels,)
+            Boolean mask that is True for labels occurring in classes. If None,
+            all labels are known.
+
+        fill : float
+            Value for labels that do not occur in classes.
+
+        Returns
+        -------
+        result : np.ndarray of shape=(n_labels,)
+            Values per label.
+        """
+    if known is None: return values[index]
+    return np.where(known, values[index], fill)
+
+
+def divide(
+        numerator    : np.ndarray,
+        denominator  : np.ndarray,
+        zero_division: float,
+    ) -> np.ndarray:
+    """Divide numerator by denominator, replacing divisions by zero with
+        zero_division."""
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    mask   = denominator == 0
+    result = numerator / np.where(mask, 1., denominator)
+    return np.where(mask, zero_division, result)
+
+
+def average_scores(
+        scores : np.ndarray,
+        weights: Optional[np.ndarray] = None,
+    ) -> float:
+    """Average scores in the same way as sklearn, i.e., returns nan if no
+        scores are given and ignores weights if they sum to zero."""
+    # Return nan for empty scores
+    if scores.shape[0] == 0: return float('nan')
+
+    # Compute (weighted) average
+    if weights is not None and np.sum(weights) != 0:
+        return float(np.average(scores, weights=weights))
+    else:
+        return float(np.mean(scores))
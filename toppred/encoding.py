@@ -0,0 +1,292 @@
+# Imports
+import importlib
+import numpy as np
+import sys
+from toppred.predictions import CHUNK_SIZE, check_predictions, hit_ranks
+from toppred.types import array_like_1d, array_like_2d
+from typing import Optional, Tuple, Union
+
+class LabelEncoding(object):
+    """Dense integer encoding of y_true and y_pred.
+
+        Labels are factorized once into the smallest signed integer codes that
+        index the sorted classes, i.e., int8 for up to 128 classes. All
+        further comparisons, e.g., to find the rank at which y_true occurs in
+        y_pred, are performed on these codes instead of on the original
+        labels, which is especially beneficial for string or object labels.
+        The encoding can be reused to compute
+        :py:class:`toppred.confusion.TopConfusion` multiple times, e.g., with
+        different sample weights, using
+        :py:meth:`toppred.confusion.TopConfusion.from_encoding`. Codes are
+        only mapped back to labels when creating the report.
+
+        Attributes
+        ----------
+        classes : np.ndarray of shape=(n_classes,)
+            Sorted labels occurring in y_true, y_pred[:, 0] or labels.
+
+        y_true : np.ndarray of shape=(n_samples,)
+            Encoded true labels.
+
+        y_pred : np.ndarray of shape=(n_samples, n_predictions)
+            Encoded predicted labels, labels that do not occur in classes are
+            encoded as -1. Such labels can never be correct, nor can they be
+            the most likely prediction y_pred[:, 0].
+        """
+
+    def __init__(
+            self,
+            classes: np.ndarray,
+            y_true : np.ndarray,
+            y_pred : np.ndarray,
+        ):
+        """Create an encoding from precomputed arrays, see class attributes."""
+        self.classes = classes
+        self.y_true  = y_true
+        self.y_pred  = y_pred
+
+    @classmethod
+    def fit(
+            cls,
+            y_true: array_like_1d,
+            y_pred: array_like_2d,
+            labels: Optional[array_like_1d] = None,
+        ) -> 'LabelEncoding':
+        """Encode y_true and y_pred.
+
+            Parameters
+            ----------
+            y_true : array_like_1d of shape=(n_samples,)
+                True labels corresponding to samples.
+
+            y_pred : array_like_2d of shape=(n_samples, n_predictions)
+                Predicted labels for samples. Each column y_pred[:, i]
+                indicates the i-th most likely prediction (0-indexed) for the
+                given sample.
+
+            labels : Optional[array_like_1d], default = None
+                Optional labels that should be included in the classes even if
+                they do not occur in y_true or y_pred.
+
+            Returns
+            -------
+            result : LabelEncoding
+                Encoding of y_true and y_pred.
+            """
+        # Cast and check input
+        y_true, y_pred = check_predictions(y_true, y_pred)
+        n_samples = y_true.shape[0]
+
+        # Only labels in y_true and y_pred[:, 0] can be true or predicted
+        values = [y_true, y_pred[:, 0]]
+        if labels is not None:
+            values.append(np.asarray(labels).reshape(-1))
+        classes, codes = factorize(np.concatenate(values))
+
+        # Encode remaining predictions
+        _, y_pred = factorize(y_pred.reshape(-1), classes)
+
+        # Return result
+        return cls(
+            classes = classes,
+            y_true  = codes[:n_samples],
+            y_pred  = y_pred.reshape(n_samples, -1),
+        )
+
+    ########################################################################
+    #                              Properties                              #
+    ########################################################################
+
+    @property
+    def n_samples(self) -> int:
+        """Number of encoded samples."""
+        return self.y_pred.shape[0]
+
+    @property
+    def n_predictions(self) -> int:
+        """Number of top predictions per sample."""
+        return self.y_pred.shape[1]
+
+    @property
+    def n_classes(self) -> int:
+        """Number of classes."""
+        return self.classes.shape[0]
+
+    ########################################################################
+    #                               Methods                                #
+    ########################################################################
+
+    def ranks(self) -> np.ndarray:
+        """Compute the rank at which y_true first occurs in y_pred, see
+            :py:meth:`toppred.predictions.hit_ranks`."""
+        return hit_ranks(self.y_true, self.y_pred)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Map codes back to the original labels."""
+        return self.classes[codes]
+
+    def __getitem__(self, index: Union[slice, np.ndarray]) -> 'LabelEncoding':
+        """Select samples from the encoding, classes remain the same."""
+        return LabelEncoding(
+            classes = self.classes,
+            y_true  = self.y_true[index],
+            y_pred  = self.y_pred[index],
+        )
+
+    def __len__(self) -> int:
+        """Number of encoded samples."""
+        return self.n_samples
+
+
+def factorize(
+        values : np.ndarray,
+        classes: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode values as indices into sorted classes without sorting all
+        values as ``np.unique`` does. Integer values with a limited range are
+        encoded using a dense lookup table. Other values are encoded using
+        pandas hash tables if pandas is already imported, otherwise this
+        method falls back to ``np.unique`` and ``np.searchsorted``. Pandas is
+        never imported by this method, such that encoding string labels does
+        not add the import time of pandas.
+
+        Parameters
+        ----------
+        values : np.ndarray of shape=(n_values,)
+            Values to encode.
+
+        classes : Optional[np.ndarray] of shape=(n_classes,), default = None
+            Sorted classes to encode values with. If None, the classes are the
+            sorted unique values.
+
+        Returns
+        -------
+        classes : np.ndarray of shape=(n_classes,)
+            Sorted classes.
+
+        codes : np.ndarray of shape=(n_values,)
+            Index of each value in classes, -1 if the value does not occur in
+            classes. Codes are stored in the smallest signed integer dtype,
+            see :py:meth:`compact`.
+        """
+    # Encode integers using a dense lookup table, if possible
+    if values.dtype.kind in 'iu' and (
+            classes is None or classes.dtype.kind in 'iu'
+        ):
+        result = factorize_dense(values, classes)
+        if result is not None:
+            classes, codes = result
+            return classes, compact(codes, classes.shape[0])
+
+    # Otherwise use pandas hash tables, if pandas is already imported
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        if classes is None:
+            classes = np.sort(pd.unique(values))
+            if values.dtype != object:
+                classes = classes.astype(values.dtype)
+        codes = pd.Index(classes).get_indexer(values)
+
+    # Otherwise sort values
+    elif classes is None:
+        classes, codes = np.unique(values, return_inverse=True)
+        codes = codes.reshape(-1)
+    else:
+        codes = np.searchsorted(classes, values)
+        codes[codes == classes.shape[0]] = 0
+        if classes.shape[0]:
+            codes[classes[codes] != values] = -1
+        else:
+            codes[:] = -1
+
+    # Return result with compact codes
+    return classes, compact(codes, classes.shape[0])
+
+
+def factorize_dense(
+        values : np.ndarray,
+        classes: Optional[np.ndarray] = None,
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Encode integer values using a dense lookup table over their range.
+
+        Parameters
+        ----------
+        values : np.ndarray of shape=(n_values,)
+            Integer values to encode.
+
+        classes : Optional[np.ndarray] of shape=(n_classes,), default = None
+            Sorted integer classes to encode values with. If None, the classes
+            are the sorted unique values.
+
+        Returns
+        -------
+        result : Optional[Tuple[np.ndarray, np.ndarray]]
+            Classes and codes, see :py:meth:`factorize`. None if the range of
+            values is too large for a dense lookup table.
+        """
+    # Get range of lookup table
+    reference = values if classes is None else classes
+    if reference.shape[0] == 0: return None
+    minimum = int(reference.min())
+    size    = int(reference.max()) - minimum + 1
+
+    # Only use lookup table if it is not much larger than the values
+    if size > max(2**20, 4 * values.shape[0]): return None
+
+    # Compute classes from present values, per chunk to bound temporaries
+    if classes is None:
+        present = np.zeros(size, dtype=bool)
+        for start in range(0, values.shape[0], CHUNK_SIZE):
+            chunk = values[start:start+CHUNK_SIZE]
+            present[np.subtract(chunk, minimum, dtype=np.int64)] = True
+        classes = (np.flatnonzero(present) + minimum).astype(values.dtype)
+
+    # Create lookup table of compact codes
+    dtype = code_dtype(classes.shape[0])
+    table = np.full(size, -1, dtype=dtype)
+    table[classes.astype(np.int64) - minimum] = np.arange(classes.shape[0])
+
+    # Look up values per chunk, values outside the table are unknown
+    codes = np.full(values.shape[0], -1, dtype=dtype)
+    for start in range(0, values.shape[0], CHUNK_SIZE):
+        offset = np.subtract(
+            values[start:start+CHUNK_SIZE], minimum, dtype=np.int64,
+        )
+        inside = (offset >= 0) & (offset < size)
+        codes[start:start+CHUNK_SIZE][inside] = table[offset[inside]]
+
+    # Return result
+    return classes, codes
+
+
+def compact(codes: np.ndarray, n_classes: int) -> np.ndarray:
+    """Store codes in the smallest signed dtype, see :py:meth:`code_dtype`."""
+    return codes.astype(code_dtype(n_classes), copy=False)
+
+
+def code_dtype(n_classes: int) -> np.dtype:
+    """Get the smallest signed integer dtype that can store codes -1 to
+        n_classes-1, i.e., int8 for up to 128 classes."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_classes <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def optional_import(name: str):
+    """Import an optional dependency.
+
+        Parameters
+        ----------
+        name : str
+            Name of module to import.
+
+        Returns
+        -------
+        module : Optional[module]
+            Imported module, None if the module is not installed.
+        """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
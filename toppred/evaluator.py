@@ -0,0 +1,384 @@
+# Imports
+import asyncio
+import contextlib
+import functools
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from toppred.cache import ReportCache, fingerprint
+from toppred.confusion import TopConfusion, check_n_jobs, check_sample_weight
+from toppred.metrics import top_confusion_report
+from toppred.types import array_like_1d, array_like_2d
+from typing import Any, AsyncIterator, Callable, List, Literal, Optional, Union
+
+class AsyncEvaluator(object):
+    """Evaluate top predictions from asyncio code without blocking the event
+        loop.
+
+        All NumPy work, including fingerprinting the input, is executed in a
+        bounded thread pool, such that the event loop stays responsive and
+        at most max_workers cores are used. Concurrent requests for the same
+        y_true, y_pred and sample_weight are coalesced: their confusion counts
+        are computed only once and shared, even if the requests differ in
+        formatting options. At most max_pending requests are processed at
+        the same time, further requests wait until a slot becomes available,
+        which bounds the memory held by queued requests.
+
+        Example
+        -------
+        >>> async with AsyncEvaluator(max_workers=4) as evaluator:
+        ...     report = await evaluator.report(y_true, y_pred)
+
+        Attributes
+        ----------
+        pending : int
+            Number of requests that are currently processed.
+
+        coalesced : int
+            Number of requests that reused the counts of a concurrent request.
+
+        computed : int
+            Number of confusion counts computed.
+        """
+
+    def __init__(
+            self,
+            max_workers: Optional[int] = None,
+            max_pending: Optional[int] = None,
+            cache      : Optional[ReportCache] = None,
+        ):
+        """Create an evaluator.
+
+            Parameters
+            ----------
+            max_workers : Optional[int], default = None
+                Number of threads evaluating requests. None means 1, -1 means
+                all processors.
+
+            max_pending : Optional[int], default = None
+                Maximum number of requests processed at the same time,
+                including requests waiting for a thread. If None, 2 x
+                max_workers.
+
+            cache : Optional[ReportCache], default = None
+                Optional cache of confusion counts, such that repeated
+                requests that are not concurrent are not recomputed either.
+            """
+        # Set parameters
+        self.max_workers = check_n_jobs(max_workers)
+        self.max_pending = max_pending
+        if max_pending is None:
+            self.max_pending = 2 * self.max_workers
+        if self.max_pending < 1:
+            raise ValueError(
+                f"max_pending should be >= 1, but was {self.max_pending}."
+            )
+        self.cache = cache
+
+        # Initialise state
+        self.executor  = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.inflight  = dict()
+        self.loop      = None
+        self.semaphore = None
+        self.pending   = 0
+        self.coalesced = 0
+        self.computed  = 0
+
+    ########################################################################
+    #                               Requests                               #
+    ########################################################################
+
+    async def report(
+            self,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            labels       : Optional[array_like_1d] = None,
+            target_names : Optional[List[str]] = None,
+            sample_weight: Optional[array_like_1d] = None,
+            digits       : int = 2,
+            output_dict  : bool = False,
+            zero_division: Literal["warn", 0, 1] = "warn",
+            observed_only: bool = False,
+            n_worst      : Optional[int] = None,
+        ) -> Union[str, dict]:
+        """Create a classification report of all top predictions, see
+            :py:meth:`toppred.metrics.top_classification_report`.
+
+            Parameters
+            ----------
+            y_true : array_like_1d of shape=(n_samples,)
+                Ground truth (correct) target values.
+
+            y_pred : array_like_2d of shape=(n_samples, n_predictions)
+                Estimated targets as returned by a classifier. Each column
+                y_pred[:, i] indicates the i-th most likely prediction
+                (0-indexed) for the given sample.
+
+            labels : Optional[array_like_1d], default = None
+                Optional list of label indices to include in the report.
+
+            target_names : Optional[List[str]] = None
+                Optional display names matching the labels (same order).
+
+            sample_weight : Optional[array_like_1d], default = None
+                Sample weights.
+
+            digits : int, default = 2
+                Number of digits for formatting output floating point values.
+                When ``output_dict`` is ``True``, this will be ignored and the
+                returned values will not be rounded.
+
+            output_dict : bool, default = False
+                If True, return output as dict.
+
+            zero_division : Union[Literal["warn"], 0, 1], default = "warn"
+                Sets the value to return when there is a zero division. If set
+                to “warn”, this acts as 0, but warnings are also raised.
+
+            observed_only : bool, default = False
+                If True, only report labels that occur in y_true or in the top
+                prediction.
+
+            n_worst : Optional[int], default = None
+                If given, only report the n_worst labels with the lowest
+                F1-score per top prediction.
+
+            Returns
+            -------
+            report : Union[str, dict]
+                Text summary of the precision, recall, F1 score for each class.
+                Dictionary returned if output_dict is True.
+            """
+        async with self.slot():
+            if sample_weight is not None:
+                sample_weight = await self.run(
+                    check_sample_weight,
+                    sample_weight, np.size(sample_weight), nonzero=True,
+                )
+            confusion = await self.count(y_true, y_pred, sample_weight)
+            return await self.run(
+                top_confusion_report,
+                confusion     = confusion,
+                labels        = labels,
+                target_names  = target_names,
+                digits        = digits,
+                output_dict   = output_dict,
+                zero_division = zero_division,
+                observed_only = observed_only,
+                n_worst       = n_worst,
+            )
+
+    async def confusion(
+            self,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            sample_weight: Optional[array_like_1d] = None,
+        ) -> TopConfusion:
+        """Compute the confusion counts of all top predictions, see
+            :py:meth:`toppred.confusion.TopConfusion.from_predictions`.
+
+            Parameters
+            ----------
+            y_true, y_pred, sample_weight
+                See :py:meth:`toppred.confusion.TopConfusion.from_predictions`.
+
+            Returns
+            -------
+            result : TopConfusion
+                Confusion counts of all top predictions, shared with
+                concurrent requests for the same input.
+            """
+        async with self.slot():
+            return await self.count(y_true, y_pred, sample_weight)
+
+    ########################################################################
+    #                               Lifecycle                              #
+    ########################################################################
+
+    async def __aenter__(self) -> 'AsyncEvaluator':
+        """Use evaluator as asynchronous context manager."""
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        """Shut down evaluator when leaving context."""
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the thread pool, running requests are completed."""
+        self.executor.shutdown(wait=False)
+
+    ########################################################################
+    #                           Auxiliary methods                          #
+    ########################################################################
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait until fewer than max_pending requests are processed. The
+            semaphore is created for the running event loop, such that the
+            evaluator can be used from subsequent event loops."""
+        # Create semaphore for running event loop, if necessary
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop      = loop
+            self.semaphore = asyncio.Semaphore(self.max_pending)
+            self.inflight  = dict()
+
+        # Process request while holding slot
+        async with self.semaphore:
+            self.pending += 1
+            try:
+                yield
+            finally:
+                self.pending -= 1
+
+    async def run(self, method: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run method in the thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(method, *args, **kwargs),
+        )
+
+    async def count(
+            self,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            sample_weight: Optional[array_like_1d],
+        ) -> TopConfusion:
+        """Count confusion, coalescing concurrent requests for the same
+            input into a single computation."""
+        # Compute key of request
+        key = await self.run(fingerprint, y_true, y_pred, sample_weight)
+
+        # Join computation of concurrent request, if any
+        task = self.inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        # Otherwise start computation, which continues for other requests
+        # even if this request is cancelled
+        else:
+            task = asyncio.ensure_future(
+                self.compute(key, y_true, y_pred, sample_weight)
+            )
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+
+        # Return result
+        return await asyncio.shield(task)
+
+    async def compute(
+            self,
+            key          : str,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            sample_weight: Optional[array_like_1d],
+        ) -> TopConfusion:
+        """Count confusion in the thread pool, using the cache if given."""
+        # Look up counts in cache, if given
+        if self.cache is not None:
+            result = await self.run(self.cache.get, key)
+            if result is not None: return result
+
+        # Count confusion
+        result = await self.run(
+            TopConfusion.from_predictions,
+            y_true        = y_true,
+            y_pred        = y_pred,
+            sample_weight = sample_weight,
+        )
+        self.computed += 1
+
+        # Store counts in cache, if given
+        if self.cache is not None:
+            await self.run(self.cache.put, key, result)
+
+        # Return result
+        return result
+
+
+################################################################################
+#                                   Functions                                  #
+################################################################################
+
+# Evaluator used by atop_classification_report, created on first use
+DEFAULT: Optional[AsyncEvaluator] = None
+
+async def atop_classification_report(
+        y_true       : array_like_1d,
+        y_pred       : array_like_2d,
+        labels       : Optional[array_like_1d] = None,
+        target_names : Optional[List[str]] = None,
+        sample_weight: Optional[array_like_1d] = None,
+        digits       : int = 2,
+        output_dict  : bool = False,
+        zero_division: Literal["warn", 0, 1] = "warn",
+        observed_only: bool = False,
+        n_worst      : Optional[int] = None,
+        evaluator    : Optional[AsyncEvaluator] = None,
+    ) -> Union[str, dict]:
+    """Asynchronous version of
+        :py:meth:`toppred.metrics.top_classification_report`, which evaluates
+        the report in a thread pool without blocking the event loop.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            Ground truth (correct) target values.
+
+        y_pred : array_like_2d of shape=(n_samples, n_predictions)
+            Estimated targets as returned by a classifier. Each column
+            y_pred[:, i] indicates the i-th most likely prediction (0-indexed)
+            for the given sample.
+
+        labels : Optional[array_like_1d], default = None
+            Optional list of label indices to include in the report.
+
+        target_names : Optional[List[str]] = None
+            Optional display names matching the labels (same order).
+
+        sample_weight : Optional[array_like_1d], default = None
+            Sample weights.
+
+        digits : int, default = 2
+            Number of digits for formatting output floating point values. When
+            ``output_dict`` is ``True``, this will be ignored and the returned
+            values will not be rounded.
+
+        output_dict : bool, default = False
+            If True, return output as dict.
+
+        zero_division : Union[Literal["warn"], 0, 1], default = "warn"
+            Sets the value to return when there is a zero division. If set to
+            “warn”, this acts as 0, but warnings are also raised.
+
+        observed_only : bool, default = False
+            If True, only report labels that occur in y_true or in the top
+            prediction.
+
+        n_worst : Optional[int], default = None
+            If given, only report the n_worst labels with the lowest F1-score
+            per top prediction.
+
+        evaluator : Optional[AsyncEvaluator], default = None
+            Evaluator processing the request. If None, a shared evaluator
+            using all processors is used.
+
+        Returns
+        -------
+        report : Union[str, dict]
+            Text summary of the precision, recall, F1 score for each class.
+            Dictionary returned if output_dict is True.
+        """
+    global DEFAULT
+    if evaluator is None:
+        if DEFAULT is None: DEFAULT = AsyncEvaluator(max_workers=-1)
+        evaluator = DEFAULT
+    return await evaluator.report(
+        y_true        = y_true,
+        y_pred        = y_pred,
+        labels        = labels,
+        target_names  = target_names,
+        sample_weight = sample_weight,
+        digits        = digits,
+        output_dict   = output_dict,
+        zero_division = zero_division,
+        observed_only = observed_only,
+        n_worst       = n_worst,
+    )
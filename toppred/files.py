@@ -0,0 +1,452 @@
+# Imports
+import csv
+import numpy as np
+import os
+from toppred.encoding import optional_import
+from typing import Iterator, List, Optional, Tuple, Union
+
+# Sources can be arrays, including memory-mapped arrays, or paths to files
+source = Union[str, os.PathLike, np.ndarray]
+
+# File extensions per supported format
+FORMATS = {
+    '.csv'    : 'csv',
+    '.npy'    : 'npy',
+    '.parquet': 'parquet',
+    '.pq'     : 'parquet',
+    '.arrow'  : 'arrow',
+    '.feather': 'arrow',
+    '.ipc'    : 'arrow',
+}
+
+def read_blocks(
+        y_true       : source,
+        y_pred       : source,
+        sample_weight: Optional[source] = None,
+        block_size   : int = 65536,
+        n_predictions: Optional[int] = None,
+        dtype        : Optional[np.dtype] = None,
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]:
+    """Iterate over y_true, y_pred and sample_weight in blocks of rows without
+        loading them into memory at once.
+
+        Sources may be arrays, memory-mapped arrays or paths to ``.npy``,
+        ``.csv``, Parquet (``.parquet``, ``.pq``) or Arrow IPC (``.arrow``,
+        ``.feather``, ``.ipc``) files. ``.npy`` files are memory-mapped and
+        Arrow IPC files are read through a memory map, such that blocks are
+        views of the file rather than copies. CSV files should start with a
+        header row and are parsed block by block. Parquet and Arrow files
+        require pyarrow. The blocks can be passed directly to
+        :py:meth:`toppred.streaming.TopAccumulator.update`.
+
+        Example
+        -------
+        >>> accumulator = TopAccumulator()
+        >>> for block in read_blocks(
+        ...         'y_true.npy', 'y_pred.parquet', n_predictions=5,
+        ...     ):
+        ...     accumulator.update(*block)
+        >>> print(accumulator.report())
+
+        Parameters
+        ----------
+        y_true : source of shape=(n_samples,)
+            True labels, as array or path. Files should contain a single
+            column.
+
+        y_pred : source of shape=(n_samples, n_predictions)
+            Predicted labels, as array or path. Columnar files should either
+            contain one column per top prediction, ordered from most to least
+            likely, or a single column of fixed size lists.
+
+        sample_weight : Optional[source] of shape=(n_samples,), default = None
+            Optional sample weights, as array or path.
+
+        block_size : int, default = 65536
+            Number of rows per block, the last block may be smaller.
+
+        n_predictions : Optional[int], default = None
+            If given, only read the first n_predictions columns of y_pred.
+            For Parquet files, other columns are not read from disk at all.
+
+        dtype : Optional[np.dtype], default = None
+            If given, integer labels are narrowed to this dtype, e.g.,
+            ``np.int32``. Raises a ValueError if labels do not fit in dtype.
+
+        Yields
+        ------
+        y_true : np.ndarray of shape=(n_block,)
+            True labels of block.
+
+        y_pred : np.ndarray of shape=(n_block, n_predictions)
+            Predicted labels of block.
+
+        sample_weight : Optional[np.ndarray] of shape=(n_block,)
+            Sample weights of block, None if no sample weights were given.
+        """
+    # Check block size
+    if block_size < 1:
+        raise ValueError(f"block_size should be >= 1, but was {block_size}.")
+
+    # Open sources as iterators over blocks of exactly block_size rows
+    sources = [
+        rechunk(iter_source(y_true, block_size), block_size),
+        rechunk(iter_source(y_pred, block_size, n_predictions), block_size),
+    ]
+    if sample_weight is not None:
+        sources.append(rechunk(
+            iter_source(sample_weight, block_size), block_size,
+        ))
+
+    # Iterate over aligned blocks
+    while True:
+        blocks = [next(iterator, None) for iterator in sources]
+
+        # Stop if all sources are exhausted
+        if all(block is None for block in blocks): return
+
+        # Check if sources have the same number of rows
+        if any(block is None for block in blocks) or len(set(
+                block.shape[0] for block in blocks
+            )) != 1:
+            raise ValueError(
+                "y_true, y_pred and sample_weight should contain the same "
+                "number of samples."
+            )
+
+        # Yield blocks with narrowed labels, a single prediction column is
+        # read as 1-D array by columnar formats
+        yield (
+            narrow(blocks[0], dtype),
+            narrow(blocks[1].reshape(blocks[1].shape[0], -1), dtype),
+            blocks[2] if sample_weight is not None else None,
+        )
+
+
+def iter_source(
+        source       : source,
+        block_size   : int,
+        n_predictions: Optional[int] = None,
+    ) -> Iterator[np.ndarray]:
+    """Iterate over blocks of at most block_size rows of a source.
+
+        Parameters
+        ----------
+        source : source
+            Array or path to read from, see :py:meth:`read_blocks`.
+
+        block_size : int
+            Maximum number of rows per block.
+
+        n_predictions : Optional[int], default = None
+            If given, only read the first n_predictions columns.
+
+        Yields
+        ------
+        block : np.ndarray
+            Block of rows, may be smaller than block_size.
+        """
+    # Read arrays and .npy files as (memory-mapped) arrays
+    if not isinstance(source, (str, os.PathLike)):
+        array = np.asarray(source)
+    elif file_format(source) == 'npy':
+        array = np.load(source, mmap_mode='r')
+    # Parse CSV files per block
+    elif file_format(source) == 'csv':
+        yield from iter_csv(source, block_size, n_predictions)
+        return
+    # Read columnar files per record batch
+    else:
+        yield from iter_columnar(source, block_size, n_predictions)
+        return
+
+    # Select first n_predictions columns, this is a view
+    if n_predictions is not None and array.ndim == 2:
+        array = array[:, :n_predictions]
+
+    # Yield views of array
+    for start in range(0, array.shape[0], block_size):
+        yield array[start:start+block_size]
+
+
+def iter_columnar(
+        path         : Union[str, os.PathLike],
+        block_size   : int,
+        n_predictions: Optional[int] = None,
+    ) -> Iterator[np.ndarray]:
+    """Iterate over blocks of a Parquet or Arrow IPC file using pyarrow.
+
+        Parameters
+        ----------
+        path : Union[str, os.PathLike]
+            Path to Parquet or Arrow IPC file.
+
+        block_size : int
+            Maximum number of rows per block.
+
+        n_predictions : Optional[int], default = None
+            If given, only read the first n_predictions columns.
+
+        Yields
+        ------
+        block : np.ndarray
+            Block of rows, may be smaller than block_size.
+        """
+    # Import pyarrow lazily
+    pa = optional_import('pyarrow')
+    if pa is None:
+        raise ImportError(
+            f"Reading '{path}' requires pyarrow, please install it using "
+            "'pip install pyarrow'."
+        )
+
+    # Read Parquet file, only the selected columns are read from disk
+    if file_format(path) == 'parquet':
+        import pyarrow.parquet
+        reader  = pa.parquet.ParquetFile(path)
+        columns = reader.schema_arrow.names[:n_predictions]
+        batches = reader.iter_batches(batch_size=block_size, columns=columns)
+
+    # Read Arrow IPC file through a memory map
+    else:
+        reader  = pa.ipc.open_file(pa.memory_map(os.fspath(path), 'r'))
+        columns = reader.schema.names[:n_predictions]
+        batches = (
+            reader.get_batch(i).select(columns)
+            for i in range(reader.num_record_batches)
+        )
+
+    # Yield batches as arrays, split into blocks of at most block_size rows
+    for batch in batches:
+        for start in range(0, batch.num_rows, block_size):
+            yield batch2array(batch.slice(start, block_size), n_predictions)
+
+
+def iter_csv(
+        path         : Union[str, os.PathLike],
+        block_size   : int,
+        n_predictions: Optional[int] = None,
+    ) -> Iterator[np.ndarray]:
+    """Iterate over blocks of a CSV file with a header row. Values are parsed
+        as integers if possible, otherwise as floats, otherwise as strings.
+        The type is determined from all values of the file in a first pass
+        over its blocks, such that all blocks share the same type.
+
+        Parameters
+        ----------
+        path : Union[str, os.PathLike]
+            Path to CSV file.
+
+        block_size : int
+            Maximum number of rows per block.
+
+        n_predictions : Optional[int], default = None
+            If given, only parse the first n_predictions columns.
+
+        Yields
+        ------
+        block : np.ndarray
+            Block of rows, 1-D if the file contains a single column.
+        """
+    # Determine type of values from all blocks, stop once values are strings
+    dtype = np.int64
+    for block in iter_csv_rows(path, block_size, n_predictions):
+        dtype = csv_dtype(block, dtype)
+        if dtype is str: break
+
+    # Parse blocks with the type of all values
+    for block in iter_csv_rows(path, block_size, n_predictions):
+        block = block.astype(dtype)
+        yield block[:, 0] if block.shape[1] == 1 else block
+
+
+def iter_csv_rows(
+        path         : Union[str, os.PathLike],
+        block_size   : int,
+        n_predictions: Optional[int] = None,
+    ) -> Iterator[np.ndarray]:
+    """Iterate over blocks of unparsed rows of a CSV file, see
+        :py:meth:`iter_csv`. Empty lines are skipped, all other rows should
+        have the same number of columns."""
+    with open(path, newline='') as infile:
+        reader = csv.reader(infile)
+
+        # Skip header
+        next(reader, None)
+
+        # Read rows per block
+        rows  = list()
+        width = None
+        for row in reader:
+            # Skip empty lines and check number of columns
+            if not row: continue
+            if width is None: width = len(row)
+            if len(row) != width:
+                raise ValueError(
+                    f"Line {reader.line_num} of '{path}' contains {len(row)} "
+                    f"columns, but previous rows contain {width} columns."
+                )
+
+            # Yield full blocks
+            rows.append(row)
+            if len(rows) == block_size:
+                yield np.asarray(rows)[:, :n_predictions]
+                rows = list()
+
+        # Yield last block
+        if rows:
+            yield np.asarray(rows)[:, :n_predictions]
+
+
+def csv_dtype(block: np.ndarray, dtype: type = np.int64) -> type:
+    """Get the narrowest of int, float or str, starting from dtype, that can
+        represent all values of a block of CSV strings."""
+    dtypes = [np.int64, np.float64, str]
+    for candidate in dtypes[dtypes.index(dtype):-1]:
+        try:
+            block.astype(candidate)
+            return candidate
+        except ValueError:
+            pass
+    return str
+
+
+def batch2array(batch, n_predictions: Optional[int] = None) -> np.ndarray:
+    """Convert a pyarrow RecordBatch to a numpy array.
+
+        Parameters
+        ----------
+        batch : pyarrow.RecordBatch
+            Batch to convert, containing either a single column, a single
+            column of fixed size lists, or one column per top prediction.
+
+        n_predictions : Optional[int], default = None
+            If given, only convert the first n_predictions list elements.
+
+        Returns
+        -------
+        array : np.ndarray of shape=(n_rows,) or (n_rows, n_columns)
+            Converted batch. A single column without nulls is converted
+            without copying if its type allows it.
+        """
+    # Convert single column
+    if batch.num_columns == 1:
+        column = batch.column(0)
+
+        # Convert fixed size list column to 2-D array
+        if hasattr(column.type, 'list_size'):
+            values = column.flatten().to_numpy(zero_copy_only=False)
+            return values.reshape(batch.num_rows, -1)[:, :n_predictions]
+
+        # Convert single column to 1-D array
+        return column.to_numpy(zero_copy_only=False)
+
+    # Convert multiple columns to 2-D array
+    return np.column_stack([
+        column.to_numpy(zero_copy_only=False) for column in batch.columns
+    ])
+
+
+def rechunk(
+        blocks    : Iterator[np.ndarray],
+        block_size: int,
+    ) -> Iterator[np.ndarray]:
+    """Regroup blocks of arbitrary size into blocks of exactly block_size
+        rows, except for the last block. Blocks that already have the correct
+        size are yielded without copying.
+
+        Parameters
+        ----------
+        blocks : Iterator[np.ndarray]
+            Blocks of at most block_size rows.
+
+        block_size : int
+            Number of rows per yielded block.
+
+        Yields
+        ------
+        block : np.ndarray
+            Block of block_size rows.
+        """
+    # Initialise buffer of partial blocks
+    buffer: List[np.ndarray] = list()
+    n_buffered = 0
+
+    for block in blocks:
+        # Yield block directly, if possible
+        if n_buffered == 0 and block.shape[0] == block_size:
+            yield block
+            continue
+
+        # Otherwise add block to buffer
+        buffer.append(block)
+        n_buffered += block.shape[0]
+
+        # Yield full blocks from buffer
+        if n_buffered >= block_size:
+            merged = np.concatenate(buffer)
+            for start in range(0, merged.shape[0] - block_size + 1, block_size):
+                yield merged[start:start+block_size]
+            remainder  = merged[merged.shape[0] - merged.shape[0] % block_size:]
+            buffer     = [remainder] if remainder.shape[0] else list()
+            n_buffered = remainder.shape[0]
+
+    # Yield remaining rows
+    if n_buffered:
+        yield np.concatenate(buffer)
+
+
+def narrow(array: np.ndarray, dtype: Optional[np.dtype] = None) -> np.ndarray:
+    """Narrow integer labels to the given dtype.
+
+        Parameters
+        ----------
+        array : np.ndarray
+            Labels to narrow.
+
+        dtype : Optional[np.dtype], default = None
+            Integer dtype to narrow labels to. If None, or if labels are not
+            integers, labels are returned as is.
+
+        Returns
+        -------
+        array : np.ndarray
+            Labels of given dtype.
+        """
+    # Only narrow integer labels
+    if dtype is None or array.dtype.kind not in 'iu': return array
+    dtype = np.dtype(dtype)
+
+    # Check if labels fit in dtype
+    if array.size:
+        info = np.iinfo(dtype)
+        if array.min() < info.min or array.max() > info.max:
+            raise ValueError(
+                f"Labels in range [{array.min()}, {array.max()}] do not fit "
+                f"in dtype {dtype}."
+            )
+
+    # Return narrowed labels
+    return array.astype(dtype, copy=False)
+
+
+def file_format(path: Union[str, os.PathLike]) -> str:
+    """Get the format of a file from its extension.
+
+        Parameters
+        ----------
+        path : Union[str, os.PathLike]
+            Path of file.
+
+        Returns
+        -------
+        format : str
+            Format of file, one of 'csv', 'npy', 'parquet' or 'arrow'.
+        """
+    extension = os.path.splitext(os.fspath(path))[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(
+            f"Unsupported file format '{extension}', supported formats are: "
+            f"{', '.join(sorted(FORMATS))}."
+        )
+    return FORMATS[extension]
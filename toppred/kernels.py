@@ -0,0 +1,105 @@
+# Imports
+import functools
+import numpy as np
+import os
+from types import SimpleNamespace
+from typing import Literal, Optional
+
+################################################################################
+#                                   Backend                                    #
+################################################################################
+
+# Backend used for row-wise kernels, see set_backend
+BACKEND = os.environ.get('TOPPRED_BACKEND', 'auto')
+
+# Minimum number of predictions for which "auto" uses compiled kernels
+MIN_SIZE = 2**16
+
+def set_backend(backend: Literal["auto", "numba", "numpy"]) -> None:
+    """Select the implementation of row-wise kernels over y_pred.
+
+        Parameters
+        ----------
+        backend : Literal["auto", "numba", "numpy"]
+            Backend to use. "numba" always uses compiled kernels if Numba is
+            installed, "numpy" always uses vectorized NumPy and "auto" uses
+            compiled kernels for inputs of at least ``MIN_SIZE`` predictions if
+            Numba is installed. The default can be set with the
+            ``TOPPRED_BACKEND`` environment variable.
+        """
+    global BACKEND
+    if backend not in ("auto", "numba", "numpy"):
+        raise ValueError(
+            f"backend should be 'auto', 'numba' or 'numpy', but was "
+            f"'{backend}'."
+        )
+    BACKEND = backend
+
+
+def kernels(*arrays: np.ndarray) -> Optional[SimpleNamespace]:
+    """Get compiled kernels if they should be used for the given arrays.
+
+        Parameters
+        ----------
+        *arrays : np.ndarray
+            Arrays passed to the kernel, the first array being y_pred.
+
+        Returns
+        -------
+        kernels : Optional[SimpleNamespace]
+            Compiled kernels, None if the NumPy implementation should be used,
+            i.e., if Numba is not installed, the backend is "numpy", arrays are
+            not numeric, or the backend is "auto" and arrays are small.
+        """
+    if BACKEND == "numpy": return None
+    if BACKEND == "auto" and arrays[0].size < MIN_SIZE: return None
+    if any(array.dtype.kind not in 'biuf' for array in arrays): return None
+    return compile_kernels()
+
+
+@functools.lru_cache(maxsize=None)
+def compile_kernels() -> Optional[SimpleNamespace]:
+    """Compile kernels on first use, such that Numba is only imported if it is
+        needed. Returns None if Numba is not installed."""
+    from toppred.encoding import optional_import
+    numba = optional_import('numba')
+    if numba is None: return None
+
+    @numba.njit(nogil=True, cache=True)
+    def hit_ranks(y_true, y_pred, ranks):
+        """Write rank of first column of y_pred equal to y_true into ranks."""
+        n_samples, n_predictions = y_pred.shape
+        for sample in range(n_samples):
+            rank = n_predictions
+            for column in range(n_predictions):
+                if y_pred[sample, column] == y_true[sample]:
+                    rank = column
+                    break
+            ranks[sample] = rank
+
+    @numba.njit(nogil=True, cache=True)
+    def top_column(y_true, column, out):
+        """Write column into out where it equals y_true."""
+        for sample in range(column.shape[0]):
+            if column[sample] == y_true[sample]:
+                out[sample] = column[sample]
+
+    @numba.njit(nogil=True, cache=True)
+    def top_predictions(y_true, y_pred, out):
+        """Write predictions of all top predictions into out."""
+        n_samples, n_predictions = y_pred.shape
+        for sample in range(n_samples):
+            prediction = y_pred[sample, 0]
+            for column in range(n_predictions):
+                if y_pred[sample, column] == y_true[sample]:
+                    prediction = y_pred[sample, column]
+                    for rest in range(column, n_predictions):
+                        out[sample, rest] = prediction
+                    break
+                out[sample, column] = prediction
+
+    return SimpleNamespace(
+        hit_ranks       = hit_ranks,
+        top_column      = top_column,
+        top_predictions = top_predictions,
+    )
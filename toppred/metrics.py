@@ -1,9 +1,13 @@
 # Imports
-from sklearn.metrics import classification_report
-from toppred.predictions import top_predictions
+import numpy as np
+import warnings
+from toppred.cache import ReportCache
+from toppred.confusion import TopConfusion, check_sample_weight
+from toppred.predictions import check_predictions, hit_ranks
+from toppred.profiling import stage
 from toppred.types import array_like_1d, array_like_2d
 from toppred.utils import reports2string
-from typing import List, Literal, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 
 def top_classification_report(
         y_true       : array_like_1d,
@@ -14,6 +18,10 @@ def top_classification_report(
         digits       : int = 2,
         output_dict  : bool = False,
         zero_division: Literal["warn", 0, 1] = "warn",
+        n_jobs       : Optional[int] = None,
+        observed_only: bool = False,
+        n_worst      : Optional[int] = None,
+        cache        : Optional[ReportCache] = None,
     ) -> Union[str, dict]:
     """Create a classification report for a y_pred containing multiple top
         predictions. This function follows the same API as
@@ -36,7 +44,12 @@ def top_classification_report(
             for the given sample.
 
         labels : Optional[array_like_1d], default = None
-            Optional list of label indices to include in the report.
+            Optional list of label indices to include in the report. The
+            report contains 'accuracy' only if labels are exactly the labels
+            observed in y_true and the top prediction, otherwise it contains
+            'micro avg'. Unlike recent scikit-learn, which reports 'accuracy'
+            whenever labels are a superset of the observed labels, a strict
+            superset also gives 'micro avg'.
 
         target_names : Optional[List[str]] = None
             Optional display names matching the labels (same order).
@@ -55,6 +68,25 @@ def top_classification_report(
         zero_division : Union[Literal["warn"], 0, 1], default = "warn"
             Sets the value to return when there is a zero division. If set to
             “warn”, this acts as 0, but warnings are also raised.
+
+        n_jobs : Optional[int], default = None
+            Number of threads used to count the confusion of all top
+            predictions. None means 1, -1 means all processors.
+
+        observed_only : bool, default = False
+            If True, only report labels that occur in y_true or in the top
+            prediction. Useful when labels contains many more labels than
+            occur in the data. Averages are still computed over all labels.
+
+        n_worst : Optional[int], default = None
+            If given, only report the n_worst labels with the lowest F1-score
+            per top prediction. Averages are still computed over all labels.
+
+        cache : Optional[ReportCache], default = None
+            Optional cache of confusion counts, see
+            :py:class:`toppred.cache.ReportCache`. If y_true, y_pred and
+            sample_weight were counted before, the report is created from
+            the cached counts without recomputing them.
         
         Returns
         -------
@@ -75,24 +107,360 @@ def top_classification_report(
             also known as “sensitivity”; recall of the negative class is
             “specificity”.
         """
-    # Create dictionary_based classification reports for each top prediction
-    reports = [
-        classification_report(
+    with stage('top_classification_report'):
+        # Reject sample weights that are all zero, as scikit-learn does, their
+        # shape is checked against y_true when counting
+        if sample_weight is not None:
+            sample_weight = check_sample_weight(
+                sample_weight, np.size(sample_weight), nonzero=True,
+            )
+
+        # Count confusion of all top predictions in a single pass, only
+        # observed labels are counted, other labels are filled in by the report
+        if cache is None:
+            count = TopConfusion.from_predictions
+        else:
+            count = cache.confusion
+        confusion = count(
             y_true        = y_true,
-            y_pred        = y_pred_,
+            y_pred        = y_pred,
+            sample_weight = sample_weight,
+            n_jobs        = n_jobs,
+        )
+
+        # Create report from confusion counts
+        return top_confusion_report(
+            confusion     = confusion,
             labels        = labels,
             target_names  = target_names,
-            sample_weight = sample_weight,
             digits        = digits,
-            output_dict   = True,
+            output_dict   = output_dict,
+            zero_division = zero_division,
+            observed_only = observed_only,
+            n_worst       = n_worst,
+        )
+
+
+def top_confusion_report(
+        confusion    : TopConfusion,
+        labels       : Optional[array_like_1d] = None,
+        target_names : Optional[List[str]] = None,
+        digits       : int = 2,
+        output_dict  : bool = False,
+        zero_division: Literal["warn", 0, 1] = "warn",
+        observed_only: bool = False,
+        n_worst      : Optional[int] = None,
+    ) -> Union[str, dict]:
+    """Create a classification report from precomputed confusion counts. The
+        output is equal to that of :py:meth:`top_classification_report` for
+        the samples from which the confusion counts were computed.
+
+        Parameters
+        ----------
+        confusion : TopConfusion
+            Confusion counts of all top predictions.
+
+        labels : Optional[array_like_1d], default = None
+            Optional list of label indices to include in the report.
+
+        target_names : Optional[List[str]] = None
+            Optional display names matching the labels (same order).
+
+        digits : int, default = 2
+            Number of digits for formatting output floating point values. When
+            ``output_dict`` is ``True``, this will be ignored and the returned
+            values will not be rounded.
+
+        output_dict : bool, default = False
+            If True, return output as dict.
+
+        zero_division : Union[Literal["warn"], 0, 1], default = "warn"
+            Sets the value to return when there is a zero division. If set to
+            “warn”, this acts as 0, but warnings are also raised.
+
+        observed_only : bool, default = False
+            If True, only report labels that occur in y_true or in the top
+            prediction, see :py:meth:`top_classification_report`.
+
+        n_worst : Optional[int], default = None
+            If given, only report the n_worst labels with the lowest F1-score
+            per top prediction, see :py:meth:`top_classification_report`.
+
+        Returns
+        -------
+        report : Union[str, dict]
+            Text summary of the precision, recall, F1 score for each class.
+            Dictionary returned if output_dict is True.
+        """
+    # Create dictionary_based classification reports for each top prediction
+    with stage('report', tp=confusion.tp, labels=labels):
+        reports = confusion.report(
+            labels        = labels,
+            target_names  = target_names,
             zero_division = zero_division,
+            observed_only = observed_only,
+            n_worst       = n_worst,
         )
-        for _, y_pred_ in top_predictions(y_true=y_true, y_pred=y_pred)
-    ]
 
     # Return report as dictionary, if necessary
     if output_dict:
         return {i: report for i, report in enumerate(reports)}
     # Otherwise return reports as string
     else:
-        return reports2string(reports, digits)
+        with stage('format'):
+            return reports2string(reports, digits)
+
+
+def top_group_report(
+        y_true       : array_like_1d,
+        y_pred       : array_like_2d,
+        groups       : array_like_1d,
+        labels       : Optional[array_like_1d] = None,
+        target_names : Optional[List[str]] = None,
+        sample_weight: Optional[array_like_1d] = None,
+        digits       : int = 2,
+        output_dict  : bool = False,
+        zero_division: Literal["warn", 0, 1] = "warn",
+        observed_only: bool = False,
+        n_worst      : Optional[int] = None,
+    ) -> Dict[object, Union[str, dict]]:
+    """Create a classification report of all top predictions for each group
+        of samples, e.g., per locale or device. The counts of all groups are
+        computed in a single pass, see
+        :py:meth:`toppred.confusion.TopConfusion.from_groups`.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            Ground truth (correct) target values.
+
+        y_pred : array_like_2d of shape=(n_samples, n_predictions)
+            Estimated targets as returned by a classifier.
+
+        groups : array_like_1d of shape=(n_samples,)
+            Group of each sample.
+
+        labels : Optional[array_like_1d], default = None
+            Optional list of label indices to include in each report.
+
+        target_names : Optional[List[str]] = None
+            Optional display names matching the labels (same order).
+
+        sample_weight : Optional[array_like_1d], default = None
+            Sample weights.
+
+        digits : int, default = 2
+            Number of digits for formatting output floating point values.
+
+        output_dict : bool, default = False
+            If True, return the report of each group as dict.
+
+        zero_division : Union[Literal["warn"], 0, 1], default = "warn"
+            Sets the value to return when there is a zero division. If set to
+            “warn”, this acts as 0, but warnings are also raised. Identical
+            warnings of different groups are only raised once.
+
+        observed_only : bool, default = False
+            If True, only report labels that occur in the group.
+
+        n_worst : Optional[int], default = None
+            If given, only report the n_worst labels with the lowest F1-score
+            per top prediction.
+
+        Returns
+        -------
+        reports : Dict[object, Union[str, dict]]
+            Report of each group, equal to
+            :py:meth:`top_classification_report` on the samples of the group.
+            As there, a ValueError is raised if the sample weights of all
+            samples or of the samples of any group sum to zero.
+        """
+    # Reject sample weights that are all zero, as top_classification_report
+    if sample_weight is not None:
+        sample_weight = check_sample_weight(
+            sample_weight, np.size(sample_weight), nonzero=True,
+        )
+
+    # Count confusion of all groups in a single pass
+    confusions = TopConfusion.from_groups(
+        y_true        = y_true,
+        y_pred        = y_pred,
+        groups        = groups,
+        sample_weight = sample_weight,
+    )
+
+    # Reject groups without weight, their report would be undefined
+    for group, confusion in confusions.items():
+        if confusion.weighted and not np.sum(confusion.true):
+            raise ValueError(
+                "Sample weights must contain at least one non-zero number, "
+                f"but the weights of group {group!r} sum to zero."
+            )
+
+    # Create report of each group, recording warnings
+    with warnings.catch_warnings(record=True) as records:
+        warnings.simplefilter('always')
+        reports = {
+            group: top_confusion_report(
+                confusion     = confusion,
+                labels        = labels,
+                target_names  = target_names,
+                digits        = digits,
+                output_dict   = output_dict,
+                zero_division = zero_division,
+                observed_only = observed_only,
+                n_worst       = n_worst,
+            )
+            for group, confusion in confusions.items()
+        }
+
+    # Raise each distinct warning once
+    raised = set()
+    for record in records:
+        key = (record.category, str(record.message))
+        if key not in raised:
+            raised.add(key)
+            warnings.warn(record.message, record.category, stacklevel=2)
+
+    # Return reports
+    return reports
+
+
+def top_accuracy_score(
+        y_true       : array_like_1d,
+        y_pred       : array_like_2d,
+        sample_weight: Optional[array_like_1d] = None,
+        chunk_size   : int = 65536,
+    ) -> np.ndarray:
+    """Compute the accuracy (hit rate) of all top predictions at once, i.e., the
+        (weighted) fraction of samples for which y_true occurs in the top i
+        predictions. This is much cheaper than
+        :py:meth:`top_classification_report` as it does not compute any
+        per-class metrics.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            Ground truth (correct) target values.
+
+        y_pred : array_like_2d of shape=(n_samples, n_predictions)
+            Estimated targets as returned by a classifier. Each column
+            y_pred[:, i] indicates the i-th most likely prediction (0-indexed)
+            for the given sample.
+
+        sample_weight : Optional[array_like_1d], default = None
+            Sample weights.
+
+        chunk_size : int, default = 65536
+            Number of samples processed at once, bounds the memory used for
+            temporary arrays to O(chunk_size x n_predictions).
+
+        Returns
+        -------
+        accuracy : np.ndarray of shape=(n_predictions,)
+            Accuracy of each top prediction (0-indexed). Returns nan if the
+            total sample weight is zero.
+        """
+    # Count ranks of first correct prediction
+    counts = rank_counts(y_true, y_pred, sample_weight, chunk_size)
+
+    # Compute cumulative hit rate
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.cumsum(counts[:-1]) / np.sum(counts)
+
+
+def mean_reciprocal_rank(
+        y_true       : array_like_1d,
+        y_pred       : array_like_2d,
+        sample_weight: Optional[array_like_1d] = None,
+        chunk_size   : int = 65536,
+    ) -> float:
+    """Compute the (weighted) mean reciprocal rank of y_true in y_pred. Samples
+        for which y_true does not occur in y_pred have a reciprocal rank of 0.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            Ground truth (correct) target values.
+
+        y_pred : array_like_2d of shape=(n_samples, n_predictions)
+            Estimated targets as returned by a classifier. Each column
+            y_pred[:, i] indicates the i-th most likely prediction (0-indexed)
+            for the given sample.
+
+        sample_weight : Optional[array_like_1d], default = None
+            Sample weights.
+
+        chunk_size : int, default = 65536
+            Number of samples processed at once, bounds the memory used for
+            temporary arrays to O(chunk_size x n_predictions).
+
+        Returns
+        -------
+        mrr : float
+            Mean reciprocal rank. Returns nan if the total sample weight is
+            zero.
+        """
+    # Count ranks of first correct prediction
+    counts = rank_counts(y_true, y_pred, sample_weight, chunk_size)
+
+    # Compute mean reciprocal rank
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return float(
+            np.sum(counts[:-1] / np.arange(1, counts.shape[0])) / np.sum(counts)
+        )
+
+
+def rank_counts(
+        y_true       : array_like_1d,
+        y_pred       : array_like_2d,
+        sample_weight: Optional[array_like_1d] = None,
+        chunk_size   : int = 65536,
+    ) -> np.ndarray:
+    """Count the (weighted) number of samples per rank at which y_true first
+        occurs in y_pred, see :py:meth:`toppred.predictions.hit_ranks`.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            Ground truth (correct) target values.
+
+        y_pred : array_like_2d of shape=(n_samples, n_predictions)
+            Estimated targets as returned by a classifier.
+
+        sample_weight : Optional[array_like_1d], default = None
+            Sample weights.
+
+        chunk_size : int, default = 65536
+            Number of samples processed at once.
+
+        Returns
+        -------
+        counts : np.ndarray of shape=(n_predictions+1,)
+            (Weighted) number of samples per rank, where the last entry counts
+            the samples for which y_true does not occur in y_pred.
+        """
+    # Cast and check input
+    y_true, y_pred = check_predictions(y_true, y_pred)
+    n_samples, n_predictions = y_pred.shape
+    sample_weight = check_sample_weight(sample_weight, n_samples)
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size should be >= 1, but was {chunk_size}.")
+
+    # Initialise counts
+    counts = np.zeros(n_predictions + 1, dtype=(
+        np.int64 if sample_weight is None else np.float64
+    ))
+
+    # Count ranks per chunk
+    for start in range(0, n_samples, chunk_size):
+        end = start + chunk_size
+        counts += np.bincount(
+            hit_ranks(y_true[start:end], y_pred[start:end]),
+            weights   = None if sample_weight is None else
+                        sample_weight[start:end],
+            minlength = n_predictions + 1,
+        ).astype(counts.dtype, copy=False)
+
+    # Return counts
+    return counts
@@ -1,13 +1,30 @@
-from typing import Iterable
+from typing import Iterable, Optional, Tuple
+import numbers
 import numpy as np
+from toppred.kernels import kernels
 from toppred.types import array_like_1d, array_like_2d
 
+# Number of samples processed at once when temporary masks are required
+CHUNK_SIZE = 2**16
+
+# Types of numeric labels
+NUMBERS = (numbers.Number, np.number, np.bool_)
+
 def top_predictions(
         y_true: array_like_1d,
         y_pred: array_like_2d,
+        out   : Optional[np.ndarray] = None,
     ) -> Iterable[np.ndarray]:
     """Iterates over the top predictions.
 
+        Note
+        ----
+        The input y_pred is never modified. Instead, all yielded predictions
+        are written into the same output buffer, which is updated in place
+        for each top prediction. Therefore, use ``prediction.copy()`` if you
+        want to keep the prediction of a top i after the next iteration, or
+        use :py:meth:`top_predictions_array` to obtain all predictions at once.
+
         Parameters
         ----------
         y_true : array_like_1d of shape=(n_samples,)
@@ -17,6 +34,10 @@ def top_predictions(
             Predicted labels for samples. Each column y_pred[:, i] indicates the
             i-th most likely prediction (0-indexed) for the given sample.
 
+        out : Optional[np.ndarray] of shape=(n_samples,), default = None
+            Optional output buffer into which predictions are written. If None,
+            a new buffer with the dtype of y_pred is allocated.
+
         Yields
         ------
         i : int
@@ -26,6 +47,177 @@ def top_predictions(
             Prediction if the correct answer would be in the top i most likely 
             predictions (0-indexed).
         """
+    # Cast and check input
+    y_true, y_pred = check_predictions(y_true, y_pred)
+
+    # Initialise result
+    result = check_out(out, y_pred.shape[:1], y_pred.dtype)
+    result[...] = y_pred[:, 0]
+
+    # Use compiled kernel updating result without boolean masks, if available
+    compiled = kernels(y_pred, y_true, result)
+    if compiled is not None:
+        for top in range(y_pred.shape[1]):
+            compiled.top_column(y_true, y_pred[:, top], result)
+            yield top, result
+        return
+
+    # Loop over top predictions
+    for top in range(y_pred.shape[1]):
+        # Get correct prediction mask
+        correct = y_pred[:, top] == y_true
+
+        # Adjust correct predictions
+        result[correct] = y_pred[correct, top]
+
+        # Yield result
+        yield top, result
+
+
+def top_predictions_array(
+        y_true: array_like_1d,
+        y_pred: array_like_2d,
+        out   : Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+    """Compute the predictions of all top predictions at once.
+
+        Column i of the result is equal to the y_pred yielded by
+        :py:meth:`top_predictions` for the i-th top prediction. Instead of
+        masking each column separately, the result is computed in a single
+        vectorized pass from the rank at which y_true first occurs in y_pred.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            True labels corresponding to samples.
+
+        y_pred : array_like_2d of shape=(n_samples, n_predictions)
+            Predicted labels for samples. Each column y_pred[:, i] indicates the
+            i-th most likely prediction (0-indexed) for the given sample.
+
+        out : Optional[np.ndarray] of shape=(n_samples, n_predictions)
+            Optional output buffer into which predictions are written. If None,
+            a new array with the dtype of y_pred is allocated.
+
+        Returns
+        -------
+        result : np.ndarray of shape=(n_samples, n_predictions)
+            Prediction if the correct answer would be in the top i most likely
+            predictions (0-indexed) for each column i.
+        """
+    # Cast and check input
+    y_true, y_pred = check_predictions(y_true, y_pred)
+    n_samples, n_predictions = y_pred.shape
+    result = check_out(out, y_pred.shape, y_pred.dtype)
+
+    # Use compiled row-wise kernel, if available
+    compiled = kernels(y_pred, y_true, result)
+    if compiled is not None:
+        compiled.top_predictions(y_true, y_pred, result)
+        return result
+
+    # Compute rank of first correct prediction
+    ranks = hit_ranks(y_true, y_pred)
+
+    # Samples are correct from their rank onwards, otherwise y_pred[:, 0],
+    # computed per chunk to bound the size of temporary masks
+    for start in range(0, n_samples, CHUNK_SIZE):
+        end     = start + CHUNK_SIZE
+        rank    = ranks[start:end]
+        correct = y_pred[start:end][
+            np.arange(rank.shape[0]), np.minimum(rank, n_predictions-1)
+        ]
+        np.copyto(result[start:end], y_pred[start:end, :1])
+        np.copyto(
+            result[start:end],
+            correct[:, None],
+            where = rank[:, None] <= np.arange(n_predictions),
+        )
+
+    # Return result
+    return result
+
+
+def hit_ranks(
+        y_true: array_like_1d,
+        y_pred: array_like_2d,
+    ) -> np.ndarray:
+    """Compute the rank at which the true label first occurs in y_pred.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            True labels corresponding to samples.
+
+        y_pred : array_like_2d of shape=(n_samples, n_predictions)
+            Predicted labels for samples. Each column y_pred[:, i] indicates the
+            i-th most likely prediction (0-indexed) for the given sample.
+
+        Returns
+        -------
+        ranks : np.ndarray of shape=(n_samples,)
+            0-indexed column of y_pred in which y_true first occurs. If y_true
+            does not occur in y_pred, the rank is set to n_predictions. Ranks
+            are stored in the smallest unsigned dtype, see
+            :py:meth:`rank_dtype`.
+        """
+    # Cast and check input
+    y_true, y_pred = check_predictions(y_true, y_pred)
+    n_samples, n_predictions = y_pred.shape
+    ranks = np.empty(n_samples, dtype=rank_dtype(n_predictions))
+
+    # Use compiled row-wise kernel, if available
+    compiled = kernels(y_pred, y_true)
+    if compiled is not None:
+        compiled.hit_ranks(y_true, y_pred, ranks)
+        return ranks
+
+    # Find first column containing the true label, per chunk of samples such
+    # that the boolean mask contains at most CHUNK_SIZE x n_predictions values
+    for start in range(0, n_samples, CHUNK_SIZE):
+        end  = start + CHUNK_SIZE
+        hits = y_pred[start:end] == y_true[start:end, None]
+        rank = np.argmax(hits, axis=1)
+
+        # Set rank of samples without hit to n_predictions
+        rank[~hits[np.arange(rank.shape[0]), rank]] = n_predictions
+        ranks[start:end] = rank
+
+    # Return ranks
+    return ranks
+
+
+def rank_dtype(n_predictions: int) -> np.dtype:
+    """Get the smallest unsigned dtype that can store ranks 0 to
+        n_predictions, i.e., uint8 for up to 255 top predictions."""
+    return np.min_scalar_type(n_predictions)
+
+
+def check_predictions(
+        y_true: array_like_1d,
+        y_pred: array_like_2d,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Cast y_true and y_pred to numpy arrays and check their shapes and
+        labels. As in scikit-learn, labels should not be NaN or infinite and
+        should either all be strings or all be numbers.
+
+        Parameters
+        ----------
+        y_true : array_like_1d of shape=(n_samples,)
+            True labels corresponding to samples.
+
+        y_pred : array_like_2d of shape=(n_samples, n_predictions)
+            Predicted labels for samples. Each column y_pred[:, i] indicates the
+            i-th most likely prediction (0-indexed) for the given sample.
+
+        Returns
+        -------
+        y_true : np.ndarray of shape=(n_samples,)
+            True labels cast to a numpy array.
+
+        y_pred : np.ndarray of shape=(n_samples, n_predictions)
+            Predicted labels cast to a numpy array.
+        """
     # Cast input to numpy arrays
     y_true = np.asarray(y_true)
     y_pred = np.asarray(y_pred)
@@ -49,16 +241,205 @@ def top_predictions(
             "sure that y_pred is in the shape of (n_samples, n_predictions)."
         )
 
-    # Initialise result
-    result = y_pred[:, 0]
+    # Check labels
+    kinds = {label_kind(y_true, 'y_true'), label_kind(y_pred, 'y_pred')}
+    if {'string', 'number'} <= kinds:
+        raise ValueError(
+            "Mix of label input types (string and number) in y_true "
+            f"({y_true.dtype}) and y_pred ({y_pred.dtype})."
+        )
 
-    # Loop over top predictions
-    for top in range(y_pred.shape[1]):
-        # Get correct prediction mask
-        correct = y_pred[:, top] == y_true
+    # Return checked input
+    return y_true, y_pred
 
-        # Adjust correct predictions
-        result[correct] = y_pred[correct, top]
 
-        # Yield result
-        yield top, result
+def label_kind(labels: np.ndarray, name: str) -> Optional[str]:
+    """Check whether labels are finite whole numbers or strings and get
+        their kind. As in scikit-learn, float labels that are not whole
+        numbers are continuous targets, which are not supported.
+
+        Parameters
+        ----------
+        labels : np.ndarray
+            Labels to check.
+
+        name : str
+            Name of labels used in error messages.
+
+        Returns
+        -------
+        kind : Optional[str]
+            'string' if all labels are strings, 'number' if all labels are
+            numbers, None if labels are empty or of another type.
+        """
+    # Get kind from dtype
+    if labels.dtype.kind in 'US': return 'string'
+    if labels.dtype.kind in 'biuc': return 'number'
+    if labels.size == 0: return None
+
+    # Floats should be finite, NaN propagates through min and max
+    if labels.dtype.kind == 'f':
+        check_finite(labels, name)
+        check_integral(labels, name)
+        return 'number'
+
+    # Other labels, e.g., objects, are checked per type
+    if labels.dtype != object: return None
+    types   = set(map(type, labels.ravel()))
+    strings = {kind for kind in types if issubclass(kind, str)}
+    numbers = {kind for kind in types if issubclass(kind, NUMBERS)}
+    if strings and numbers:
+        raise ValueError(
+            f"Mix of label input types (string and number) in {name}."
+        )
+    if any(issubclass(kind, (float, np.floating)) for kind in numbers):
+        values = labels.ravel()
+        mask   = np.fromiter(
+            (isinstance(value, (float, np.floating)) for value in values),
+            dtype = bool,
+            count = values.shape[0],
+        )
+        check_finite  (values[mask].astype(np.float64), name)
+        check_integral(values[mask].astype(np.float64), name)
+
+    # Return kind
+    if types == strings: return 'string'
+    if types == numbers: return 'number'
+    return None
+
+
+def check_finite(values: np.ndarray, name: str) -> None:
+    """Raise a ValueError if non-empty float values contain NaN or infinity."""
+    minimum, maximum = values.min(), values.max()
+    if np.isnan(minimum) or np.isnan(maximum):
+        raise ValueError(f"Input {name} contains NaN.")
+    if not np.isfinite(minimum) or not np.isfinite(maximum):
+        raise ValueError(f"Input {name} contains infinity.")
+
+
+def check_integral(values: np.ndarray, name: str) -> None:
+    """Raise a ValueError if finite float values are not whole numbers,
+        checked per chunk to bound the size of temporary masks."""
+    for start in range(0, values.shape[0], CHUNK_SIZE):
+        chunk = values[start:start+CHUNK_SIZE]
+        if np.any(chunk != np.floor(chunk)):
+            raise ValueError(
+                f"Input {name} contains values that are not whole numbers, "
+                "continuous is not supported."
+            )
+
+
+def check_out(
+        out  : Optional[np.ndarray],
+        shape: Tuple[int, ...],
+        dtype: np.dtype,
+    ) -> np.ndarray:
+    """Check or allocate an output buffer.
+
+        Parameters
+        ----------
+        out : Optional[np.ndarray]
+            Output buffer to check. If None, a new buffer is allocated.
+
+        shape : Tuple[int, ...]
+            Required shape of output buffer.
+
+        dtype : np.dtype
+            Dtype of newly allocated output buffer.
+
+        Returns
+        -------
+        out : np.ndarray
+            Output buffer of given shape.
+        """
+    # Allocate output buffer, if necessary
+    if out is None: return np.empty(shape, dtype=dtype)
+
+    # Check output buffer
+    if not isinstance(out, np.ndarray) or out.shape != shape:
+        raise ValueError(
+            f"out should be a numpy array of shape {shape}, but was of shape "
+            f"'{getattr(out, 'shape', None)}'."
+        )
+
+    # Return output buffer
+    return out
+
+
+def scores2predictions(
+        y_score: array_like_2d,
+        k      : int,
+        classes: Optional[array_like_1d] = None,
+    ) -> np.ndarray:
+    """Select the top k most likely predictions from a matrix of scores.
+
+        Only the k highest scores of each sample are sorted, the other scores
+        are discarded using a partial selection (``np.argpartition``). This is
+        considerably cheaper than a full ``np.argsort`` when k is much smaller
+        than n_classes. Ties are broken deterministically in favour of the
+        class with the lowest index, i.e., the result is equal to
+        ``np.argsort(-y_score, axis=1, kind='stable')[:, :k]``.
+
+        Parameters
+        ----------
+        y_score : array_like_2d of shape=(n_samples, n_classes)
+            Scores, probabilities or logits for each sample and class, where a
+            higher score indicates a more likely class.
+
+        k : int
+            Number of top predictions to select.
+
+        classes : Optional[array_like_1d] of shape=(n_classes,), default = None
+            Optional labels corresponding to each column of y_score. If None,
+            the column indices are used as labels.
+
+        Returns
+        -------
+        y_pred : np.ndarray of shape=(n_samples, k)
+            Predicted labels for samples, can be used as y_pred for
+            :py:meth:`top_predictions` and
+            :py:meth:`toppred.metrics.top_classification_report`.
+        """
+    # Cast input to numpy arrays
+    y_score = np.asarray(y_score)
+
+    # Perform checks
+    if y_score.ndim != 2:
+        raise ValueError(
+            f"y_score should be a 2-D array, but was of shape "
+            f"'{y_score.shape}'."
+        )
+    n_samples, n_classes = y_score.shape
+    if not 1 <= k <= n_classes:
+        raise ValueError(
+            f"k should be between 1 and the number of classes ({n_classes}), "
+            f"but was {k}."
+        )
+    if classes is not None:
+        classes = np.asarray(classes)
+        if classes.shape != (n_classes,):
+            raise ValueError(
+                f"classes should be of shape ({n_classes},), but was of shape "
+                f"'{classes.shape}'."
+            )
+
+    # Select (unordered) top k columns of each sample
+    index  = np.argpartition(y_score, n_classes - k, axis=1)[:, n_classes - k:]
+    scores = np.take_along_axis(y_score, index, axis=1)
+
+    # Sort top k by descending score, ties by ascending index
+    order  = np.lexsort((-index, scores), axis=1)[:, ::-1]
+    index  = np.take_along_axis(index, order, axis=1)
+
+    # Samples with ties on the boundary may have selected the wrong columns
+    ties = np.flatnonzero(
+        np.count_nonzero(y_score >= scores.min(axis=1, keepdims=True), axis=1)
+        > k
+    )
+    # Fall back to a stable sort for those samples only
+    if ties.shape[0]:
+        order = np.argsort(y_score[ties, ::-1], axis=1, kind='stable')
+        index[ties] = n_classes - 1 - order[:, ::-1][:, :k]
+
+    # Return labels
+    return index if classes is None else classes[index]
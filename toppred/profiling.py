@@ -0,0 +1,251 @@
+# Imports
+import contextlib
+import json
+import threading
+import time
+import tracemalloc
+import numpy as np
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+################################################################################
+#                                   Profiler                                   #
+################################################################################
+
+# Active profiler, stages are only recorded if a profiler is active
+ACTIVE = None
+
+# Context returned by stage if no profiler is active
+DISABLED = contextlib.nullcontext()
+
+class Profiler(object):
+    """Record wall time, peak memory and array sizes of each stage of the
+        report pipeline.
+
+        Profiling is disabled unless a profiler is used as context manager, in
+        which case each stage executed within the context in the same thread
+        produces a record. Records are dictionaries containing:
+
+        - ``call``: index of the outermost stage, e.g., of each call to
+          :py:meth:`toppred.metrics.top_classification_report`.
+        - ``stage``: name of the stage.
+        - ``parent``: name of the enclosing stage, None for outermost stages.
+        - ``depth``: number of enclosing stages.
+        - ``start``: start time in seconds relative to entering the profiler.
+        - ``time``: wall time of stage in seconds.
+        - ``memory``: peak memory allocated during the stage in bytes, None
+          if memory is not traced.
+        - ``arrays``: dictionary of name to shape, dtype and nbytes of the
+          arrays processed by the stage.
+
+        Example
+        -------
+        >>> with Profiler() as profiler:
+        ...     top_classification_report(y_true, y_pred)
+        >>> profiler.summary()
+        >>> profiler.to_json('profile.json')
+
+        Attributes
+        ----------
+        records : List[dict]
+            Records of all completed stages, in order of completion.
+        """
+
+    def __init__(
+            self,
+            memory  : bool = True,
+            callback: Optional[Callable[[dict], None]] = None,
+        ):
+        """Create a profiler.
+
+            Parameters
+            ----------
+            memory : bool, default = True
+                If True, trace the peak memory of each stage using
+                ``tracemalloc``. Tracing memory slows down allocations, so set
+                to False to only measure wall time.
+
+            callback : Optional[Callable[[dict], None]], default = None
+                Optional function called with each record when its stage
+                completes, e.g., to forward records to a metrics pipeline.
+            """
+        self.memory   = memory
+        self.callback = callback
+        self.records  = list()
+        self.calls    = 0
+        self.stack    = list()
+        self.thread   = None
+        self.start    = None
+        self.previous = None
+        self.tracing  = False
+
+    ########################################################################
+    #                            Context manager                           #
+    ########################################################################
+
+    def __enter__(self) -> 'Profiler':
+        """Enable profiling."""
+        global ACTIVE
+        self.previous = ACTIVE
+        self.thread   = threading.get_ident()
+        self.start    = time.perf_counter()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.tracing = True
+        ACTIVE = self
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Disable profiling."""
+        global ACTIVE
+        ACTIVE = self.previous
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    @contextlib.contextmanager
+    def stage(self, name: str, arrays: Dict[str, Any]) -> Iterator[None]:
+        """Record a stage, see :py:meth:`stage`."""
+        # Get peak memory of enclosing stage before resetting it
+        memory = self.memory and tracemalloc.is_tracing()
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1]['peak'] = max(self.stack[-1]['peak'], peak)
+            reset_peak()
+
+        # Initialise record
+        record = {
+            'call'  : self.calls,
+            'stage' : name,
+            'parent': self.stack[-1]['record']['stage'] if self.stack else None,
+            'depth' : len(self.stack),
+            'start' : time.perf_counter() - self.start,
+            'time'  : None,
+            'memory': None,
+            'arrays': describe(arrays),
+        }
+        frame = {
+            'record' : record,
+            'current': current if memory else 0,
+            'peak'   : 0,
+        }
+
+        # Execute stage
+        self.stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record['time'] = time.perf_counter() - start
+            self.stack.pop()
+
+            # Compute peak memory above memory at start of stage
+            if memory:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                record['memory'] = max(peak - frame['current'], 0)
+                if self.stack:
+                    self.stack[-1]['peak'] = max(self.stack[-1]['peak'], peak)
+
+            # Store record
+            if not self.stack: self.calls += 1
+            self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    ########################################################################
+    #                                Export                                #
+    ########################################################################
+
+    def summary(self) -> Dict[str, dict]:
+        """Summarise records per stage.
+
+            Returns
+            -------
+            summary : Dict[str, dict]
+                Dictionary of stage name to number of ``calls``, total
+                ``time`` in seconds and maximum ``memory`` in bytes of that
+                stage, in order of first completion.
+            """
+        result = dict()
+        for record in self.records:
+            summary = result.setdefault(record['stage'], {
+                'calls': 0, 'time': 0., 'memory': None,
+            })
+            summary['calls'] += 1
+            summary['time' ] += record['time']
+            if record['memory'] is not None:
+                summary['memory'] = max(
+                    summary['memory'] or 0, record['memory'],
+                )
+        return result
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """Export records as JSON lines.
+
+            Parameters
+            ----------
+            path : Optional[str], default = None
+                If given, write records to this file.
+
+            Returns
+            -------
+            result : str
+                Records as JSON, one record per line.
+            """
+        result = "".join(json.dumps(record) + "\n" for record in self.records)
+        if path is not None:
+            with open(path, 'w') as outfile:
+                outfile.write(result)
+        return result
+
+
+################################################################################
+#                                    Stages                                    #
+################################################################################
+
+def stage(name: str, **arrays: Any):
+    """Context manager recording a stage of the report pipeline if a
+        :py:class:`Profiler` is active in the current thread, otherwise it
+        does nothing.
+
+        Parameters
+        ----------
+        name : str
+            Name of stage.
+
+        **arrays : Any
+            Arrays processed by the stage, of which the shape and dtype are
+            recorded. None values are ignored.
+
+        Returns
+        -------
+        context : ContextManager
+            Context in which the stage is executed.
+        """
+    if ACTIVE is None or ACTIVE.thread != threading.get_ident():
+        return DISABLED
+    return ACTIVE.stage(name, arrays)
+
+
+################################################################################
+#                              Auxiliary methods                               #
+################################################################################
+
+def describe(arrays: Dict[str, Any]) -> Dict[str, dict]:
+    """Describe the shape, dtype and number of bytes of arrays."""
+    result = dict()
+    for name, array in arrays.items():
+        if array is None: continue
+        array = array if isinstance(array, np.ndarray) else np.asarray(array)
+        result[name] = {
+            'shape' : list(array.shape),
+            'dtype' : str(array.dtype),
+            'nbytes': int(array.nbytes),
+        }
+    return result
+
+
+def reset_peak() -> None:
+    """Reset the traced peak memory, not supported before Python 3.9."""
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
@@ -0,0 +1,307 @@
+# Imports
+import numpy as np
+from toppred.confusion import TopConfusion, check_sample_weight, encode_ranks
+from toppred.confusion import check_total_weight
+from toppred.metrics import top_confusion_report
+from toppred.predictions import check_predictions
+from toppred.types import array_like_1d, array_like_2d
+from typing import List, Literal, Optional, Union
+
+class TopRanks(object):
+    """Compact index of the rank at which y_true first occurs in y_pred.
+
+        The (n_samples, n_predictions) prediction matrix is only scanned once
+        to compute, for each sample, the rank of its first correct prediction
+        and the encoded labels of y_true and y_pred[:, 0]. These are all that
+        is needed to compute reports for any number of top predictions k, as
+        well as accuracy curves, the mean reciprocal rank and NDCG, so the
+        prediction matrix can be discarded afterwards.
+
+        Example
+        -------
+        >>> ranks = TopRanks.from_predictions(y_true, y_pred)
+        >>> print(ranks.report(k=3))
+        >>> ranks.accuracy()
+        >>> ranks.ndcg(k=10)
+
+        Attributes
+        ----------
+        classes : np.ndarray of shape=(n_classes,)
+            Sorted labels occurring in y_true or y_pred[:, 0].
+
+        y_true : np.ndarray of shape=(n_samples,)
+            Encoded true labels.
+
+        y_pred : np.ndarray of shape=(n_samples,)
+            Encoded most likely predictions, i.e., y_pred[:, 0].
+
+        ranks : np.ndarray of shape=(n_samples,)
+            Rank of first correct prediction, n_predictions if y_true does not
+            occur in y_pred. Stored as uint8 or uint16 if possible.
+
+        n_predictions : int
+            Number of top predictions per sample.
+
+        sample_weight : Optional[np.ndarray] of shape=(n_samples,)
+            Sample weights, None if samples are unweighted.
+        """
+
+    def __init__(
+            self,
+            classes      : np.ndarray,
+            y_true       : np.ndarray,
+            y_pred       : np.ndarray,
+            ranks        : np.ndarray,
+            n_predictions: int,
+            sample_weight: Optional[np.ndarray] = None,
+        ):
+        """Create an index from precomputed arrays, see class attributes."""
+        self.classes       = classes
+        self.y_true        = y_true
+        self.y_pred        = y_pred
+        self.ranks         = ranks
+        self.n_predictions = n_predictions
+        self.sample_weight = sample_weight
+
+    @classmethod
+    def from_predictions(
+            cls,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            sample_weight: Optional[array_like_1d] = None,
+        ) -> 'TopRanks':
+        """Compute the rank index of y_true and y_pred.
+
+            Parameters
+            ----------
+            y_true : array_like_1d of shape=(n_samples,)
+                True labels corresponding to samples.
+
+            y_pred : array_like_2d of shape=(n_samples, n_predictions)
+                Predicted labels for samples. Each column y_pred[:, i]
+                indicates the i-th most likely prediction (0-indexed) for the
+                given sample.
+
+            sample_weight : Optional[array_like_1d], default = None
+                Sample weights.
+
+            Returns
+            -------
+            result : TopRanks
+                Rank index of y_true and y_pred.
+            """
+        # Cast and check input
+        y_true, y_pred = check_predictions(y_true, y_pred)
+        n_predictions  = y_pred.shape[1]
+
+        # Compute hit ranks and encode labels
+        classes, true_codes, pred_codes, ranks = encode_ranks(y_true, y_pred)
+
+        # Return result, with ranks in the smallest unsigned dtype
+        return cls(
+            classes       = classes,
+            y_true        = true_codes,
+            y_pred        = pred_codes,
+            ranks         = ranks.astype(
+                np.min_scalar_type(n_predictions), copy=False,
+            ),
+            n_predictions = n_predictions,
+            sample_weight = check_sample_weight(sample_weight, y_true.shape[0]),
+        )
+
+    ########################################################################
+    #                              Properties                              #
+    ########################################################################
+
+    @property
+    def n_samples(self) -> int:
+        """Number of indexed samples."""
+        return self.ranks.shape[0]
+
+    @property
+    def n_classes(self) -> int:
+        """Number of classes."""
+        return self.classes.shape[0]
+
+    ########################################################################
+    #                                Reports                               #
+    ########################################################################
+
+    def confusion(self, k: Optional[int] = None) -> TopConfusion:
+        """Compute the confusion counts of the top 1 to k predictions.
+
+            Parameters
+            ----------
+            k : Optional[int], default = None
+                Number of top predictions, if None, all n_predictions.
+
+            Returns
+            -------
+            confusion : TopConfusion
+                Confusion counts of the top 1 to k predictions.
+            """
+        k = self.check_k(k)
+        return TopConfusion.from_ranks(
+            classes       = self.classes,
+            true_codes    = self.y_true,
+            pred_codes    = self.y_pred,
+            ranks         = np.minimum(self.ranks, k),
+            n_predictions = k,
+            sample_weight = self.sample_weight,
+        )
+
+    def report(
+            self,
+            k            : Optional[int] = None,
+            labels       : Optional[array_like_1d] = None,
+            target_names : Optional[List[str]] = None,
+            digits       : int = 2,
+            output_dict  : bool = False,
+            zero_division: Literal["warn", 0, 1] = "warn",
+            observed_only: bool = False,
+            n_worst      : Optional[int] = None,
+        ) -> Union[str, dict]:
+        """Create a classification report of the top 1 to k predictions, equal
+            to :py:meth:`toppred.metrics.top_classification_report` on
+            y_pred[:, :k]. As there, a ValueError is raised if all sample
+            weights are zero.
+
+            Parameters
+            ----------
+            k : Optional[int], default = None
+                Number of top predictions, if None, all n_predictions.
+
+            labels : Optional[array_like_1d], default = None
+                Optional list of label indices to include in the report.
+
+            target_names : Optional[List[str]] = None
+                Optional display names matching the labels (same order).
+
+            digits : int, default = 2
+                Number of digits for formatting output floating point values.
+                When ``output_dict`` is ``True``, this will be ignored and the
+                returned values will not be rounded.
+
+            output_dict : bool, default = False
+                If True, return output as dict.
+
+            zero_division : Union[Literal["warn"], 0, 1], default = "warn"
+                Sets the value to return when there is a zero division. If set
+                to “warn”, this acts as 0, but warnings are also raised.
+
+            observed_only : bool, default = False
+                If True, only report labels that occur in y_true or in the top
+                prediction.
+
+            n_worst : Optional[int], default = None
+                If given, only report the n_worst labels with the lowest
+                F1-score per top prediction.
+
+            Returns
+            -------
+            report : Union[str, dict]
+                Text summary of the precision, recall, F1 score for each class.
+                Dictionary returned if output_dict is True.
+            """
+        confusion = self.confusion(k)
+        check_total_weight(confusion)
+        return top_confusion_report(
+            confusion     = confusion,
+            labels        = labels,
+            target_names  = target_names,
+            digits        = digits,
+            output_dict   = output_dict,
+            zero_division = zero_division,
+            observed_only = observed_only,
+            n_worst       = n_worst,
+        )
+
+    ########################################################################
+    #                            Ranking metrics                           #
+    ########################################################################
+
+    def counts(self) -> np.ndarray:
+        """Count the (weighted) number of samples per hit rank.
+
+            Returns
+            -------
+            counts : np.ndarray of shape=(n_predictions+1,)
+                (Weighted) number of samples per rank, where the last entry
+                counts the samples for which y_true does not occur in y_pred.
+            """
+        return np.bincount(
+            self.ranks,
+            weights   = self.sample_weight,
+            minlength = self.n_predictions + 1,
+        )
+
+    def accuracy(self) -> np.ndarray:
+        """Compute the accuracy of the top 1 to n_predictions predictions,
+            see :py:meth:`toppred.metrics.top_accuracy_score`.
+
+            Returns
+            -------
+            accuracy : np.ndarray of shape=(n_predictions,)
+                Fraction of samples for which y_true occurs in the top i
+                predictions. Contains nan if the total sample weight is zero.
+            """
+        counts = self.counts()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.cumsum(counts[:-1]) / np.sum(counts)
+
+    def mean_reciprocal_rank(self, k: Optional[int] = None) -> float:
+        """Compute the mean reciprocal rank, counting only the top k
+            predictions, see :py:meth:`toppred.metrics.mean_reciprocal_rank`.
+
+            Parameters
+            ----------
+            k : Optional[int], default = None
+                Number of top predictions, if None, all n_predictions.
+
+            Returns
+            -------
+            mrr : float
+                Mean reciprocal rank, nan if the total sample weight is zero.
+            """
+        return self.mean_gain(1 / np.arange(1, self.n_predictions + 1), k)
+
+    def ndcg(self, k: Optional[int] = None) -> float:
+        """Compute the normalized discounted cumulative gain of the top k
+            predictions. As each sample has a single relevant label y_true,
+            the ideal DCG is 1 and the NDCG of a sample is 1 / log2(rank + 2)
+            if y_true occurs in the top k predictions and 0 otherwise.
+
+            Parameters
+            ----------
+            k : Optional[int], default = None
+                Number of top predictions, if None, all n_predictions.
+
+            Returns
+            -------
+            ndcg : float
+                Mean NDCG@k, nan if the total sample weight is zero.
+            """
+        return self.mean_gain(
+            1 / np.log2(np.arange(self.n_predictions) + 2), k,
+        )
+
+    ########################################################################
+    #                           Auxiliary methods                          #
+    ########################################################################
+
+    def mean_gain(self, gains: np.ndarray, k: Optional[int] = None) -> float:
+        """Compute the (weighted) mean gain of samples, where samples with a
+            hit rank r < k have gains[r] and other samples have gain 0."""
+        k = self.check_k(k)
+        counts = self.counts()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return float(np.sum(counts[:k] * gains[:k]) / np.sum(counts))
+
+    def check_k(self, k: Optional[int]) -> int:
+        """Check k, returns n_predictions if k is None."""
+        if k is None: return self.n_predictions
+        if not 1 <= k <= self.n_predictions:
+            raise ValueError(
+                f"k should be in [1, {self.n_predictions}], but was {k}."
+            )
+        return k
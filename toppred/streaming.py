@@ -0,0 +1,591 @@
+# Imports
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from toppred.confusion import TopConfusion, check_n_jobs, check_sample_weight
+from toppred.confusion import check_total_weight
+from toppred.metrics import top_confusion_report
+from toppred.predictions import check_predictions
+from toppred.types import array_like_1d, array_like_2d
+from typing import Iterable, List, Literal, Optional, Tuple, Union
+
+class TopAccumulator(object):
+    """Accumulate confusion counts of top predictions over chunks of samples.
+
+        Only the confusion counts are kept in memory, i.e., memory scales with
+        n_classes x n_predictions instead of n_samples. After all chunks have
+        been added using :py:meth:`update`, :py:meth:`report` produces the same
+        output as :py:meth:`toppred.metrics.top_classification_report` on the
+        concatenated chunks.
+
+        Example
+        -------
+        >>> accumulator = TopAccumulator()
+        >>> for y_true, y_pred in chunks:
+        ...     accumulator.update(y_true, y_pred)
+        >>> print(accumulator.report())
+        """
+
+    def __init__(self, labels: Optional[array_like_1d] = None):
+        """Create an empty accumulator.
+
+            Parameters
+            ----------
+            labels : Optional[array_like_1d], default = None
+                Optional list of label indices to include in the report.
+            """
+        self.labels    = None if labels is None else np.asarray(labels)
+        self.confusion = None
+
+    ########################################################################
+    #                                Update                                #
+    ########################################################################
+
+    def update(
+            self,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            sample_weight: Optional[array_like_1d] = None,
+        ) -> 'TopAccumulator':
+        """Add a chunk of samples to the accumulator.
+
+            Parameters
+            ----------
+            y_true : array_like_1d of shape=(n_samples,)
+                True labels corresponding to samples.
+
+            y_pred : array_like_2d of shape=(n_samples, n_predictions)
+                Predicted labels for samples. Each column y_pred[:, i]
+                indicates the i-th most likely prediction (0-indexed) for the
+                given sample. n_predictions should be equal for all chunks.
+
+            sample_weight : Optional[array_like_1d], default = None
+                Sample weights.
+
+            Returns
+            -------
+            self : TopAccumulator
+                Returns self.
+            """
+        # Count confusion of chunk, labels are only selected by the report
+        confusion = TopConfusion.from_predictions(
+            y_true        = y_true,
+            y_pred        = y_pred,
+            sample_weight = sample_weight,
+        )
+
+        # Add counts of chunk to total counts
+        return self.add(confusion)
+
+    def update_blocks(
+            self,
+            blocks: Iterable[
+                Tuple[array_like_1d, array_like_2d, Optional[array_like_1d]]
+            ],
+            n_jobs: Optional[int] = None,
+        ) -> 'TopAccumulator':
+        """Add blocks of samples to the accumulator, e.g., as produced by
+            :py:meth:`toppred.files.read_blocks`.
+
+            Blocks are counted by n_jobs threads while the next blocks are
+            read. At most 2 x n_jobs blocks are held in memory at once, so
+            memory remains bounded regardless of the number of blocks.
+
+            Parameters
+            ----------
+            blocks : Iterable[Tuple]
+                Iterable of (y_true, y_pred, sample_weight) blocks of types
+                array_like_1d, array_like_2d and Optional[array_like_1d], see
+                :py:meth:`update`.
+
+            n_jobs : Optional[int], default = None
+                Number of threads used to count blocks. None means 1, -1 means
+                all processors.
+
+            Returns
+            -------
+            self : TopAccumulator
+                Returns self.
+            """
+        n_jobs = check_n_jobs(n_jobs)
+
+        # Count blocks in order, merging the oldest block once too many
+        # blocks are in flight
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            pending = deque()
+            for y_true, y_pred, sample_weight in blocks:
+                pending.append(executor.submit(
+                    TopConfusion.from_predictions,
+                    y_true        = y_true,
+                    y_pred        = y_pred,
+                    sample_weight = sample_weight,
+                ))
+                if len(pending) >= 2 * n_jobs:
+                    self.add(pending.popleft().result())
+
+            # Merge remaining blocks
+            while pending:
+                self.add(pending.popleft().result())
+
+        # Return self
+        return self
+
+    def add(self, confusion: TopConfusion) -> 'TopAccumulator':
+        """Add precomputed confusion counts to the accumulator.
+
+            Parameters
+            ----------
+            confusion : TopConfusion
+                Confusion counts of a chunk of samples.
+
+            Returns
+            -------
+            self : TopAccumulator
+                Returns self.
+            """
+        # Set confusion for first chunk
+        if self.confusion is None:
+            self.confusion = confusion
+            return self
+
+        # Add counts of chunk to total counts
+        self.confusion = self.confusion.merge(confusion)
+
+        # Return self
+        return self
+
+    ########################################################################
+    #                                Output                                #
+    ########################################################################
+
+    def compute(self) -> TopConfusion:
+        """Return the accumulated confusion counts.
+
+            Returns
+            -------
+            confusion : TopConfusion
+                Confusion counts of all top predictions over all chunks.
+            """
+        # Check if any chunks were added
+        if self.confusion is None:
+            raise ValueError(
+                "No samples were added to the accumulator, please call "
+                "update() first."
+            )
+
+        # Return confusion
+        return self.confusion
+
+    def report(
+            self,
+            target_names : Optional[List[str]] = None,
+            digits       : int = 2,
+            output_dict  : bool = False,
+            zero_division: Literal["warn", 0, 1] = "warn",
+            observed_only: bool = False,
+            n_worst      : Optional[int] = None,
+        ) -> Union[str, dict]:
+        """Create a classification report for all accumulated samples, see
+            :py:meth:`toppred.metrics.top_classification_report`. Chunks may
+            have zero weight, but a ValueError is raised if the weights of all
+            accumulated samples sum to zero.
+
+            Parameters
+            ----------
+            target_names : Optional[List[str]] = None
+                Optional display names matching the labels (same order).
+
+            digits : int, default = 2
+                Number of digits for formatting output floating point values.
+                When ``output_dict`` is ``True``, this will be ignored and the
+                returned values will not be rounded.
+
+            output_dict : bool, default = False
+                If True, return output as dict.
+
+            zero_division : Union[Literal["warn"], 0, 1], default = "warn"
+                Sets the value to return when there is a zero division. If set
+                to “warn”, this acts as 0, but warnings are also raised.
+
+            observed_only : bool, default = False
+                If True, only report labels that occur in y_true or in the top
+                prediction.
+
+            n_worst : Optional[int], default = None
+                If given, only report the n_worst labels with the lowest
+                F1-score per top prediction.
+
+            Returns
+            -------
+            report : Union[str, dict]
+                Text summary of the precision, recall, F1 score for each class.
+                Dictionary returned if output_dict is True.
+            """
+        confusion = self.compute()
+        check_total_weight(confusion)
+        return top_confusion_report(
+            confusion     = confusion,
+            labels        = self.labels,
+            target_names  = target_names,
+            digits        = digits,
+            output_dict   = output_dict,
+            zero_division = zero_division,
+            observed_only = observed_only,
+            n_worst       = n_worst,
+        )
+
+
+class WindowedTopAccumulator(object):
+    """Maintain confusion counts of top predictions over a time window of
+        events, e.g., to monitor a deployed model on live traffic.
+
+        Events are assigned to buckets of width ``bucket`` based on their
+        timestamp. The window consists of the ``window / bucket`` most recent
+        buckets, i.e., a tumbling window if ``bucket == window`` and a sliding
+        window if ``bucket < window``. Each event updates the counts of the
+        window in O(n_predictions) and is recorded in its bucket as a
+        (true label, top prediction, hit rank) triple. When a bucket expires,
+        its triples are subtracted from the counts of the window, so the
+        window never has to be recomputed from the events it contains.
+
+        The report equals that of
+        :py:meth:`toppred.metrics.top_classification_report` over the events
+        in the window. With non-integer sample weights, the weighted counts
+        may differ by floating point rounding due to subtraction.
+
+        Example
+        -------
+        >>> window = WindowedTopAccumulator(
+        ...     n_predictions=5, window=3600, bucket=60,
+        ... )
+        >>> for y_true, y_pred in events:
+        ...     window.add(y_true, y_pred, timestamp=time.time())
+        >>> print(window.report())
+        """
+
+    def __init__(
+            self,
+            n_predictions: int,
+            window       : float,
+            bucket       : Optional[float] = None,
+            labels       : Optional[array_like_1d] = None,
+        ):
+        """Create an empty window.
+
+            Parameters
+            ----------
+            n_predictions : int
+                Number of top predictions per event.
+
+            window : float
+                Length of the window in units of the timestamps.
+
+            bucket : Optional[float], default = None
+                Width of each bucket in units of the timestamps. The window
+                should be a multiple of bucket. If None, bucket equals window,
+                i.e., the window is a tumbling window.
+
+            labels : Optional[array_like_1d], default = None
+                Optional list of label indices to include in the report.
+            """
+        # Check input
+        bucket = window if bucket is None else bucket
+        if n_predictions < 1:
+            raise ValueError(
+                f"n_predictions should be >= 1, but was {n_predictions}."
+            )
+        if window <= 0 or bucket <= 0:
+            raise ValueError("window and bucket should be > 0.")
+        n_buckets = window / bucket
+        if abs(n_buckets - round(n_buckets)) > 1e-9:
+            raise ValueError(
+                f"window ({window}) should be a multiple of bucket ({bucket})."
+            )
+
+        # Set parameters
+        self.n_predictions = n_predictions
+        self.window        = window
+        self.bucket        = bucket
+        self.n_buckets     = int(round(n_buckets))
+        self.labels        = None if labels is None else np.asarray(labels)
+
+        # Initialise label encoding, counts are stored in order of occurrence
+        self.codes   = dict()
+        self.classes = list()
+        self.counts  = {
+            'tp'  : np.zeros((n_predictions, 0), dtype=np.int64),
+            'pred': np.zeros((n_predictions, 0), dtype=np.int64),
+            'true': np.zeros(0, dtype=np.int64),
+        }
+        self.weights = {
+            name: np.zeros(counts.shape, dtype=np.float64)
+            for name, counts in self.counts.items()
+        }
+        self.weighted = False
+
+        # Initialise buckets as bucket index to a dictionary of
+        # (true, pred, rank) -> [n, weight]
+        self.buckets = deque()
+        self.current = None
+
+    ########################################################################
+    #                                Update                                #
+    ########################################################################
+
+    def add(
+            self,
+            y_true       : object,
+            y_pred       : array_like_1d,
+            timestamp    : float,
+            sample_weight: float = 1.,
+        ) -> bool:
+        """Add a single event to the window in O(n_predictions).
+
+            Parameters
+            ----------
+            y_true : object
+                True label of event.
+
+            y_pred : array_like_1d of shape=(n_predictions,)
+                Top predictions of event, from most to least likely.
+
+            timestamp : float
+                Time of event. Events may arrive out of order, as long as they
+                fall within the window.
+
+            sample_weight : float, default = 1.
+                Weight of event.
+
+            Returns
+            -------
+            added : bool
+                True if the event was added, False if it is older than the
+                window and was ignored.
+            """
+        # Check predictions
+        y_pred = np.asarray(y_pred).reshape(-1)
+        if y_pred.shape[0] != self.n_predictions:
+            raise ValueError(
+                f"y_pred should contain {self.n_predictions} predictions, but "
+                f"contained {y_pred.shape[0]}."
+            )
+
+        # Get bucket of event, expiring buckets outside the window
+        bucket = self.advance(timestamp)
+        if bucket is None: return False
+
+        # Compute hit rank and encode labels
+        hits = np.flatnonzero(y_pred == y_true)
+        rank = int(hits[0]) if hits.shape[0] else self.n_predictions
+        true = self.encode(y_true)
+        pred = self.encode(y_pred[0])
+
+        # Update counts of window and record event in bucket
+        self.count(true, pred, rank, 1, sample_weight)
+        entry = bucket.setdefault((true, pred, rank), [0, 0.])
+        entry[0] += 1
+        entry[1] += sample_weight
+        self.weighted |= sample_weight != 1
+
+        # Return event was added
+        return True
+
+    def update(
+            self,
+            y_true       : array_like_1d,
+            y_pred       : array_like_2d,
+            timestamps   : array_like_1d,
+            sample_weight: Optional[array_like_1d] = None,
+        ) -> 'WindowedTopAccumulator':
+        """Add multiple events to the window, see :py:meth:`add`.
+
+            Parameters
+            ----------
+            y_true : array_like_1d of shape=(n_samples,)
+                True labels of events.
+
+            y_pred : array_like_2d of shape=(n_samples, n_predictions)
+                Top predictions of events.
+
+            timestamps : array_like_1d of shape=(n_samples,)
+                Time of each event.
+
+            sample_weight : Optional[array_like_1d], default = None
+                Weight of each event.
+
+            Returns
+            -------
+            self : WindowedTopAccumulator
+                Returns self.
+            """
+        # Cast and check input
+        y_true, y_pred = check_predictions(y_true, y_pred)
+        timestamps = np.asarray(timestamps).reshape(-1)
+        sample_weight = check_sample_weight(sample_weight, y_true.shape[0])
+        if timestamps.shape[0] != y_true.shape[0]:
+            raise ValueError(
+                f"timestamps should be of shape ({y_true.shape[0]},), but was "
+                f"of shape '{timestamps.shape}'."
+            )
+
+        # Add events
+        for i in range(y_true.shape[0]):
+            self.add(
+                y_true        = y_true[i],
+                y_pred        = y_pred[i],
+                timestamp     = timestamps[i],
+                sample_weight = 1. if sample_weight is None else
+                                sample_weight[i],
+            )
+
+        # Return self
+        return self
+
+    def advance(self, timestamp: float) -> Optional[dict]:
+        """Advance the window to the given time, expiring old buckets. This
+            can be called without adding events, e.g., on a timer, such that
+            the report only contains recent events.
+
+            Parameters
+            ----------
+            timestamp : float
+                Current time.
+
+            Returns
+            -------
+            bucket : Optional[dict]
+                Bucket of timestamp, None if timestamp is older than the
+                window.
+            """
+        index = int(np.floor(timestamp / self.bucket))
+
+        # Move window forward, if necessary
+        if self.current is None or index > self.current:
+            self.current = index
+            self.buckets.append((index, dict()))
+
+            # Expire buckets outside of the window
+            while self.buckets[0][0] <= self.current - self.n_buckets:
+                self.expire(self.buckets.popleft()[1])
+
+        # Ignore events older than the window
+        if index <= self.current - self.n_buckets: return None
+
+        # Find bucket of event, searching from the most recent bucket
+        for position in range(len(self.buckets) - 1, -1, -1):
+            if self.buckets[position][0] == index:
+                return self.buckets[position][1]
+            if self.buckets[position][0] < index:
+                self.buckets.insert(position + 1, (index, dict()))
+                return self.buckets[position + 1][1]
+        self.buckets.appendleft((index, dict()))
+        return self.buckets[0][1]
+
+    ########################################################################
+    #                                Output                                #
+    ########################################################################
+
+    def compute(self) -> TopConfusion:
+        """Return the confusion counts of the events in the window.
+
+            Returns
+            -------
+            confusion : TopConfusion
+                Confusion counts of all top predictions over the window.
+            """
+        # Sort classes, as expected by TopConfusion
+        classes = np.asarray(self.classes)
+        order   = np.argsort(classes, kind='stable')
+        counts  = {
+            name: array[..., order] for name, array in self.counts.items()
+        }
+
+        # Return unweighted counts, if possible
+        if not self.weighted:
+            return TopConfusion(classes[order], **counts)
+
+        # Otherwise, return weighted counts, zero where no events are counted
+        weights = {
+            name: np.where(counts[name] == 0, 0., array[..., order])
+            for name, array in self.weights.items()
+        }
+        return TopConfusion(
+            classes = classes[order],
+            n_pred  = counts['pred'],
+            n_true  = counts['true'],
+            **weights,
+        )
+
+    def report(
+            self,
+            target_names : Optional[List[str]] = None,
+            digits       : int = 2,
+            output_dict  : bool = False,
+            zero_division: Literal["warn", 0, 1] = "warn",
+            observed_only: bool = False,
+            n_worst      : Optional[int] = None,
+        ) -> Union[str, dict]:
+        """Create a classification report for the events in the window, see
+            :py:meth:`TopAccumulator.report`."""
+        return top_confusion_report(
+            confusion     = self.compute(),
+            labels        = self.labels,
+            target_names  = target_names,
+            digits        = digits,
+            output_dict   = output_dict,
+            zero_division = zero_division,
+            observed_only = observed_only,
+            n_worst       = n_worst,
+        )
+
+    ########################################################################
+    #                           Auxiliary methods                          #
+    ########################################################################
+
+    def encode(self, label: object) -> int:
+        """Get the code of a label, adding it if it was not seen before."""
+        code = self.codes.get(label)
+        if code is not None: return code
+
+        # Add label
+        code = len(self.classes)
+        self.codes[label] = code
+        self.classes.append(label)
+
+        # Grow counts, doubling capacity to amortize copies
+        capacity = self.counts['true'].shape[0]
+        if code >= capacity:
+            for arrays in (self.counts, self.weights):
+                for name, array in arrays.items():
+                    grown = np.zeros(
+                        array.shape[:-1] + (max(1, 2 * capacity),),
+                        dtype = array.dtype,
+                    )
+                    grown[..., :capacity] = array
+                    arrays[name] = grown
+
+        # Return code
+        return code
+
+    def count(
+            self,
+            true  : int,
+            pred  : int,
+            rank  : int,
+            n     : int,
+            weight: float,
+        ) -> None:
+        """Add (or subtract if n < 0) n events with the given true label,
+            top prediction and hit rank, with a total weight of weight."""
+        for arrays, value in [(self.counts, n), (self.weights, weight)]:
+            arrays['true'][true] += value
+            # Events are correct for top i >= rank
+            arrays['tp'  ][rank:, true] += value
+            arrays['pred'][rank:, true] += value
+            # Otherwise they are predicted as y_pred[0]
+            arrays['pred'][:rank, pred] += value
+
+    def expire(self, bucket: dict) -> None:
+        """Subtract the events of an expired bucket from the counts."""
+        for (true, pred, rank), (n, weight) in bucket.items():
+            self.count(true, pred, rank, -n, -weight)
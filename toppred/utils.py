@@ -1,11 +1,12 @@
 # Imports
-import numpy as np
-import pandas as pd
-from typing import List
+from typing import Dict, List, Tuple
+
+# Averages that are shown after all labels
+AVERAGES = ('micro avg', 'macro avg', 'weighted avg', 'samples avg')
 
 def reports2string(reports: List[dict], digits: int = 2) -> str:
     """Convert a list of classification report dictionaries to a string.
-    
+
         Parameters
         ----------
         reports : List[dict]
@@ -15,65 +16,162 @@ def reports2string(reports: List[dict], digits: int = 2) -> str:
 
         digits : int, default = 2
             Number of digits of precision to use.
-            
+
         Returns
         -------
         report : str
             String representation of list of classification reports.
         """
-    # Initialise dataframes
-    dataframes = list()
+    # Collect labels, metrics and support of all reports
+    labels, metrics, support = collect_reports(reports)
 
-    # Loop over all reports
+    # Initialise columns as (top, header, values) tuples
+    columns = list()
     for top, report in enumerate(reports):
-        # Initialise labels and metrics
-        labels  = list()
-        metrics = dict()
+        for metric in metrics:
+            columns.append((f"Top {top+1}", metric, [
+                "" if label not in report or metric not in report[label]
+                else format_value(report[label][metric], digits)
+                for label in labels
+            ]))
+    columns.append(("", "support", [
+        "" if label not in support else format_support(support[label], digits)
+        for label in labels
+    ]))
+
+    # Compute widths of index and columns
+    index_width = max([len(str(label)) for label in labels] + [0])
+    widths = [
+        max([len(header)] + [len(value) for value in values])
+        for _, header, values in columns
+    ]
+
+    # Create header, top is shown above its first column only
+    tops    = [" " * index_width]
+    headers = [" " * index_width]
+    for i, ((top, header, _), width) in enumerate(zip(columns, widths)):
+        first = i == 0 or columns[i-1][0] != top
+        tops   .append(f"{top if first else '':>{width}}")
+        headers.append(f"{header:>{width}}")
+    lines = [" ".join(tops), " ".join(headers), ""]
+
+    # Add a row for each label, with a blank line before micro avg
+    for row, label in enumerate(labels):
+        if label == 'micro avg':
+            lines.append("")
+        lines.append(" ".join(
+            [f"{label:<{index_width}}"] +
+            [f"{values[row]:>{width}}" for (_, _, values), width in zip(
+                columns, widths,
+            )]
+        ))
+
+    # Return report as string
+    return "\n" + "\n".join(line.rstrip() for line in lines) + "\n"
+
+
+def reports2dataframe(reports: List[dict]):
+    """Convert a list of classification report dictionaries to a pandas
+        DataFrame with a (top, metric) MultiIndex as columns. Pandas is only
+        imported when this method is called.
+
+        Parameters
+        ----------
+        reports : List[dict]
+            List of classification reports to convert to a DataFrame.
+            Should be produced with ``sklearn.metrics.classification_report``
+            where ``output_dict = True``.
+
+        Returns
+        -------
+        dataframe : pd.DataFrame
+            DataFrame where each row corresponds to a label or average and
+            each column to a (top, metric) tuple. Values are not rounded.
+        """
+    # Import pandas lazily
+    import pandas as pd
+
+    # Collect labels, metrics and support of all reports
+    labels, metrics, support = collect_reports(reports)
 
-        # Collect all labels and metrics in report
+    # Collect data per column
+    data = dict()
+    for top, report in enumerate(reports):
+        for metric in metrics:
+            data[(f"Top {top+1}", metric)] = [
+                report.get(label, dict()).get(metric, float('nan'))
+                for label in labels
+            ]
+    data[("", "support")] = [
+        support.get(label, float('nan')) for label in labels
+    ]
+
+    # Return dataframe
+    return pd.DataFrame(data, index=labels)
+
+
+################################################################################
+#                              Auxiliary methods                               #
+################################################################################
+
+def collect_reports(
+        reports: List[dict],
+    ) -> Tuple[List[str], List[str], Dict[str, float]]:
+    """Collect the labels, metrics and support of classification reports.
+
+        Parameters
+        ----------
+        reports : List[dict]
+            List of classification reports.
+
+        Returns
+        -------
+        labels : List[str]
+            Labels in order of first occurrence, followed by averages.
+            Non-dictionary entries, i.e., accuracy, are ignored.
+
+        metrics : List[str]
+            Metrics in order of first occurrence, excluding support.
+
+        support : Dict[str, float]
+            Support of each label, taken from the last report containing it.
+        """
+    # Initialise result
+    labels  = dict()
+    metrics = dict()
+    support = dict()
+
+    # Loop over all reports
+    for report in reports:
         for label, performance in report.items():
             # Ignore non-dictionary performance metrics
             if not isinstance(performance, dict): continue
 
-            # Add space before micro avg
-            if label == 'micro avg':
-                labels.append('')
-                for key in metrics:
-                    metrics[key].append('')
-
-            # Add label
-            labels.append(label)
-            # Add all metrics
-            for metric, value in performance.items():
-
-                # Set precision
+            # Add label and metrics
+            labels[label] = None
+            for metric in performance:
                 if metric != 'support':
-                    # Set MultiIndex
-                    metric = (f"Top {top+1}", metric, '')
-
-                    # Set precision value
-                    value = f"{value:.{digits}f}"
+                    metrics[metric] = None
+            if 'support' in performance:
+                support[label] = performance['support']
 
-                    # Add metric
-                    if metric not in metrics:
-                        metrics[metric] = list()
-                    metrics[metric].append(value)
+    # Place averages after all labels
+    averages = [label for label in labels if label in AVERAGES]
+    labels   = [label for label in labels if label not in AVERAGES] + averages
 
-            if top == len(reports) - 1:
-                if ('', 'support', '') not in metrics:
-                    metrics[('', 'support', '')] = list()
-                metrics[('', 'support', '')].append(performance['support'])
+    # Return result
+    return labels, list(metrics), support
 
-        # Transform to dataframe
-        dataframes.append(pd.DataFrame(metrics, index=labels))
 
-    # Merge dataframes
-    dataframe = pd.concat(dataframes, axis=1)
+def format_value(value: float, digits: int = 2) -> str:
+    """Format metric with given digits, integer counts are formatted as is."""
+    if isinstance(value, int):
+        return f"{value}"
+    return f"{value:.{digits}f}"
 
-    # Style dataframe
-    dataframe.style.set_properties(**{
-        'text-align': 'right'
-    })
 
-    # Return dataframe as string
-    return f"\n{dataframe}\n"
+def format_support(support: float, digits: int = 2) -> str:
+    """Format support as integer if possible, otherwise with given digits."""
+    if float(support).is_integer():
+        return f"{int(support)}"
+    return f"{support:.{digits}f}"